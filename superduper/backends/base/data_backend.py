@@ -58,8 +58,12 @@ class BaseDataBackend(ABC):
         pass
 
     @abstractmethod
-    def build_metadata(self):
-        """Build a default metadata store based on current connection."""
+    def build_metadata(self, job_flush_interval: float = 0):
+        """Build a default metadata store based on current connection.
+
+        :param job_flush_interval: Maximum age in seconds of buffered job writes,
+                                   for stores which buffer them.
+        """
         pass
 
     @abstractmethod
@@ -1,3 +1,6 @@
+import copy
+import functools
+import threading
 import time
 import typing as t
 from abc import ABC, abstractmethod
@@ -258,6 +261,37 @@ class MetaDataStore(ABC):
             raise FileNotFoundError(f'Object {identifier} does not exist in metadata')
         return r
 
+    def get_component_versions(
+        self, type_id: str, identifier: str, allow_hidden: bool = False
+    ) -> t.List[t.Dict[str, t.Any]]:
+        """
+        Get the metadata of all versions of a component, sorted by version.
+
+        :param type_id: type of component
+        :param identifier: identifier of component
+        :param allow_hidden: whether to allow hidden components
+        """
+        out = []
+        for version in sorted(self.show_component_versions(type_id, identifier)):
+            r = self._get_component(
+                type_id=type_id,
+                identifier=identifier,
+                version=version,
+                allow_hidden=allow_hidden,
+            )
+            if r is not None:
+                out.append(r)
+        return out
+
+    @abstractmethod
+    def get_component_subtree(self, uuid: str) -> t.List[t.Tuple[str, str]]:
+        """
+        Get all (parent, child) relationships below a component version.
+
+        :param uuid: unique identifier of the root component version
+        """
+        pass
+
     @abstractmethod
     def _update_object(
         self,
@@ -340,8 +374,76 @@ class MetaDataStoreProxy(DataBackendProxy):
     """
     Proxy class to DataBackend which acts as middleware for performing fallbacks.
 
+    The results of ``show_components`` and ``show_component_versions`` are
+    cached for ``cache_ttl`` seconds. Writes to the components through the
+    proxy invalidate the cache, so the TTL only bounds how long changes made
+    by other processes may go unseen.
+
     :param backend: Instance of `MetaDataStore`.
+    :param cache_ttl: Seconds for which ``show_*`` results are cached
+                      (0 disables the cache).
     """
 
-    def __init__(self, backend):
+    _CACHED = frozenset({'show_components', 'show_component_versions'})
+    _INVALIDATING = frozenset(
+        {
+            'create_component',
+            'delete_component_version',
+            'hide_component_version',
+            'replace_object',
+            '_replace_object',
+            '_update_object',
+            'drop',
+            'reconnect',
+        }
+    )
+
+    def __init__(self, backend, cache_ttl: float = 1.0):
         super().__init__(backend=backend)
+        self.cache_ttl = cache_ttl
+        self._cache: t.Dict[t.Tuple, t.Tuple[float, t.Any]] = {}
+        self._cache_lock = threading.Lock()
+        self._generation = 0
+
+    def invalidate_cache(self):
+        """Drop the cached ``show_*`` results."""
+        with self._cache_lock:
+            self._generation += 1
+            self._cache.clear()
+
+    def _cached(self, name, attr):
+        @functools.wraps(attr)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with self._cache_lock:
+                hit = self._cache.get(key)
+                generation = self._generation
+            if hit is not None and now - hit[0] < self.cache_ttl:
+                return copy.deepcopy(hit[1])
+            out = attr(*args, **kwargs)
+            with self._cache_lock:
+                # Don't store a result which a concurrent write made stale
+                if generation == self._generation:
+                    self._cache[key] = (now, copy.deepcopy(out))
+            return out
+
+        return wrapper
+
+    def _invalidating(self, attr):
+        @functools.wraps(attr)
+        def wrapper(*args, **kwargs):
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.invalidate_cache()
+
+        return wrapper
+
+    def __getattr__(self, name):
+        attr = super().__getattr__(name)
+        if name in self._CACHED and self.cache_ttl > 0:
+            return self._cached(name, attr)
+        if name in self._INVALIDATING:
+            return self._invalidating(attr)
+        return attr
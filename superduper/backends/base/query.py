@@ -7,6 +7,7 @@ from functools import wraps
 
 from superduper.base.document import Document, _unpack
 from superduper.base.leaf import Leaf
+from superduper.misc.special_dicts import SuperDuperFlatEncode
 
 if t.TYPE_CHECKING:
     from superduper.base.datalayer import Datalayer
@@ -304,6 +305,46 @@ class Query(_BaseQuery):
         similar_scores = dict(zip(similar_ids, similar_scores))
         return similar_ids, similar_scores
 
+    def _select_nearest_filtered(
+        self,
+        like: t.Dict,
+        vector_index: str,
+        n: int,
+        filter_ids: t.Optional[t.Callable[[t.List[str]], t.Iterable[str]]],
+        all_ids: t.Callable[[], t.List[str]],
+    ):
+        """Find the ``n`` nearest neighbours of ``like`` which pass a filter.
+
+        The vector-index is searched first for ``n`` times
+        ``post_filter_oversample`` candidates, and only these candidates are
+        checked against the filter, so that the cost does not grow with the
+        number of documents passing the filter. If fewer than ``n`` candidates
+        pass, the ids passing the filter are materialized and searched within.
+
+        :param like: The document to compare against.
+        :param vector_index: The vector-index to search.
+        :param n: The number of results to return.
+        :param filter_ids: Function returning those of the given ids which
+                           pass the filter; ``None`` if there is no filter.
+        :param all_ids: Function returning all ids which pass the filter.
+        """
+        oversample = self.db.cfg.cluster.vector_search.post_filter_oversample
+        k = n if filter_ids is None else n * oversample
+        ids, scores = self.db.select_nearest(like, vector_index=vector_index, n=k)
+        ids, scores = list(ids)[:k], list(scores)[:k]
+        if filter_ids is None:
+            return ids, scores
+
+        passing = set(filter_ids(ids)) if ids else set()
+        hits = [(id, score) for id, score in zip(ids, scores) if id in passing]
+        if len(hits) >= n:
+            hits = hits[:n]
+            return [id for id, _ in hits], [score for _, score in hits]
+
+        return self.db.select_nearest(
+            like, vector_index=vector_index, ids=all_ids(), n=n
+        )
+
     @property
     def flavour(self):
         """Return the flavour of the query."""
@@ -314,6 +355,9 @@ class Query(_BaseQuery):
         """Return the documents."""
 
         def _wrap_document(document):
+            if isinstance(document, SuperDuperFlatEncode):
+                # Already encoded, e.g. by ``Datalayer.bulk_insert``
+                return document
             if not isinstance(document, Document):
                 if isinstance(document, dict):
                     document = Document(document)
@@ -579,6 +623,28 @@ class Query(_BaseQuery):
         """
         pass
 
+    def select_using_keys(self, keys: t.Sequence[str]):
+        """Return a query which only fetches the fields needed for ``keys``.
+
+        Backends which can't push the projection down return the query
+        unchanged.
+
+        :param keys: The keys read from the documents.
+        """
+        return self
+
+    @staticmethod
+    def _fields_from_keys(keys: t.Sequence[str]) -> t.Optional[t.List[str]]:
+        # ``None`` means that the whole document is needed
+        fields = []
+        for key in keys:
+            if key == '_base':
+                return None
+            field = key.split('.')[0]
+            if field not in fields:
+                fields.append(field)
+        return fields
+
     @property
     @abstractmethod
     def select_ids(self, ids: t.Sequence[str]):
@@ -633,9 +699,12 @@ class Query(_BaseQuery):
             except FileNotFoundError:
                 pass
 
-        documents = [
-            r.encode(schema) if isinstance(r, Document) else r for r in documents
-        ]
+        # The documents are encoded at once, column by column
+        rows = [i for i, r in enumerate(documents) if isinstance(r, Document)]
+        encoded = Document.encode_many([documents[i] for i in rows], schema=schema)
+        documents = list(documents)
+        for i, r in zip(rows, encoded):
+            documents[i] = r
         for r in documents:
             r = self.db.artifact_store.save_artifact(r)
         return documents
@@ -92,13 +92,19 @@ class IbisDataBackend(BaseDataBackend):
         """Build artifact store for the database."""
         return FileSystemArtifactStore(conn='.superduper/artifacts/', name='ibis')
 
-    def build_metadata(self):
-        """Build metadata for the database."""
+    def build_metadata(self, job_flush_interval: float = 0):
+        """Build metadata for the database.
+
+        :param job_flush_interval: Maximum age in seconds of buffered job inserts
+                                   and status updates.
+        """
 
         def callback():
             return self.conn.con, self.name
 
-        return MetaDataStoreProxy(SQLAlchemyMetadata(callback=callback))
+        return MetaDataStoreProxy(
+            SQLAlchemyMetadata(callback=callback, job_flush_interval=job_flush_interval)
+        )
 
     def insert(self, table_name, raw_documents):
         """Insert data into the database.
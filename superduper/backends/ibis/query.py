@@ -213,15 +213,36 @@ class IbisQuery(Query):
         if isinstance(like, Document):
             like = like.unpack()
         pre_like_query = IbisQuery(db=self.db, table=self.table, parts=pre_like_parts)
-        within_ids = [
-            r[self.primary_id] for r in pre_like_query.select_ids._execute(parent)
-        ]
-        similar_ids, similar_scores = self.db.select_nearest(
-            like, vector_index=vector_index, n=like_kwargs.get('n', 10), ids=within_ids
-        )
+        t = self.db[pre_like_query._get_parent().get_name()]
+
+        def all_ids():
+            return [
+                r[self.primary_id] for r in pre_like_query.select_ids._execute(parent)
+            ]
+
+        def filter_ids(ids):
+            q = pre_like_query.filter(getattr(t, self.primary_id).isin(ids))
+            return [r[self.primary_id] for r in q.select_ids._execute(parent)]
+
+        methods = {part[0] for part in pre_like_parts if not isinstance(part, str)}
+        if 'limit' in methods:
+            # The limit depends on the order of the filtered rows
+            similar_ids, similar_scores = self.db.select_nearest(
+                like,
+                vector_index=vector_index,
+                n=like_kwargs.get('n', 10),
+                ids=all_ids(),
+            )
+        else:
+            similar_ids, similar_scores = self._select_nearest_filtered(
+                like,
+                vector_index=vector_index,
+                n=like_kwargs.get('n', 10),
+                filter_ids=filter_ids if 'filter' in methods else None,
+                all_ids=all_ids,
+            )
         similar_scores = dict(zip(similar_ids, similar_scores))
 
-        t = self.db[pre_like_query._get_parent().get_name()]
         filter_query = pre_like_query.filter(
             getattr(t, self.primary_id).isin(similar_ids)
         )
@@ -345,6 +366,41 @@ class IbisQuery(Query):
         filter_query = self.filter(getattr(self, self.primary_id).isin(ids))
         return filter_query
 
+    def select_using_keys(self, keys: t.Sequence[str]):
+        """Return a query which only fetches the fields needed for ``keys``.
+
+        Only applies to selections of a single table, optionally filtered,
+        whose selected columns include all the ``keys``.
+
+        :param keys: The keys read from the documents.
+        """
+        fields = self._fields_from_keys(keys)
+        if fields is None or not self.parts:
+            return self
+        if any(
+            isinstance(p, str) or p[0] not in ('select', 'filter') for p in self.parts
+        ):
+            return self
+        if self.parts[0][0] != 'select':
+            return self
+        columns = self.parts[0][1]
+        if not all(isinstance(c, str) for c in columns):
+            return self
+        if not columns:
+            try:
+                columns = self.db.tables[self.table].schema.fields
+            except FileNotFoundError:
+                return self
+        if self.primary_id not in fields:
+            fields.append(self.primary_id)
+        if not all(f in columns for f in fields):
+            return self
+        return type(self)(
+            db=self.db,
+            table=self.table,
+            parts=[*self.parts, ('select', tuple(fields), {})],
+        )
+
     @property
     def select_ids(self):
         """Return a query that selects ids."""
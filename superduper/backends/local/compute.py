@@ -1,3 +1,7 @@
+import collections
+import concurrent.futures
+import os
+import threading
 import typing as t
 import uuid
 
@@ -79,7 +83,7 @@ class LocalComputeBackend(ComputeBackend):
 
     def wait_all(self) -> None:
         """Waits for all pending tasks to complete."""
-        pass
+        self.queue.flush()
 
     def result(self, identifier: str) -> t.Any:
         """Retrieves the result of a previously submitted task.
@@ -97,3 +101,220 @@ class LocalComputeBackend(ComputeBackend):
     def shutdown(self) -> None:
         """Shuts down the local cluster."""
         pass
+
+
+class LocalPoolComputeBackend(LocalComputeBackend):
+    """
+    A local backend which runs jobs asynchronously on a worker pool.
+
+    Jobs are submitted to a ``concurrent.futures`` executor and a job is only
+    started once all of its dependencies have completed, so inserts return
+    immediately while downstream work runs in the background. The futures
+    of the last ``max_finished`` completed jobs are kept, so that their
+    results can be retrieved and their dependents resolved.
+
+    :param uri: Optional uri param.
+    :param queue: Optional pluggable queue.
+    :param max_workers: Number of workers in the pool (defaults to the number
+                        of CPUs).
+    :param executor: Type of pool to use: 'thread' or 'process'.
+                     With 'process' the datalayer is rebuilt in the worker
+                     from the job configuration.
+    :param max_finished: Number of completed jobs whose futures are kept.
+    """
+
+    def __init__(
+        self,
+        uri: t.Optional[str] = None,
+        queue: BaseQueuePublisher = LocalQueuePublisher(),
+        max_workers: t.Optional[int] = None,
+        executor: str = 'thread',
+        max_finished: int = 1000,
+    ):
+        super().__init__(uri=uri, queue=queue)
+        if executor not in ('thread', 'process'):
+            raise ValueError(
+                f'Unknown executor {executor}; expected \'thread\' or \'process\''
+            )
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = executor
+        self._pool: t.Optional[concurrent.futures.Executor] = None
+        self.max_finished = max_finished
+        self._futures: t.Dict[str, concurrent.futures.Future] = {}
+        self._finished: t.OrderedDict[str, concurrent.futures.Future] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> concurrent.futures.Executor:
+        """The worker pool, created lazily on first use."""
+        if self._pool is None:
+            if self.executor == 'process':
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers
+                )
+            else:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='superduper-compute',
+                )
+        return self._pool
+
+    def _resolve_dependencies(self, dependencies) -> t.List[concurrent.futures.Future]:
+        if isinstance(dependencies, (str, concurrent.futures.Future)):
+            dependencies = [dependencies]
+        futures = []
+        for dep in dependencies or ():
+            if isinstance(dep, concurrent.futures.Future):
+                futures.append(dep)
+                continue
+            if isinstance(dep, (tuple, list)):
+                dep = dep[0]
+            future = self._get(dep)
+            if future is None:
+                logging.info(
+                    f'Dependency {dep} is not a known job on {self}; '
+                    'assuming it has completed'
+                )
+                continue
+            futures.append(future)
+        return futures
+
+    def submit(
+        self, function: t.Callable, *args, compute_kwargs: t.Dict = {}, **kwargs
+    ) -> concurrent.futures.Future:
+        """
+        Submits a function for execution on the worker pool.
+
+        :param function: The function to be executed.
+        :param args: Positional arguments to be passed to the function.
+        :param compute_kwargs: Do not use this parameter.
+        :param kwargs: Keyword arguments to be passed to the function.
+        """
+        if self.executor == 'process' and 'db' in kwargs:
+            # The datalayer can't cross the process boundary
+            kwargs['db'] = None
+
+        future_key = kwargs.get('job_id') or str(uuid.uuid4())
+        dependencies = self._resolve_dependencies(kwargs.get('dependencies', ()))
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        with self._lock:
+            self._futures[future_key] = future
+
+        def _run():
+            for dep in dependencies:
+                if dep.cancelled():
+                    future.cancel()
+                    return
+                exception = dep.exception()
+                if exception is not None:
+                    future.set_exception(exception)
+                    return
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                inner = self.pool.submit(function, *args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+                return
+            inner.add_done_callback(lambda f: _chain(f, future))
+
+        _when_all_done(dependencies, _run)
+
+        future.add_done_callback(lambda f: self._log_done(future_key, f))
+        future.add_done_callback(lambda f: self._forget(future_key, f))
+        logging.info(
+            f"Job submitted on {self}.  function:{function} future:{future_key}"
+        )
+        return future
+
+    @staticmethod
+    def _log_done(key: str, future: concurrent.futures.Future):
+        if future.cancelled():
+            logging.warn(f'Job {key} was cancelled')
+        elif future.exception() is not None:
+            logging.error(f'Job {key} failed: {future.exception()}')
+        else:
+            logging.success(f'Job {key} completed')
+
+    def _forget(self, key: str, future: concurrent.futures.Future):
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+            self._finished[key] = future
+            self._finished.move_to_end(key)
+            while len(self._finished) > self.max_finished:
+                self._finished.popitem(last=False)
+
+    def _get(self, key: str) -> t.Optional[concurrent.futures.Future]:
+        with self._lock:
+            return self._futures.get(key) or self._finished.get(key)
+
+    @property
+    def tasks(self) -> t.Dict[str, concurrent.futures.Future]:
+        """List for the pending and failed tasks."""
+        with self._lock:
+            failed = {
+                k: f
+                for k, f in self._finished.items()
+                if f.cancelled() or f.exception() is not None
+            }
+            return {**failed, **self._futures}
+
+    def wait_all(self) -> None:
+        """Waits for all pending tasks to complete."""
+        while True:
+            # Jobs may publish new events, which are flushed in the next pass
+            self.queue.flush()
+            pending = [f for f in self.tasks.values() if not f.done()]
+            if not pending:
+                return
+            concurrent.futures.wait(pending)
+
+    def result(self, identifier: str) -> t.Any:
+        """Retrieves the result of a previously submitted task.
+
+        Note: This will block until the future is completed. Only the
+        results of the last ``max_finished`` completed tasks are kept.
+
+        :param identifier: The identifier of the submitted task.
+        """
+        future = self._get(identifier)
+        if future is None:
+            raise KeyError(f'Task {identifier} is unknown or was forgotten')
+        return future.result()
+
+    def shutdown(self) -> None:
+        """Waits for pending tasks and shuts down the worker pool."""
+        self.wait_all()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+def _chain(source: concurrent.futures.Future, target: concurrent.futures.Future):
+    if source.cancelled():
+        target.set_exception(concurrent.futures.CancelledError())
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def _when_all_done(futures: t.Sequence[concurrent.futures.Future], callback):
+    if not futures:
+        return callback()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def _done(_):
+        with lock:
+            remaining[0] -= 1
+            ready = remaining[0] == 0
+        if ready:
+            callback()
+
+    for f in futures:
+        f.add_done_callback(_done)
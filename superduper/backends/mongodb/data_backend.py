@@ -87,8 +87,11 @@ class MongoDataBackend(BaseDataBackend):
         """Return the datalayer instance."""
         return self._db
 
-    def build_metadata(self):
-        """Build the metadata store for the data backend."""
+    def build_metadata(self, job_flush_interval: float = 0):
+        """Build the metadata store for the data backend.
+
+        :param job_flush_interval: Unused, jobs are written immediately.
+        """
         return MetaDataStoreProxy(MongoMetaDataStore(callback=self.connection_callback))
 
     def build_artifact_store(self):
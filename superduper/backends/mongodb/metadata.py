@@ -42,6 +42,18 @@ class MongoMetaDataStore(MetaDataStore):
         self.component_collection = self.db['_objects']
         self.job_collection = self.db['_jobs']
         self.parent_child_mappings = self.db['_parent_child_mappings']
+        self._create_indexes()
+
+    def _create_indexes(self):
+        # ``create_index`` is a no-op when the index already exists
+        self.component_collection.create_index(
+            [('type_id', 1), ('identifier', 1), ('version', 1)]
+        )
+        self.component_collection.create_index('uuid')
+        self.parent_child_mappings.create_index([('parent', 1), ('child', 1)])
+        self.parent_child_mappings.create_index('child')
+        self.job_collection.create_index('identifier')
+        self.job_collection.create_index([('component_identifier', 1), ('type_id', 1)])
 
     def reconnect(self):
         """Reconnect to metdata store."""
@@ -323,6 +335,40 @@ class MongoMetaDataStore(MetaDataStore):
         """
         return [r['parent'] for r in self.parent_child_mappings.find({'child': uuid})]
 
+    def get_component_versions(
+        self, type_id: str, identifier: str, allow_hidden: bool = False
+    ) -> t.List[t.Dict[str, t.Any]]:
+        """Get the metadata of all versions of a component, sorted by version.
+
+        :param type_id: type of component
+        :param identifier: identifier of component
+        :param allow_hidden: whether to allow hidden components
+        """
+        filter_: t.Dict[str, t.Any] = {'type_id': type_id, 'identifier': identifier}
+        if not allow_hidden:
+            filter_['hidden'] = {'$ne': True}
+        return list(
+            self.component_collection.find(filter_, {'_id': 0}).sort('version', 1)
+        )
+
+    def get_component_subtree(self, uuid: str) -> t.List[t.Tuple[str, str]]:
+        """Get all (parent, child) relationships below a component version.
+
+        :param uuid: unique identifier of the root component version
+        """
+        edges = []
+        seen = {uuid}
+        frontier = [uuid]
+        while frontier:
+            children = []
+            for r in self.parent_child_mappings.find({'parent': {'$in': frontier}}):
+                edges.append((r['parent'], r['child']))
+                if r['child'] not in seen:
+                    seen.add(r['child'])
+                    children.append(r['child'])
+            frontier = children
+        return edges
+
     def _replace_object(
         self,
         info: t.Dict[str, t.Any],
@@ -14,9 +14,11 @@ from superduper.backends.base.query import (
     applies_to,
     parse_query as _parse_query,
 )
+from superduper.base.constant import KEY_BLOBS, KEY_BUILDS, KEY_FILES
 from superduper.base.cursor import SuperDuperCursor
 from superduper.base.document import Document, QueryUpdateDocument
 from superduper.base.leaf import Leaf
+from superduper.components.schema import SCHEMA_KEY
 
 if t.TYPE_CHECKING:
     from superduper.base.datalayer import Datalayer
@@ -208,27 +210,51 @@ class MongoQuery(Query):
         if isinstance(r, Document):
             r = r.unpack()
         range = like_kwargs.pop('range', None)
+        vector_index = like_kwargs.pop('vector_index')
+        n = like_kwargs.get('n', 100)
+
+        filter_ = find_args[0] if find_args else {}
+
+        def find_ids(filter, limit=None):
+            query = MongoQuery(table=self.table, db=self.db).find(filter, {'_id': 1})
+            # Filters on ``_outputs.`` keys are mapped to the outputs tables
+            if any(key.startswith('_outputs.') for key in filter):
+                query = query.outputs()
+            if limit:
+                query = query.limit(limit)
+            return [str(doc['_id']) for doc in query.do_execute()]
+
+        def all_ids():
+            return find_ids(filter_, limit=range)
+
+        def filter_ids(ids):
+            # The keys of the filter stay at the top-level to be mapped
+            q = {k: v for k, v in filter_.items() if k != '_id'}
+            if '_id' in filter_:
+                q['$and'] = [*filter_.get('$and', []), {'_id': filter_['_id']}]
+            q['_id'] = {'$in': [ObjectId(id) for id in ids]}
+            return find_ids(q)
 
-        parent_query = self[:-1].select_ids
         if range:
-            parent_query = parent_query.limit(range)
-
-        relevant_ids = [str(r['_id']) for r in parent_query.do_execute()]
-
-        similar_ids, scores = self.db.select_nearest(
-            like=r,
-            ids=relevant_ids,
-            vector_index=like_kwargs.pop('vector_index'),
-            n=like_kwargs.get('n', 100),
-        )
+            # ``range`` depends on the order of the filtered documents
+            similar_ids, scores = self.db.select_nearest(
+                like=r, ids=all_ids(), vector_index=vector_index, n=n
+            )
+        else:
+            similar_ids, scores = self._select_nearest_filtered(
+                like=r,
+                vector_index=vector_index,
+                n=n,
+                filter_ids=filter_ids if filter_ else None,
+                all_ids=all_ids,
+            )
         scores = dict(zip(similar_ids, scores))
-        similar_ids = [ObjectId(id) for id in similar_ids]
-
-        final_args = find_args[:]
-        if not final_args:
-            final_args = [{}]
-        final_args[0]['_id'] = {'$in': similar_ids}
 
+        # The results have already passed the filter
+        final_args = [
+            {'_id': {'$in': [ObjectId(id) for id in similar_ids]}},
+            *find_args[1:],
+        ]
         final_query = self.table_or_collection.find(*final_args, **find_kwargs)
         result = final_query._execute(parent)
 
@@ -437,6 +463,37 @@ class MongoQuery(Query):
             ],
         )
 
+    def select_using_keys(self, keys: t.Sequence[str]):
+        """Return a query which only fetches the fields needed for ``keys``.
+
+        Only applies to ``find`` queries without a projection of their own.
+
+        :param keys: The keys read from the documents.
+        """
+        fields = self._fields_from_keys(keys)
+        if (
+            fields is None
+            or not self.parts
+            or isinstance(self.parts[0], str)
+            or self.parts[0][0] != 'find'
+        ):
+            return self
+        args, kwargs = self.parts[0][1:]
+        if len(args) > 1 or 'projection' in kwargs:
+            return self
+        projection = {f: 1 for f in fields}
+        for key in (SCHEMA_KEY, KEY_BUILDS, KEY_FILES, KEY_BLOBS):
+            projection[key] = 1
+        args = (copy.deepcopy(args[0]) if args else {}, projection)
+        return type(self)(
+            db=self.db,
+            table=self.table,
+            parts=[
+                ('find', args, kwargs),
+                *self.parts[1:],
+            ],
+        )
+
     @property
     @applies_to('find', 'update_many', 'delete_many', 'delete_one')
     def select_ids(self):
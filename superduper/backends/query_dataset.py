@@ -1,7 +1,12 @@
+import concurrent.futures
 import inspect
+import os
 import random
+import threading
 import typing as t
+from collections import OrderedDict
 
+from superduper import logging
 from superduper.backends.base.query import Query
 from superduper.misc.special_dicts import MongoStyleDict
 
@@ -67,12 +72,11 @@ class QueryDataset:
         else:
             if ids is None:
                 self._ids = [
-                    r[self.select.id_field]
+                    r[self.select.primary_id]
                     for r in self.db.execute(self.select.select_ids)
                 ]
             else:
                 self._ids = ids
-            self.select_one = self.select.select_single_id
 
         self.mapping = mapping
 
@@ -112,21 +116,31 @@ class QueryDataset:
         if self.in_memory:
             input = self._documents[item]
         else:
-            input = self.select_one(
-                self._ids[item], self.db, encoders=self.db.datatypes
+            input = next(
+                iter(self.db.execute(self.select.select_using_ids([self._ids[item]])))
             )
-        input = MongoStyleDict(input.unpack())
+        if self.mapping is None:
+            input = MongoStyleDict(input.unpack())
         return self._get_item(input)
 
 
 class CachedQueryDataset(QueryDataset):
     """Cached Query Dataset for fetching documents from database.
 
-    This class which fetch the document corresponding to the given ``index``.
-    This class prefetches documents from database and stores in the memory.
+    The ids are split into contiguous blocks of ``prefetch_size`` documents,
+    which are fetched with a single ``select_using_ids`` query each. At most
+    ``max_cache_blocks`` blocks are kept in memory, and the block after the
+    one being read is fetched in a background thread.
+
+    Reading a block with documents deleted after the ids were listed raises a
+    ``KeyError``; pass ``ids`` of existing documents to avoid it.
 
     This can drastically reduce database read operations and hence reduce the overall
-    load on the database.
+    load on the database. Use ``block_sampler`` to shuffle the dataset without
+    losing the benefit of the blocks.
+
+    In PyTorch ``DataLoader`` workers, pass ``worker_init_fn`` so that each
+    worker opens its own connection.
 
     :param select: A select query object which defines the query to be executed.
     :param mapping: A mapping object to be used for the dataset.
@@ -134,12 +148,12 @@ class CachedQueryDataset(QueryDataset):
     :param fold: The fold to be used for the dataset.
     :param transform: A callable which can be used to transform the dataset.
     :param db: A datalayer instance to be used for the dataset.
-    :param in_memory: A boolean flag to indicate if the dataset should be loaded
+    :param in_memory: Ignored, the documents are always fetched lazily.
     :param prefetch_size: The number of documents to prefetch from the database.
+    :param max_cache_blocks: The maximum number of blocks kept in memory.
+    :param prefetch: Whether to fetch the next block in a background thread.
     """
 
-    _BACKFILL_INDEX = 0.2
-
     def __init__(
         self,
         select: Query,
@@ -148,8 +162,10 @@ class CachedQueryDataset(QueryDataset):
         fold: t.Union[str, None] = 'train',
         transform: t.Optional[t.Callable] = None,
         db=None,
-        in_memory: bool = True,
+        in_memory: bool = False,
         prefetch_size: int = 100,
+        max_cache_blocks: int = 4,
+        prefetch: bool = True,
     ):
         super().__init__(
             select=select,
@@ -158,40 +174,153 @@ class CachedQueryDataset(QueryDataset):
             fold=fold,
             transform=transform,
             db=db,
-            in_memory=in_memory,
+            in_memory=False,
         )
         self.prefetch_size = prefetch_size
+        self.max_cache_blocks = max(max_cache_blocks, 1)
+        self.prefetch = prefetch
+        self._reset_cache()
+
+    def _reset_cache(self):
+        self._cache: t.OrderedDict[int, t.List] = OrderedDict()
+        self._pending: t.Dict[int, concurrent.futures.Future] = {}
+        self._executor: t.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def reconnect(self):
+        """Open a new connection, e.g. in a forked worker process."""
+        self._reset_cache()
+        self.db.databackend.reconnect()
+
+    @staticmethod
+    def worker_init_fn(worker_id: int):
+        """Reconnect the dataset of a PyTorch ``DataLoader`` worker.
+
+        :param worker_id: The id of the worker.
+        """
+        import torch.utils.data
+
+        worker_info = torch.utils.data.get_worker_info()
+        dataset = worker_info.dataset if worker_info is not None else None
+        if isinstance(dataset, CachedQueryDataset):
+            dataset.reconnect()
+
+    @property
+    def n_blocks(self):
+        """The number of blocks of the dataset."""
+        return -(-len(self._ids) // self.prefetch_size)
+
+    def _fetch_block(self, block: int):
+        ids = self._ids[block * self.prefetch_size : (block + 1) * self.prefetch_size]
+        primary_id = self.select.primary_id
+        docs = {
+            str(r[primary_id]): r
+            for r in self.db.execute(self.select.select_using_ids(ids))
+        }
+        missing = [id for id in ids if str(id) not in docs]
+        if missing:
+            raise KeyError(
+                f'Documents {missing} were deleted since the ids of the dataset '
+                'were listed'
+            )
+        return [docs[str(id)] for id in ids]
+
+    def _submit(self, block: int) -> concurrent.futures.Future:
+        future = self._pending.get(block)
+        if future is None:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='superduper-prefetch'
+                )
+            future = self._executor.submit(self._fetch_block, block)
+            self._pending[block] = future
+        return future
+
+    def _get_block(self, block: int) -> t.List:
+        if os.getpid() != self._pid:
+            # Threads don't survive a fork, start from an empty cache
+            self._reset_cache()
+        with self._lock:
+            docs = self._cache.get(block)
+            if docs is not None:
+                self._cache.move_to_end(block)
+            future = self._pending.pop(block, None) if docs is None else None
+        if docs is None and future is not None:
+            try:
+                docs = future.result()
+            except Exception as e:
+                # e.g. connections which can't be shared between threads
+                logging.warn(f'Prefetching failed, fetching synchronously: {e}')
+                self.prefetch = False
+                with self._lock:
+                    self._pending.clear()
+        if docs is None:
+            docs = self._fetch_block(block)
+        with self._lock:
+            self._cache[block] = docs
+            self._cache.move_to_end(block)
+            while len(self._cache) > self.max_cache_blocks:
+                self._cache.popitem(last=False)
+            following = block + 1
+            if (
+                self.prefetch
+                and following < self.n_blocks
+                and following not in self._cache
+            ):
+                self._submit(following)
+        return docs
 
-    def _fetch_cache(self):
-        cache_ids = random.sample(self.ids, self._max_cache_size)
-        return ExpiryCache(
-            list(self.database.execute(self.select.select_using_ids(cache_ids)))
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        block, offset = divmod(index, self.prefetch_size)
+        input = self._get_block(block)[offset]
+        if self.mapping is None:
+            input = MongoStyleDict(input.unpack())
+        return self._get_item(input)
+
+    def block_sampler(self, seed: t.Optional[int] = None):
+        """Return a sampler shuffling the blocks, then the indices within each.
+
+        :param seed: The seed of the shuffling.
+        """
+        return BlockShuffleSampler(
+            n=len(self), block_size=self.prefetch_size, seed=seed
         )
 
-    @property
-    def database(self):
-        """Return the database object."""
-        if self._database is None:
-            from superduper.base.build import build_datalayer
 
-            self._database = build_datalayer()
-        return self._database
+class BlockShuffleSampler:
+    """Sampler shuffling the order of blocks and the indices within each block.
 
-    def _get_random_index(self, index):
-        return int((index * len(self._cache)) / self._total_documents)
+    Can be passed as ``sampler`` to a PyTorch ``DataLoader``. A new order is
+    drawn for each pass over the data.
 
-    def _backfill_cache(self):
-        if len(self._cache) <= int(self._max_cache_size * self._BACKFILL_INDEX):
-            self._cache = self._fetch_cache()
+    :param n: The number of indices.
+    :param block_size: The number of consecutive indices per block.
+    :param seed: The seed of the shuffling.
+    """
 
-    def __len__(self):
-        return self._total_documents
+    def __init__(self, n: int, block_size: int, seed: t.Optional[int] = None):
+        self.n = n
+        self.block_size = block_size
+        self.random = random.Random(seed)
 
-    def __getitem__(self, index):
-        index = self._get_random_index(index)
-        self._backfill_cache()
-        input = self._cache[index]
-        return self._get_item(input)
+    def __iter__(self):
+        starts = list(range(0, self.n, self.block_size))
+        self.random.shuffle(starts)
+        for start in starts:
+            indices = list(range(start, min(start + self.block_size, self.n)))
+            self.random.shuffle(indices)
+            yield from indices
+
+    def __len__(self):
+        return self.n
 
 
 def query_dataset_factory(**kwargs):
@@ -71,6 +71,8 @@ class DefaultConfig:
     component_table_args: Tuple = tuple()
     meta_table_args: Tuple = tuple()
 
+    create_indexes: bool = True
+
 
 def create_clickhouse_config():
     """Create configuration for ClickHouse database."""
@@ -105,6 +107,9 @@ def create_clickhouse_config():
         component_table_args = (engines.MergeTree(order_by='id'),)
         meta_table_args = (engines.MergeTree(order_by='key'),)
 
+        # clickhouse has no secondary b-tree indexes, `order_by` is used instead
+        create_indexes = False
+
     return ClickHouseConfig
 
 
@@ -1,13 +1,20 @@
+import atexit
+import copy
 import threading
+import time
 import typing as t
+import weakref
+from collections import defaultdict
 from contextlib import contextmanager
 
 import click
 from sqlalchemy import (
     Column,
+    Index,
     MetaData,
     Table,
     and_,
+    bindparam,
     create_engine,
     delete,
     insert,
@@ -15,12 +22,136 @@ from sqlalchemy import (
 )
 from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from superduper import logging
 from superduper.backends.base.metadata import MetaDataStore, NonExistentMetadataError
 from superduper.backends.sqlalchemy.db_helper import get_db_config
 from superduper.misc.colors import Colors
 
+# Session factories are cached per engine, so that sessions share the
+# connection pool of the engine instead of rebuilding the factory per call
+_SESSION_FACTORIES: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+_SESSION_FACTORIES_LOCK = threading.Lock()
+
+
+def get_session_factory(engine) -> sessionmaker:
+    """Get the cached session factory of an engine.
+
+    :param engine: The ``sqlalchemy`` engine to bind sessions to.
+    """
+    with _SESSION_FACTORIES_LOCK:
+        try:
+            return _SESSION_FACTORIES[engine]
+        except KeyError:
+            factory = sessionmaker(bind=engine)
+            _SESSION_FACTORIES[engine] = factory
+            return factory
+
+
+def _create_engine(uri: str):
+    # An in-memory SQLite database lives in a single connection, which is
+    # shared by all threads, e.g. those writing checkpoints in the background
+    if uri in ('sqlite://', 'sqlite:///:memory:'):
+        return create_engine(
+            uri,
+            poolclass=StaticPool,
+            connect_args={'check_same_thread': False},
+        )
+    return create_engine(uri)
+
+
+class _JobWriter:
+    """Buffer job inserts and updates and write them in batches.
+
+    Successive updates of the same job are merged, and updates of jobs
+    which haven't been written yet are merged into their insert, so that a
+    job which is created and then flips status several times is usually
+    written with a single statement. The buffer is written when it is older
+    than ``flush_interval`` seconds, before jobs are read, and on exit.
+    """
+
+    def __init__(
+        self,
+        metadata: 'SQLAlchemyMetadata',
+        flush_interval: float,
+        max_pending: int = 1000,
+    ):
+        self.metadata = metadata
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.inserts: t.Dict[str, t.Dict] = {}
+        self.updates: t.Dict[str, t.Dict] = defaultdict(dict)
+        self.lock = threading.RLock()
+        self.oldest: t.Optional[float] = None
+
+    def create(self, info: t.Dict):
+        with self.lock:
+            # The caller may keep mutating the arguments held by ``info``
+            self.inserts[info['identifier']] = copy.deepcopy(info)
+            self._schedule()
+
+    def update(self, job_id: str, key: str, value: t.Any):
+        with self.lock:
+            if job_id in self.inserts:
+                self.inserts[job_id][key] = copy.deepcopy(value)
+            else:
+                self.updates[job_id][key] = copy.deepcopy(value)
+            self._schedule()
+
+    def _schedule(self):
+        now = time.monotonic()
+        if self.oldest is None:
+            self.oldest = now
+        if (
+            now - self.oldest >= self.flush_interval
+            or len(self.inserts) + len(self.updates) >= self.max_pending
+        ):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            self.oldest = None
+            inserts, self.inserts = self.inserts, {}
+            updates, self.updates = self.updates, defaultdict(dict)
+            if not inserts and not updates:
+                return
+            table = self.metadata.job_table
+            # Rows of one "executemany" statement must have the same keys
+            inserts_by_keys = defaultdict(list)
+            for info in inserts.values():
+                inserts_by_keys[tuple(sorted(info))].append(info)
+            updates_by_keys = defaultdict(list)
+            for job_id, values in updates.items():
+                updates_by_keys[tuple(sorted(values))].append(
+                    {'_job_id': job_id, **{f'_{k}': v for k, v in values.items()}}
+                )
+            with self.metadata.session_context() as session:
+                for rows in inserts_by_keys.values():
+                    session.execute(insert(table), rows)
+                for keys, rows in updates_by_keys.items():
+                    stmt = (
+                        table.update()
+                        .where(table.c.identifier == bindparam('_job_id'))
+                        .values({k: bindparam(f'_{k}') for k in keys})
+                    )
+                    session.execute(stmt, rows)
+
+    def discard(self):
+        with self.lock:
+            self.oldest = None
+            self.inserts = {}
+            self.updates = defaultdict(dict)
+
+
+def _flush_at_exit(ref):
+    writer = ref()
+    if writer is not None:
+        try:
+            writer.flush()
+        except Exception as e:
+            logging.error(f'Error writing pending jobs to metadata: {e}')
+
 
 class SQLAlchemyMetadata(MetaDataStore):
     """
@@ -29,6 +160,10 @@ class SQLAlchemyMetadata(MetaDataStore):
     :param uri: URI to the databackend database.
     :param flavour: Flavour of the databackend.
     :param callback: Optional callback to create connection.
+    :param job_flush_interval: Maximum age in seconds of buffered job inserts
+                               and status updates before they are written
+                               in one batch; 0, the default, writes them
+                               immediately.
     """
 
     def __init__(
@@ -36,6 +171,7 @@ class SQLAlchemyMetadata(MetaDataStore):
         uri: t.Optional[str] = None,
         flavour: t.Optional[str] = None,
         callback: t.Optional[t.Callable] = None,
+        job_flush_interval: float = 0,
     ):
         super().__init__(uri=uri, flavour=flavour)
 
@@ -44,7 +180,7 @@ class SQLAlchemyMetadata(MetaDataStore):
         else:
             assert isinstance(uri, str)
             name = uri.split('//')[0]
-            self.connection_callback = lambda: (create_engine(uri), name)
+            self.connection_callback = lambda: (_create_engine(uri), name)
 
         sql_conn, name = self.connection_callback()
 
@@ -54,10 +190,14 @@ class SQLAlchemyMetadata(MetaDataStore):
         self._init_tables()
 
         self._lock = threading.Lock()
+        self._job_writer: t.Optional[_JobWriter] = None
+        if job_flush_interval:
+            self._job_writer = _JobWriter(self, job_flush_interval)
+            atexit.register(_flush_at_exit, weakref.ref(self._job_writer))
 
     def reconnect(self):
         """Reconnect to sqlalchmey metadatastore."""
-        sql_conn = create_engine(self.uri)
+        sql_conn = _create_engine(self.uri)
         self.conn = sql_conn
 
         # TODO: is it required to init after
@@ -125,6 +265,32 @@ class SQLAlchemyMetadata(MetaDataStore):
 
         metadata.create_all(self.conn)
 
+        if DBConfig.create_indexes:
+            self._init_indexes()
+
+    def _init_indexes(self):
+        # Created separately from the tables so that stores created before
+        # the indexes existed get them as well
+        indexes = [
+            Index(
+                'COMPONENT_type_id_identifier_version',
+                self.component_table.c.type_id,
+                self.component_table.c.identifier,
+                self.component_table.c.version,
+            ),
+            Index(
+                'PARENT_CHILD_ASSOCIATION_child_id',
+                self.parent_child_association_table.c.child_id,
+            ),
+            Index(
+                'JOB_component_identifier_type_id',
+                self.job_table.c.component_identifier,
+                self.job_table.c.type_id,
+            ),
+        ]
+        for index in indexes:
+            index.create(self.conn, checkfirst=True)
+
     def url(self):
         """Return the URL of the metadata store."""
         return self.conn.url + self.name
@@ -142,6 +308,8 @@ class SQLAlchemyMetadata(MetaDataStore):
                 default=False,
             ):
                 logging.warn('Aborting...')
+        if self._job_writer is not None:
+            self._job_writer.discard()
         self.job_table.drop(self.conn)
         self.parent_child_association_table.drop(self.conn)
         self.component_table.drop(self.conn)
@@ -149,8 +317,7 @@ class SQLAlchemyMetadata(MetaDataStore):
     @contextmanager
     def session_context(self):
         """Provide a transactional scope around a series of operations."""
-        sm = sessionmaker(bind=self.conn)
-        session = sm()
+        session = get_session_factory(self.conn)()
         try:
             yield session
             session.commit()
@@ -194,16 +361,20 @@ class SQLAlchemyMetadata(MetaDataStore):
         :param identifier: the identifier of the component
         :param version: the version of the component
         """
-        uuid = self._get_component_uuid(type_id, identifier, version)
+        component = self.component_table
+        association = self.parent_child_association_table
         with self.session_context() as session:
             stmt = (
-                select(self.parent_child_association_table)
+                select(association)
+                .join(component, component.c.id == association.c.child_id)
                 .where(
-                    self.parent_child_association_table.c.child_id == uuid,
+                    component.c.type_id == type_id,
+                    component.c.identifier == identifier,
+                    component.c.version == version,
                 )
                 .limit(1)
             )
-            res = self.query_results(self.parent_child_association_table, stmt, session)
+            res = self.query_results(association, stmt, session)
             return len(res) > 0
 
     def create_component(self, info: t.Dict):
@@ -289,12 +460,96 @@ class SQLAlchemyMetadata(MetaDataStore):
                     f'Table with uuid: {uuid} does not exist'
                 )
 
-        return self._get_component(
-            type_id=r['type_id'],
-            identifier=r['identifier'],
-            version=r['version'],
-            allow_hidden=allow_hidden,
+        if r['hidden'] and not allow_hidden:
+            return None
+        return self._row_to_info(r)
+
+    def get_component(
+        self,
+        type_id: str,
+        identifier: str,
+        version: t.Optional[int] = None,
+        allow_hidden: bool = False,
+    ) -> t.Dict[str, t.Any]:
+        """Get a component from the metadata store.
+
+        :param type_id: type of component
+        :param identifier: identifier of component
+        :param version: version of component
+        :param allow_hidden: whether to allow hidden components
+        """
+        if version is not None:
+            return super().get_component(
+                type_id=type_id,
+                identifier=identifier,
+                version=version,
+                allow_hidden=allow_hidden,
+            )
+        # Fetch the latest version in the same query
+        with self.session_context() as session:
+            stmt = (
+                select(self.component_table)
+                .where(
+                    self.component_table.c.type_id == type_id,
+                    self.component_table.c.identifier == identifier,
+                    self.component_table.c.hidden == allow_hidden,
+                )
+                .order_by(self.component_table.c.version.desc())
+                .limit(1)
+            )
+            res = self.query_results(self.component_table, stmt, session)
+        if not res:
+            raise FileNotFoundError(f'Can\'t find {type_id}: {identifier} in metadata')
+        return self._row_to_info(res[0])
+
+    def get_component_versions(
+        self, type_id: str, identifier: str, allow_hidden: bool = False
+    ) -> t.List[t.Dict[str, t.Any]]:
+        """Get the metadata of all versions of a component, sorted by version.
+
+        :param type_id: the type of the component
+        :param identifier: the identifier of the component
+        :param allow_hidden: whether to allow hidden components
+        """
+        with self.session_context() as session:
+            stmt = (
+                select(self.component_table)
+                .where(
+                    self.component_table.c.type_id == type_id,
+                    self.component_table.c.identifier == identifier,
+                )
+                .order_by(self.component_table.c.version)
+            )
+            if not allow_hidden:
+                stmt = stmt.where(self.component_table.c.hidden == allow_hidden)
+            res = self.query_results(self.component_table, stmt, session)
+        return [self._row_to_info(r) for r in res]
+
+    def get_component_subtree(self, uuid: str) -> t.List[t.Tuple[str, str]]:
+        """Get all (parent, child) relationships below a component version.
+
+        :param uuid: the unique identifier of the root component version
+        """
+        association = self.parent_child_association_table
+        tree = (
+            select(association.c.parent_id, association.c.child_id)
+            .where(association.c.parent_id == uuid)
+            .cte('tree', recursive=True)
+        )
+        tree = tree.union(
+            select(association.c.parent_id, association.c.child_id).join(
+                tree, association.c.parent_id == tree.c.child_id
+            )
         )
+        with self.session_context() as session:
+            res = session.execute(select(tree.c.parent_id, tree.c.child_id))
+            return [(r[0], r[1]) for r in res]
+
+    @staticmethod
+    def _row_to_info(r: t.Dict) -> t.Dict[str, t.Any]:
+        r = dict(r)
+        dict_ = r.pop('dict')
+        return {**r, **dict_}
 
     def _get_component(
         self,
@@ -321,11 +576,7 @@ class SQLAlchemyMetadata(MetaDataStore):
 
             res = self.query_results(self.component_table, stmt, session)
             if res:
-                res = res[0]
-                dict_ = res['dict']
-                del res['dict']
-                res = {**res, **dict_}
-                return res
+                return self._row_to_info(res[0])
 
     def get_component_version_parents(self, uuid: str):
         """Get the parents of a component version.
@@ -475,15 +726,23 @@ class SQLAlchemyMetadata(MetaDataStore):
 
         :param info: The information used to create the job
         """
+        if self._job_writer is not None:
+            return self._job_writer.create(info)
         with self.session_context() as session:
             stmt = insert(self.job_table).values(**info)
             session.execute(stmt)
 
+    def flush_jobs(self):
+        """Write the buffered job inserts and updates."""
+        if self._job_writer is not None:
+            self._job_writer.flush()
+
     def get_job(self, job_id: str):
         """Get the job with the given job_id.
 
         :param job_id: The identifier of the job
         """
+        self.flush_jobs()
         with self.session_context() as session:
             stmt = (
                 select(self.job_table)
@@ -503,6 +762,7 @@ class SQLAlchemyMetadata(MetaDataStore):
         :param component_identifier: the identifier of the component
         :param type_id: the type of the component
         """
+        self.flush_jobs()
         with self.session_context() as session:
             # Start building the select statement
             stmt = select(self.job_table)
@@ -528,6 +788,8 @@ class SQLAlchemyMetadata(MetaDataStore):
         :param key: The key to update
         :param value: The value to update
         """
+        if self._job_writer is not None:
+            return self._job_writer.update(job_id, key, value)
         with self.session_context() as session:
             stmt = (
                 self.job_table.update()
@@ -540,8 +802,7 @@ class SQLAlchemyMetadata(MetaDataStore):
 
     def disconnect(self):
         """Disconnect the client."""
-
-        # TODO: implement me
+        self.flush_jobs()
 
     def query_results(self, table, statment, session):
         """Query the database and return the results as a list of row datas.
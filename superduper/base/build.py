@@ -18,7 +18,12 @@ from superduper.misc.anonymize import anonymize_url
 def _get_metadata_store(cfg):
     # try to connect to the metadata store specified in the configuration.
     logging.info("Connecting to Metadata Client:", cfg.metadata_store)
-    return _build_databackend_impl(cfg.metadata_store, metadata_stores, type='metadata')
+    return _build_databackend_impl(
+        cfg.metadata_store,
+        metadata_stores,
+        type='metadata',
+        job_flush_interval=cfg.metadata_job_flush_interval,
+    )
 
 
 def _build_metadata(cfg, databackend: t.Optional['BaseDataBackend'] = None):
@@ -36,7 +41,9 @@ def _build_metadata(cfg, databackend: t.Optional['BaseDataBackend'] = None):
             logging.info(
                 "Connecting to Metadata Client with engine: ", databackend.conn
             )
-            return databackend.build_metadata()
+            return databackend.build_metadata(
+                job_flush_interval=cfg.metadata_job_flush_interval
+            )
         except Exception as e:
             logging.warn("Error building metadata from DataBackend:", str(e))
             metadata = None
@@ -45,7 +52,10 @@ def _build_metadata(cfg, databackend: t.Optional['BaseDataBackend'] = None):
         # try to connect to the data backend uri.
         logging.info("Connecting to Metadata Client with URI: ", cfg.data_backend)
         return _build_databackend_impl(
-            cfg.data_backend, metadata_stores, type='metadata'
+            cfg.data_backend,
+            metadata_stores,
+            type='metadata',
+            job_flush_interval=cfg.metadata_job_flush_interval,
         )
 
 
@@ -90,7 +100,7 @@ class _MetaDataMatcher:
     not_supported = [('sqlalchemy', 'pandas')]
 
     @classmethod
-    def create(cls, uri, mapping: t.Dict):
+    def create(cls, uri, mapping: t.Dict, **kwargs):
         """Helper method to create metadata backend."""
         backend = 'sqlalchemy'
         flavour = 'base'
@@ -104,7 +114,8 @@ class _MetaDataMatcher:
                     )
                 return mapping[backend](uri, flavour=flavour)
 
-        return mapping[backend](uri)
+        # Options such as ``job_flush_interval`` only apply to SQL stores
+        return mapping[backend](uri, **kwargs)
 
 
 class _DataBackendMatcher(_MetaDataMatcher):
@@ -124,12 +135,12 @@ class _DataBackendMatcher(_MetaDataMatcher):
 
 
 # Helper function to build a data backend based on the URI.
-def _build_databackend_impl(uri, mapping, type: str = 'data_backend'):
+def _build_databackend_impl(uri, mapping, type: str = 'data_backend', **kwargs):
     logging.debug(f"Parsing data connection URI:{uri}")
     if type == 'data_backend':
         db = DataBackendProxy(_DataBackendMatcher.create(uri, mapping))
     else:
-        db = MetaDataStoreProxy(_MetaDataMatcher.create(uri, mapping))
+        db = MetaDataStoreProxy(_MetaDataMatcher.create(uri, mapping, **kwargs))
     return db
 
 
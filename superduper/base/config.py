@@ -86,11 +86,13 @@ class PollingStrategy(CDCStrategy):
     :param auto_increment_field: The field to use for auto-incrementing
     :param frequency: The frequency to poll for changes
     :param type: The type of CDC strategy
+    :param batch_size: The number of rows read per query when polling
     """
 
     auto_increment_field: t.Optional[str] = None
     frequency: str = '30'
     type: str = 'incremental'
+    batch_size: int = 1000
 
 
 @dc.dataclass
@@ -111,12 +113,16 @@ class CDCConfig(BaseConfig):
 
     :param uri: The URI for the CDC service
     :param strategy: The strategy to use for CDC
+    :param state_path: The directory where the state of watched tables is
+                       saved, so that polling resumes after a restart;
+                       None keeps the state in memory only
     """
 
     uri: t.Optional[str] = None  # None implies local mode
     strategy: t.Union[PollingStrategy, LogBasedStrategy] = dc.field(
         default_factory=PollingStrategy
     )
+    state_path: t.Optional[str] = os.path.join('.superduper', 'cdc')
 
 
 @dc.dataclass
@@ -126,11 +132,29 @@ class VectorSearch(BaseConfig):
     :param uri: The URI for the vector search service
     :param type: The type of vector search service
     :param backfill_batch_size: The size of the backfill batch
+    :param post_filter_oversample: Factor by which ``n`` is multiplied when
+                                   searching before filtering in
+                                   ``select(...).like(...)`` queries
+    :param binary_protocol: Whether to send vectors to the vector search
+                            service as binary frames rather than JSON
+    :param frame_size: The maximum number of vectors per binary frame
+    :param write_uri: The URI of the primary vector search service, which
+                      receives adds and deletes, if ``uri`` balances reads
+                      over several replicas
+    :param replica: Whether this vector search service is a read replica
+                    following the primary service at ``write_uri``
+    :param sync_interval: The time in seconds between two syncs of a replica
     """
 
     uri: t.Optional[str] = None  # None implies local mode
     type: str = 'in_memory'  # in_memory|lance
     backfill_batch_size: int = 100
+    post_filter_oversample: int = 4
+    binary_protocol: bool = True
+    frame_size: int = 4096
+    write_uri: t.Optional[str] = None
+    replica: bool = False
+    sync_interval: float = 1.0
 
 
 @dc.dataclass
@@ -270,6 +294,34 @@ class Downloads(BaseConfig):
     timeout: t.Optional[int] = None
 
 
+@dc.dataclass
+class Http(BaseConfig):
+    """Describes the configuration of the HTTP session shared by REST clients.
+
+    :param pool_size: The maximum number of kept-alive connections per host
+    :param connect_timeout: The timeout in seconds for connecting to a server
+    :param read_timeout: The timeout in seconds for the server to send data
+    """
+
+    pool_size: int = 32
+    connect_timeout: t.Optional[float] = 10
+    read_timeout: t.Optional[float] = 300
+
+
+@dc.dataclass
+class PredictionCache(BaseConfig):
+    """Describes the configuration for caching model predictions.
+
+    :param path: The path of the SQLite file holding the cache
+    :param ttl: The time in seconds after which a prediction expires
+    :param max_entries: The maximum number of predictions kept
+    """
+
+    path: str = os.path.join('.superduper', 'prediction_cache.sqlite')
+    ttl: t.Optional[float] = None
+    max_entries: t.Optional[int] = 1_000_000
+
+
 @dc.dataclass
 class Config(BaseConfig):
     """The data class containing all configurable superduper values.
@@ -280,9 +332,16 @@ class Config(BaseConfig):
                        Default: .superduper/vector_indices
     :param artifact_store: The URI for the artifact store
     :param metadata_store: The URI for the metadata store
+    :param metadata_job_flush_interval: Maximum age in seconds of job inserts
+                                        and status updates buffered by SQL
+                                        metadata stores; 0 writes them
+                                        immediately
     :param cluster: Settings distributed computing and change data capture
     :param retries: Settings for retrying failed operations
     :param downloads: Settings for downloading files
+    :param http: Settings for the HTTP connections to REST-backed services
+    :param prediction_cache: Settings for caching the predictions of models
+                             with ``cache_predictions=True``
     :param fold_probability: The probability of validation fold
     :param log_level: The severity level of the logs
     :param logging_type: The type of logging to use
@@ -298,10 +357,13 @@ class Config(BaseConfig):
 
     artifact_store: t.Optional[str] = None
     metadata_store: t.Optional[str] = None
+    metadata_job_flush_interval: float = 0
 
     cluster: Cluster = dc.field(default_factory=Cluster)
     retries: Retry = dc.field(default_factory=Retry)
     downloads: Downloads = dc.field(default_factory=Downloads)
+    http: Http = dc.field(default_factory=Http)
+    prediction_cache: PredictionCache = dc.field(default_factory=PredictionCache)
 
     fold_probability: float = 0.05
 
@@ -325,7 +387,12 @@ class Config(BaseConfig):
     def comparables(self):
         """A dict of `self` excluding some defined attributes."""
         _dict = dc.asdict(self)
-        list(map(_dict.pop, ('cluster', 'retries', 'downloads')))
+        list(
+            map(
+                _dict.pop,
+                ('cluster', 'retries', 'downloads', 'http', 'prediction_cache'),
+            )
+        )
         return _dict
 
     def match(self, cfg: t.Dict):
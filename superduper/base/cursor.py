@@ -26,6 +26,9 @@ class SuperDuperCursor:
     :param process_func: a function to process the raw cursor output before
     """
 
+    # Rows of a list are decoded this many at a time
+    DECODE_BATCH_SIZE: t.ClassVar[int] = 256
+
     raw_cursor: t.Any
     id_field: str
     db: t.Optional['Datalayer'] = None
@@ -35,6 +38,9 @@ class SuperDuperCursor:
 
     _it: int = 0
 
+    def __post_init__(self):
+        self._decoded: t.List[Document] = []
+
     def limit(self, *args, **kwargs) -> 'SuperDuperCursor':
         """Limit the number of results returned by the cursor.
 
@@ -62,9 +68,7 @@ class SuperDuperCursor:
     def __iter__(self):
         return self
 
-    def __next__(self):
-        """Get the next document from the cursor."""
-        r = self.cursor_next()
+    def _process(self, r):
         if self.process_func is not None:
             r = self.process_func(r)
         if self.scores is not None:
@@ -72,7 +76,22 @@ class SuperDuperCursor:
                 r['score'] = self.scores[str(r[self.id_field])]
             except KeyError:
                 logging.debug(f"No document id found for {r}")
+        return r
 
-        return Document.decode(r, db=self.db, schema=self.schema)
+    def __next__(self):
+        """Get the next document from the cursor."""
+        if not isinstance(self.raw_cursor, list):
+            r = self._process(self.cursor_next())
+            return Document.decode(r, db=self.db, schema=self.schema)
+
+        if not self._decoded:
+            if self._it >= len(self.raw_cursor):
+                raise StopIteration
+            rows = self.raw_cursor[self._it : self._it + self.DECODE_BATCH_SIZE]
+            self._it += len(rows)
+            rows = [self._process(r) for r in rows]
+            self._decoded = Document.decode_many(rows, db=self.db, schema=self.schema)
+            self._decoded.reverse()
+        return self._decoded.pop()
 
     next = __next__
@@ -6,6 +6,7 @@ from collections import defaultdict, namedtuple
 
 import click
 import networkx
+import numpy
 import tqdm
 
 import superduper as s
@@ -253,6 +254,7 @@ class Datalayer:
 
         logging.info(f"Connecting to compute engine: {new.name}")
         self.compute = new
+        self.compute.queue.db = self
 
     def disconnect(self):
         """Disconnect from the compute engine."""
@@ -418,6 +420,79 @@ class Datalayer:
 
         return inserted_ids, None
 
+    def bulk_insert(
+        self,
+        table: str,
+        data: t.Any,
+        batch_size: int = 1000,
+        max_workers: t.Optional[int] = None,
+        refresh: bool = True,
+        datatypes: t.Sequence[DataType] = (),
+        auto_schema: bool = True,
+    ) -> t.List:
+        """Insert a large number of documents into ``table`` in batches.
+
+        The documents of a batch are encoded at once, column by column and
+        with their artifacts hashed together, in a thread-pool while the
+        artifacts of the previous batch are uploaded and it is written to the
+        databackend, so that at most two batches are held in memory.
+
+        :param table: The table to insert into.
+        :param data: An iterable of dictionaries or documents, a
+                     `pandas.DataFrame` or a `pyarrow.Table`.
+        :param batch_size: The number of documents written at a time.
+        :param max_workers: The number of encoding and uploading threads.
+        :param refresh: Boolean indicating whether to refresh the task group
+                        after each batch.
+        :param datatypes: List of datatypes in the insert documents.
+        :param auto_schema: Whether to create the table from the first
+                            document if it doesn't exist.
+        """
+        import concurrent.futures
+
+        for e in datatypes:
+            self.add(e)
+
+        schema = None
+        pending: t.Optional[concurrent.futures.Future] = None
+        inserted_ids: t.List = []
+
+        def write(future):
+            documents = list(
+                pool.map(self.artifact_store.save_artifact, future.result())
+            )
+            insert = self[table].insert(documents)
+            ids, _ = self.execute(insert, refresh=refresh, auto_schema=False)
+            inserted_ids.extend(ids)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='superduper-insert'
+        ) as pool:
+            for i, batch in enumerate(_iter_batches(data, batch_size)):
+                documents = [
+                    r if isinstance(r, Document) else Document(r) for r in batch
+                ]
+                folds = numpy.random.random(len(documents))
+                for r, fold in zip(documents, folds):
+                    r.setdefault(
+                        '_fold',
+                        'train' if fold >= s.CFG.fold_probability else 'valid',
+                    )
+                if i == 0:
+                    if auto_schema and self.cfg.auto_schema:
+                        self._auto_create_table(table, documents)
+                    try:
+                        schema = self.tables[table].schema
+                    except FileNotFoundError:
+                        pass
+                future = pool.submit(Document.encode_many, documents, schema)
+                if pending is not None:
+                    write(pending)
+                pending = future
+            if pending is not None:
+                write(pending)
+        return inserted_ids
+
     def _auto_create_table(self, table_name, documents):
         try:
             table = self.tables[table_name]
@@ -572,20 +647,20 @@ class Datalayer:
                 type_id, identifier, version=version, force=force
             )
 
-        versions = self.metadata.show_component_versions(type_id, identifier)
+        # The uuids of all versions are fetched at once
+        infos = self.metadata.get_component_versions(
+            type_id, identifier, allow_hidden=True
+        )
+        versions = [r['version'] for r in infos]
         versions_in_use = []
-        for v in versions:
-            if self.metadata.component_version_has_parents(type_id, identifier, v):
-                versions_in_use.append(v)
+        component_versions_in_use = []
+        for r in infos:
+            parents = self.metadata.get_component_version_parents(r['uuid'])
+            if parents:
+                versions_in_use.append(r['version'])
+                component_versions_in_use.append(f"{r['uuid']} -> {parents}")
 
         if versions_in_use:
-            component_versions_in_use = []
-            for v in versions_in_use:
-                uuid = self.metadata._get_component_uuid(type_id, identifier, v)
-                component_versions_in_use.append(
-                    f"{uuid} -> "
-                    f"{self.metadata.get_component_version_parents(uuid)}",
-                )
             if not force:
                 raise exceptions.ComponentInUseError(
                     f'Component versions: {component_versions_in_use} are in use'
@@ -810,21 +885,18 @@ class Datalayer:
         version: int,
         force: bool = False,
     ):
-        r = self.metadata.get_component(type_id, identifier, version=version)
-        if self.metadata.component_version_has_parents(type_id, identifier, version):
-            parents = self.metadata.get_component_version_parents(r['uuid'])
-            raise Exception(f'{r["uuid"]} is involved in other components: {parents}')
+        info = self.metadata.get_component(type_id, identifier, version=version)
+        parents = self.metadata.get_component_version_parents(info['uuid'])
+        if parents:
+            raise Exception(
+                f'{info["uuid"]} is involved in other components: {parents}'
+            )
 
         if force or click.confirm(
             f'You are about to delete {type_id}/{identifier}{version}, are you sure?',
             default=False,
         ):
-            component = self.load(
-                type_id, identifier, version=version, allow_hidden=force
-            )
-            info = self.metadata.get_component(
-                type_id, identifier, version=version, allow_hidden=force
-            )
+            component = self.load(uuid=info['uuid'], allow_hidden=force)
             component.cleanup(self)
 
             if type_id in self.type_id_to_cache_mapping:
@@ -1021,3 +1093,16 @@ class LoadDict(dict):
         :param key: Force load key
         """
         return self.__missing__(key)
+
+
+def _iter_batches(data: t.Any, batch_size: int) -> t.Iterator[t.List]:
+    if hasattr(data, 'to_batches'):
+        # ``pyarrow.Table``
+        for batch in data.to_batches(max_chunksize=batch_size):
+            yield batch.to_pylist()
+    elif hasattr(data, 'iloc'):
+        # ``pandas.DataFrame``
+        for i in range(0, len(data), batch_size):
+            yield data.iloc[i : i + batch_size].to_dict(orient='records')
+    else:
+        yield from ibatch(data, batch_size)
@@ -110,34 +110,74 @@ class Document(MongoStyleDict):
 
         :param schema: The schema to use.
         :param leaves_to_keep: The types of leaves to keep.
+        :param metadata: Whether to keep the metadata of leaves.
+        :param defaults: Whether to keep the default values of leaves.
         """
-        builds: t.Dict[str, dict] = self.get(KEY_BUILDS, {})
-        blobs: t.Dict[str, bytes] = self.get(KEY_BLOBS, {})
-        files: t.Dict[str, str] = self.get(KEY_FILES, {})
+        return Document.encode_many(
+            [self],
+            schema=schema,
+            leaves_to_keep=leaves_to_keep,
+            metadata=metadata,
+            defaults=defaults,
+        )[0]
+
+    @staticmethod
+    def encode_many(
+        documents: t.Sequence['Document'],
+        schema: t.Optional[t.Union['Schema', str]] = None,
+        leaves_to_keep: t.Sequence = (),
+        metadata: bool = True,
+        defaults: bool = True,
+    ) -> t.List[SuperDuperFlatEncode]:
+        """Encode several documents, e.g. the rows of an insert.
+
+        The fields of a schema are encoded column by column, for all the
+        documents using the schema at once.
+
+        :param documents: The documents to encode.
+        :param schema: The schema of documents without their own.
+        :param leaves_to_keep: The types of leaves to keep.
+        :param metadata: Whether to keep the metadata of leaves.
+        :param defaults: Whether to keep the default values of leaves.
+        """
+        outs = [dict(r) for r in documents]
+        builds: t.List[t.Dict[str, dict]] = [r.get(KEY_BUILDS, {}) for r in documents]
+        blobs: t.List[t.Dict[str, bytes]] = [r.get(KEY_BLOBS, {}) for r in documents]
+        files: t.List[t.Dict[str, str]] = [r.get(KEY_FILES, {}) for r in documents]
 
         # Get schema from database.
-        schema = self.schema or schema
-        schema = get_schema(self.db, schema) if schema else None
-        out = dict(self)
+        schemas: t.Dict[int, t.Tuple['Schema', t.List[int]]] = {}
+        for i, r in enumerate(documents):
+            s = r.schema or schema
+            s = get_schema(r.db, s) if s else None
+            if s is not None:
+                schemas.setdefault(id(s), (s, []))[1].append(i)
+
+        for s, rows in schemas.values():
+            s.encode_many(
+                [outs[i] for i in rows],
+                [builds[i] for i in rows],
+                [blobs[i] for i in rows],
+                [files[i] for i in rows],
+                leaves_to_keep=leaves_to_keep,
+            )
 
-        if schema is not None:
-            out = schema.encode_data(
-                out, builds, blobs, files, leaves_to_keep=leaves_to_keep
+        encoded = []
+        for out, b, bl, f in zip(outs, builds, blobs, files):
+            out = _deep_flat_encode(
+                out,
+                builds=b,
+                blobs=bl,
+                files=f,
+                leaves_to_keep=leaves_to_keep,
+                metadata=metadata,
+                defaults=defaults,
             )
-        out = _deep_flat_encode(
-            out,
-            builds=builds,
-            blobs=blobs,
-            files=files,
-            leaves_to_keep=leaves_to_keep,
-            metadata=metadata,
-            defaults=defaults,
-        )
-        # TODO - don't need to save in one document
-        # can return encoded, builds, files, blobs
-        out.update({KEY_BUILDS: builds, KEY_FILES: files, KEY_BLOBS: blobs})
-        out = SuperDuperFlatEncode(out)
-        return out
+            # TODO - don't need to save in one document
+            # can return encoded, builds, files, blobs
+            out.update({KEY_BUILDS: b, KEY_FILES: f, KEY_BLOBS: bl})
+            encoded.append(SuperDuperFlatEncode(out))
+        return encoded
 
     @classmethod
     def decode(
@@ -202,6 +242,49 @@ class Document(MongoStyleDict):
         else:
             return r
 
+    @classmethod
+    def decode_many(
+        cls,
+        rs: t.Sequence[t.Dict],
+        schema: t.Optional[t.Union['Schema', str]] = None,
+        db: t.Optional['Datalayer'] = None,
+    ) -> t.List:
+        """Decode several documents, e.g. the rows of a query result.
+
+        The fields of the schema stored in the rows, and not referenced, are
+        decoded column by column with the ``decode_many`` method of their
+        datatype.
+
+        :param rs: The encoded data.
+        :param schema: The schema to use.
+        :param db: The datalayer to use.
+        """
+        schema = get_schema(db, schema) if schema else None
+        if schema is None or schema.trivial:
+            return [cls.decode(r, schema=schema, db=db) for r in rs]
+
+        rs = [dict(r) for r in rs]
+        decoded: t.List[t.Dict] = [{} for _ in rs]
+        for k, field in schema.fields.items():
+            if not isinstance(field, DataType):
+                continue
+            rows = [
+                i
+                for i, r in enumerate(rs)
+                if r.get(k) is not None and not parse_reference(r[k])
+            ]
+            if rows:
+                values = field.decode_many([rs[i].pop(k) for i in rows])
+                for i, value in zip(rows, values):
+                    decoded[i][k] = value
+
+        out = []
+        for r, values in zip(rs, decoded):
+            r = cls.decode(r, schema=schema, db=db)
+            r.update(values)
+            out.append(r)
+        return out
+
     @property
     def variables(self) -> t.List[str]:
         """Return a list of variables in the object."""
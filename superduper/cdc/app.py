@@ -0,0 +1,49 @@
+import typing as t
+
+from fastapi import Request
+
+from superduper import CFG
+from superduper.base.datalayer import Datalayer
+from superduper.cdc.cdc import DatabaseChangeDataCapture
+from superduper.server.app import SuperDuperApp, port_from_uri
+
+
+def _cdc(request: Request) -> DatabaseChangeDataCapture:
+    return request.app.state.cdc
+
+
+def build_app(db: t.Optional[Datalayer] = None) -> SuperDuperApp:
+    """Build the change data capture service application.
+
+    :param db: Datalayer to watch, built from ``CFG`` by default
+    """
+
+    def init_hook(db: Datalayer):
+        db.cdc = DatabaseChangeDataCapture(db)
+        app.app.state.cdc = db.cdc
+        db.cdc.start()
+
+    def shutdown_hook(db: Datalayer):
+        db.cdc.stop()
+
+    app = SuperDuperApp(
+        'cdc',
+        port=port_from_uri(CFG.cluster.cdc.uri, default=8001),
+        db=db,
+        init_hook=init_hook,
+        shutdown_hook=shutdown_hook,
+    )
+
+    @app.add('/health', method='get')
+    def health(request: Request):
+        return {'tables': list(_cdc(request).watchers)}
+
+    @app.add('/listener/add', method='get')
+    def add_listener(request: Request, name: str):
+        cdc = _cdc(request)
+        cdc.add(cdc.db.load('listener', name))
+
+    return app
+
+
+app = build_app()
@@ -0,0 +1,361 @@
+import os
+import pickle
+import threading
+import typing as t
+
+from superduper import CFG, logging
+from superduper.base.config import PollingStrategy
+from superduper.base.datalayer import DBEvent
+from superduper.base.enums import DBType
+
+if t.TYPE_CHECKING:
+    from superduper.base.datalayer import Datalayer
+    from superduper.components.listener import Listener
+
+
+class _MongoTable:
+    """Reads the ids and marks of a collection with ``pymongo``."""
+
+    def __init__(self, db: 'Datalayer', table: str):
+        self.collection = db.databackend.db[table]
+        self.primary_id = '_id'
+
+    def has_field(self, field: str) -> bool:
+        return True
+
+    def count(self) -> int:
+        return self.collection.count_documents({})
+
+    def ids_after(self, last_id, limit: int) -> t.List:
+        filter = {} if last_id is None else {'_id': {'$gt': last_id}}
+        cursor = self.collection.find(filter, {'_id': 1}).sort('_id', 1).limit(limit)
+        return [r['_id'] for r in cursor]
+
+    def last_id(self):
+        cursor = self.collection.find({}, {'_id': 1}).sort('_id', -1).limit(1)
+        return next((r['_id'] for r in cursor), None)
+
+    def marks_after(self, field: str, mark, last_id, limit: int) -> t.List[t.Tuple]:
+        if mark is None:
+            filter = {field: {'$exists': True}}
+        else:
+            filter = {
+                '$or': [
+                    {field: {'$gt': mark}},
+                    {field: mark, '_id': {'$gt': last_id}},
+                ]
+            }
+        cursor = (
+            self.collection.find(filter, {field: 1, '_id': 1})
+            .sort([(field, 1), ('_id', 1)])
+            .limit(limit)
+        )
+        return [(r[field], r['_id']) for r in cursor]
+
+    def last_mark(self, field: str) -> t.Optional[t.Tuple]:
+        cursor = (
+            self.collection.find({field: {'$exists': True}}, {field: 1, '_id': 1})
+            .sort([(field, -1), ('_id', -1)])
+            .limit(1)
+        )
+        return next(((r[field], r['_id']) for r in cursor), None)
+
+
+class _IbisTable:
+    """Reads the ids and marks of a table with ``ibis``."""
+
+    def __init__(self, db: 'Datalayer', table: str):
+        self.table = db.databackend.conn.table(table)
+        self.primary_id = db[table].primary_id
+
+    def has_field(self, field: str) -> bool:
+        return field in self.table.columns
+
+    def count(self) -> int:
+        return int(self.table.count().execute())
+
+    def ids_after(self, last_id, limit: int) -> t.List:
+        table = self.table
+        pid = table[self.primary_id]
+        if last_id is not None:
+            table = table.filter(pid > last_id)
+        query = table.order_by(pid).limit(limit).select(self.primary_id)
+        return query.execute()[self.primary_id].tolist()
+
+    def last_id(self):
+        import ibis
+
+        query = self.table.order_by(ibis.desc(self.primary_id)).limit(1)
+        out = query.select(self.primary_id).execute()[self.primary_id].tolist()
+        return out[0] if out else None
+
+    def marks_after(self, field: str, mark, last_id, limit: int) -> t.List[t.Tuple]:
+        import ibis
+
+        table = self.table
+        pid = table[self.primary_id]
+        if mark is None:
+            table = table.filter(table[field].notnull())
+        else:
+            table = table.filter(
+                (table[field] > mark) | ((table[field] == mark) & (pid > last_id))
+            )
+        query = table.order_by([ibis.asc(field), ibis.asc(self.primary_id)])
+        out = query.limit(limit).select(field, self.primary_id).execute()
+        return list(zip(out[field].tolist(), out[self.primary_id].tolist()))
+
+    def last_mark(self, field: str) -> t.Optional[t.Tuple]:
+        import ibis
+
+        table = self.table.filter(self.table[field].notnull())
+        query = table.order_by([ibis.desc(field), ibis.desc(self.primary_id)])
+        out = query.limit(1).select(field, self.primary_id).execute()
+        if not len(out):
+            return None
+        return out[field].tolist()[0], out[self.primary_id].tolist()[0]
+
+
+class _Watcher:
+    """Change detection state of a table.
+
+    The high-water mark is the largest ``(field, id)`` seen so far, so that
+    rows sharing a value of ``field`` are never skipped between batches.
+    """
+
+    def __init__(
+        self, reader: t.Union[_MongoTable, _IbisTable], field: t.Optional[str]
+    ):
+        self.reader = reader
+        self.field = field
+        self.mark: t.Optional[t.Tuple] = None
+        self.ids: t.Set = set()
+
+    def state(self) -> t.Dict:
+        return {'field': self.field, 'mark': self.mark, 'ids': self.ids}
+
+
+class DatabaseChangeDataCapture:
+    """Poll tables for changes made outside the datalayer, and trigger listeners.
+
+    Each table is polled in batches of ``batch_size`` rows. Rows whose
+    ``auto_increment_field`` is larger than the high-water mark of the table
+    are inserts, or updates if their id was seen before; the field may hold
+    an auto-incremented integer or a modification timestamp. The ids of the
+    table are compared with the ids seen before whenever the number of rows
+    or the largest id changed, which detects deletes, and inserts of tables
+    without the field. Changes are sent to ``Datalayer.on_event`` as for writes made
+    through the datalayer.
+
+    The ids and marks of the watched tables are kept in memory, and saved in
+    ``state_path`` after each change, so that a restarted service resumes
+    from them instead of missing the changes made while it was down.
+
+    :param db: Datalayer whose tables are watched
+    :param strategy: Polling strategy, ``CFG.cluster.cdc.strategy`` by default
+    :param state_path: Directory of the saved states,
+                       ``CFG.cluster.cdc.state_path`` by default
+    """
+
+    def __init__(
+        self,
+        db: 'Datalayer',
+        strategy: t.Optional[PollingStrategy] = None,
+        state_path: t.Optional[str] = None,
+    ):
+        strategy = strategy or CFG.cluster.cdc.strategy
+        if isinstance(strategy, dict):
+            # The configuration is read without resolving the strategy union
+            strategy = dict(strategy)
+            type = strategy.pop('type')
+            if type != PollingStrategy.type:
+                raise NotImplementedError(
+                    f'CDC strategy {type} is not supported, use a polling strategy'
+                )
+            strategy = PollingStrategy(**strategy)
+        if not isinstance(strategy, PollingStrategy):
+            raise NotImplementedError(
+                f'CDC strategy {strategy.type} is not supported, '
+                'use a polling strategy'
+            )
+        self.db = db
+        self.strategy = strategy
+        self.state_path = state_path or CFG.cluster.cdc.state_path
+        self.watchers: t.Dict[str, _Watcher] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+
+    def _reader(self, table: str):
+        if self.db.databackend.db_type == DBType.MONGODB:
+            return _MongoTable(self.db, table)
+        return _IbisTable(self.db, table)
+
+    def _all_ids(self, reader) -> t.Set:
+        ids: t.Set = set()
+        last_id = None
+        while True:
+            batch = reader.ids_after(last_id, self.strategy.batch_size)
+            ids.update(batch)
+            if len(batch) < self.strategy.batch_size:
+                return ids
+            last_id = batch[-1]
+
+    def _state_file(self, table: str) -> t.Optional[str]:
+        if self.state_path is None:
+            return None
+        return os.path.join(self.state_path, f'{table}.pkl')
+
+    def _load_state(self, table: str) -> t.Optional[t.Dict]:
+        path = self._state_file(table)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logging.warn(f'Could not read the CDC state of {table}: {e}')
+            return None
+        # A state saved for another database is of no use
+        if state.pop('uri', None) != self.db.databackend.uri:
+            return None
+        return state
+
+    def _save_state(self, table: str, watcher: _Watcher):
+        path = self._state_file(table)
+        if path is None:
+            return
+        os.makedirs(self.state_path, exist_ok=True)
+        state = {'uri': self.db.databackend.uri, **watcher.state()}
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(state, f)
+        os.replace(path + '.tmp', path)
+
+    def listen(self, table: str, field: t.Optional[str] = None):
+        """Watch a table, from its saved state or else its current state.
+
+        :param table: Table to watch
+        :param field: Auto-incremented or timestamp field of the table,
+                      ``auto_increment_field`` of the strategy by default
+        """
+        with self._lock:
+            if table in self.watchers:
+                return
+            reader = self._reader(table)
+            field = field or self.strategy.auto_increment_field
+            if field is not None and not reader.has_field(field):
+                logging.warn(
+                    f'Table {table} has no field {field}; '
+                    'only inserts and deletes are detected'
+                )
+                field = None
+            watcher = _Watcher(reader, field)
+            state = self._load_state(table)
+            if state is not None and state['field'] == field:
+                watcher.mark = state['mark']
+                watcher.ids = state['ids']
+                logging.info(f'Resuming to watch table {table} for changes')
+            else:
+                watcher.ids = self._all_ids(reader)
+                if field is not None:
+                    watcher.mark = reader.last_mark(field)
+                self._save_state(table, watcher)
+                logging.info(f'Watching table {table} for changes')
+            self.watchers[table] = watcher
+
+    def unlisten(self, table: str):
+        """Stop watching a table.
+
+        :param table: Table to stop watching
+        """
+        with self._lock:
+            self.watchers.pop(table, None)
+
+    def add(self, listener: 'Listener'):
+        """Watch the table selected by a listener.
+
+        :param listener: Listener to trigger on changes
+        """
+        if listener.select is not None:
+            self.listen(listener.select.table)
+
+    def start(self):
+        """Watch the tables of the listeners, and poll them in a thread."""
+        for identifier in self.db.show('listener'):
+            self.add(self.db.listeners[identifier])
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._poll_forever, daemon=True, name='cdc-polling'
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> int:
+        """Detect the changes of the watched tables, returning their number."""
+        with self._lock:
+            changes = 0
+            for table, watcher in list(self.watchers.items()):
+                n = self._poll(table, watcher)
+                if n:
+                    self._save_state(table, watcher)
+                changes += n
+            return changes
+
+    def _send(self, table: str, ids: t.List, event_type: str):
+        if not ids:
+            return
+        logging.info(f'CDC: {len(ids)} {event_type} events on {table}')
+        self.db.on_event(self.db[table], ids=ids, event_type=event_type)
+
+    def _poll(self, table: str, watcher: _Watcher) -> int:
+        reader = watcher.reader
+        changes = 0
+        if watcher.field is not None:
+            while True:
+                mark, last_id = watcher.mark or (None, None)
+                batch = reader.marks_after(
+                    watcher.field, mark, last_id, self.strategy.batch_size
+                )
+                if not batch:
+                    break
+                ids = [id for _, id in batch]
+                inserted = [id for id in ids if id not in watcher.ids]
+                updated = [id for id in ids if id in watcher.ids]
+                watcher.ids.update(inserted)
+                watcher.mark = batch[-1]
+                self._send(table, inserted, DBEvent.insert)
+                self._send(table, updated, DBEvent.upsert)
+                changes += len(batch)
+                if len(batch) < self.strategy.batch_size:
+                    break
+
+        # The ids are only all read when the number of rows changed, or when
+        # the largest id is new, as after an insert and a delete
+        if reader.count() == len(watcher.ids):
+            last_id = reader.last_id()
+            if last_id is None or last_id in watcher.ids:
+                return changes
+
+        ids = self._all_ids(reader)
+        inserted = [id for id in ids if id not in watcher.ids]
+        deleted = [id for id in watcher.ids if id not in ids]
+        watcher.ids = ids
+        for i in range(0, len(inserted), self.strategy.batch_size):
+            self._send(
+                table, inserted[i : i + self.strategy.batch_size], DBEvent.insert
+            )
+        for i in range(0, len(deleted), self.strategy.batch_size):
+            self._send(table, deleted[i : i + self.strategy.batch_size], DBEvent.delete)
+        return changes + len(inserted) + len(deleted)
+
+    def _poll_forever(self):
+        while not self._stop.wait(float(self.strategy.frequency)):
+            try:
+                self.poll()
+            except Exception as e:
+                logging.error(f'Error polling for changes: {e}')
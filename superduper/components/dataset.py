@@ -14,6 +14,7 @@ from superduper.components.datatype import (
     DataType,
     dill_serializer,
 )
+from superduper.misc.data import ibatch
 
 
 class Dataset(Component):
@@ -27,6 +28,9 @@ class Dataset(Component):
     :param pin: Whether to pin the dataset.
                 If True, the dataset will load the datas from the database every time.
                 If False, the dataset will cache the datas after we apply to db.
+
+    Unpinned data is only loaded when ``data`` is first read; use
+    ``iter_chunks`` to stream it from the database instead.
     """
 
     type_id: t.ClassVar[str] = 'dataset'
@@ -53,6 +57,8 @@ class Dataset(Component):
     @ensure_initialized
     def data(self):
         """Property representing the dataset's data."""
+        if self._data is None:
+            self._data = self._load_data(self.db)
         return self._data
 
     def init(self, db=None):
@@ -63,7 +69,7 @@ class Dataset(Component):
             assert self.raw_data is not None
             self._data = [Document.decode(r, db=db).unpack() for r in self.raw_data]
         else:
-            self._data = self._load_data(db)
+            self._data = None
 
     @override
     def pre_create(self, db: 'Datalayer') -> None:
@@ -76,13 +82,46 @@ class Dataset(Component):
             self.raw_data = [r.encode() for r in data]
 
     def _load_data(self, db: 'Datalayer'):
+        data = []
+        for chunk in self._iter_query(db, chunk_size=1000):
+            data.extend(chunk)
+        return data
+
+    def _iter_query(self, db: 'Datalayer', chunk_size: int):
         assert self.db is not None, 'Database must be set'
         assert self.select is not None, 'Select must be set'
-        data = list(db.execute(self.select))
-        if self.sample_size is not None and self.sample_size < len(data):
-            perm = self.random.permutation(len(data)).tolist()
-            data = [data[perm[i]] for i in range(self.sample_size)]
-        return data
+        if self.sample_size is None:
+            yield from ibatch(db.execute(self.select), chunk_size)
+            return
+        # Sample the ids only, then fetch the sampled documents
+        primary_id = self.select.primary_id
+        ids = [r[primary_id] for r in db.execute(self.select.select_ids)]
+        if self.sample_size < len(ids):
+            # A fresh generator, so that every pass draws the same sample
+            random = numpy.random.default_rng(seed=self.random_seed)
+            perm = random.permutation(len(ids)).tolist()
+            ids = [ids[perm[i]] for i in range(self.sample_size)]
+        for chunk_ids in ibatch(ids, chunk_size):
+            docs = {
+                str(r[primary_id]): r
+                for r in db.execute(self.select.select_using_ids(chunk_ids))
+            }
+            yield [docs[str(id)] for id in chunk_ids]
+
+    @ensure_initialized
+    def iter_chunks(self, chunk_size: int = 1000):
+        """Iterate over the dataset's data in lists of at most ``chunk_size``.
+
+        Data which is pinned or already loaded is sliced; otherwise the
+        documents are fetched from the database one chunk at a time.
+
+        :param chunk_size: The number of documents per chunk.
+        """
+        if self._data is None:
+            yield from self._iter_query(self.db, chunk_size)
+            return
+        for i in range(0, len(self._data), chunk_size):
+            yield self._data[i : i + chunk_size]
 
     @cached_property
     def random(self):
@@ -1,6 +1,5 @@
 import base64
 import dataclasses as dc
-import hashlib
 import inspect
 import io
 import json
@@ -21,7 +20,7 @@ from superduper.base.config import BytesEncoding
 from superduper.base.leaf import Leaf
 from superduper.components.component import Component, ensure_initialized
 from superduper.misc.annotations import component
-from superduper.misc.hash import hash_path
+from superduper.misc.hash import hash_bytes, hash_path
 
 Decode = t.Callable[[bytes], t.Any]
 Encode = t.Callable[[t.Any], bytes]
@@ -248,17 +247,26 @@ class DataType(Component):
         return self.encodable_cls(datatype=self, x=x, uri=uri, db=self.db)
 
     @ensure_initialized
-    def encode_data_with_identifier(self, item, info: t.Optional[t.Dict] = None):
+    def encode_data_with_identifier(
+        self, item, info: t.Optional[t.Dict] = None, hash: t.Optional[bool] = None
+    ):
         """Encode the item into bytes.
 
+        The identifier is a hash of the content, which is only computed for
+        artifacts, since it's the id of their reference, unless ``hash``
+        says otherwise; it's ``None`` when it isn't computed.
+
         :param item: The item to encode.
         :param info: The optional information dictionary.
+        :param hash: Whether to compute the identifier.
         """
         info = info or {}
         data = self.encoder(item, info) if self.encoder else item
-        sha1 = self.encodable_cls.get_hash(data)
+        if hash is None:
+            hash = self.encodable_cls.artifact
+        identifier = self.encodable_cls.get_hash(data) if hash else None
         data = self.bytes_encoding_after_encode(data)
-        return data, sha1
+        return data, identifier
 
     @ensure_initialized
     def encode_data(self, item, info: t.Optional[t.Dict] = None):
@@ -283,6 +291,43 @@ class DataType(Component):
         item = self.bytes_encoding_before_decode(item)
         return self.decoder(item, info=info) if self.decoder else item
 
+    @ensure_initialized
+    def encode_many(self, items: t.Sequence, info: t.Optional[t.Dict] = None):
+        """Encode several items, e.g. the values of a column, into bytes.
+
+        Uses the ``encode_many`` method of the encoder when it has one.
+
+        :param items: The items to encode.
+        :param info: The optional information dictionary.
+        """
+        info = info or {}
+        encode_many = getattr(self.encoder, 'encode_many', None)
+        if encode_many is not None:
+            data = encode_many(items)
+        elif self.encoder:
+            data = [self.encoder(item, info) for item in items]
+        else:
+            data = list(items)
+        return [self.bytes_encoding_after_encode(d) for d in data]
+
+    @ensure_initialized
+    def decode_many(self, items: t.Sequence, info: t.Optional[t.Dict] = None):
+        """Decode several items, e.g. the values of a column, from bytes.
+
+        Uses the ``decode_many`` method of the decoder when it has one.
+
+        :param items: The items to decode.
+        :param info: The optional information dictionary.
+        """
+        info = info or {}
+        items = [self.bytes_encoding_before_decode(item) for item in items]
+        decode_many = getattr(self.decoder, 'decode_many', None)
+        if decode_many is not None:
+            return decode_many(items)
+        if self.decoder:
+            return [self.decoder(item, info=info) for item in items]
+        return items
+
     def bytes_encoding_after_encode(self, data):
         """Encode the data to base64.
 
@@ -414,13 +459,7 @@ class _BaseEncodable(Leaf):
 
         :param data: Data to hash.
         """
-        if isinstance(data, str):
-            bytes_ = data.encode()
-        elif isinstance(data, bytes):
-            bytes_ = data
-        else:
-            raise ValueError(f'Unsupported data type: {type(data)}')
-        return hashlib.sha1(bytes_).hexdigest()
+        return hash_bytes(data)
 
     @staticmethod
     def build_reference(identifier, source_data):
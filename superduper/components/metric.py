@@ -8,6 +8,12 @@ class Metric(Component):
 
     These objects are callable and are applied row-wise to the data, and averaged.
 
+    Metrics may also be computed incrementally, chunk by chunk, with
+    ``init_state``, ``update`` and ``compute``. By default the state
+    collects the predictions and targets, and ``object`` is applied to all
+    of them in ``compute``; see ``IncrementalMetric`` for metrics which only
+    keep sufficient statistics.
+
     :param object: Callable or an Artifact to be applied to the data.
     """
 
@@ -22,3 +28,65 @@ class Metric(Component):
         :param y: Second sequence of data.
         """
         return self.object(x, y)
+
+    def init_state(self) -> t.Any:
+        """Return the state of the metric before any data has been seen."""
+        return [], []
+
+    def update(self, state: t.Any, x: t.Sequence, y: t.Sequence) -> t.Any:
+        """Update ``state`` with a chunk of data and return the new state.
+
+        :param state: The state returned by ``init_state`` or ``update``.
+        :param x: Chunk of predictions.
+        :param y: Chunk of targets.
+        """
+        state[0].extend(x)
+        state[1].extend(y)
+        return state
+
+    def compute(self, state: t.Any) -> t.Any:
+        """Compute the value of the metric from ``state``.
+
+        :param state: The state returned by ``init_state`` or ``update``.
+        """
+        return self.object(*state)
+
+
+class IncrementalMetric(Metric):
+    """Metric computed from statistics accumulated chunk by chunk.
+
+    Subclasses implement ``init_state``, ``update`` and ``compute``;
+    calling the metric runs them on a single chunk.
+
+    :param object: Unused; incremental metrics are computed by their methods.
+    """
+
+    object: t.Optional[t.Callable] = None
+
+    def __call__(self, x: t.Sequence, y: t.Sequence) -> t.Any:
+        """Compute the metric on the x and y data.
+
+        :param x: First sequence of data.
+        :param y: Second sequence of data.
+        """
+        return self.compute(self.update(self.init_state(), x, y))
+
+    def init_state(self) -> t.Any:
+        """Return the state of the metric before any data has been seen."""
+        raise NotImplementedError
+
+    def update(self, state: t.Any, x: t.Sequence, y: t.Sequence) -> t.Any:
+        """Update ``state`` with a chunk of data and return the new state.
+
+        :param state: The state returned by ``init_state`` or ``update``.
+        :param x: Chunk of predictions.
+        :param y: Chunk of targets.
+        """
+        raise NotImplementedError
+
+    def compute(self, state: t.Any) -> t.Any:
+        """Compute the value of the metric from ``state``.
+
+        :param state: The state returned by ``init_state`` or ``update``.
+        """
+        raise NotImplementedError
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-import concurrent.futures
 import dataclasses as dc
 import inspect
+import json
 import multiprocessing
 import os
 import re
@@ -11,14 +11,13 @@ from abc import abstractmethod
 from collections import defaultdict
 from functools import wraps
 
-import requests
 import tqdm
 
 from superduper import logging
 from superduper.backends.base.query import Query
 from superduper.backends.ibis.field_types import FieldType
 from superduper.backends.query_dataset import CachedQueryDataset, QueryDataset
-from superduper.base.document import Document
+from superduper.base.document import Document, _unpack
 from superduper.base.enums import DBType
 from superduper.base.exceptions import DatabackendException
 from superduper.base.leaf import LeafMeta
@@ -27,6 +26,10 @@ from superduper.components.datatype import DataType, dill_lazy
 from superduper.components.metric import Metric
 from superduper.components.schema import Schema
 from superduper.jobs.job import ComponentJob
+from superduper.misc import http_session
+from superduper.misc.batching import MicroBatcher
+from superduper.misc.concurrency import RequestEngine, shared_engine
+from superduper.misc.prediction_cache import get_prediction_cache
 
 if t.TYPE_CHECKING:
     from superduper.base.datalayer import Datalayer
@@ -297,7 +300,7 @@ class _Fittable:
         kwargs = kwargs.copy()
         if self.trainer.data_prefetch:
             dataset_cls = CachedQueryDataset
-            kwargs['prefetch_size'] = self.prefetch_size
+            kwargs['prefetch_size'] = self.trainer.prefetch_size
         else:
             dataset_cls = QueryDataset
 
@@ -362,9 +365,62 @@ class _Fittable:
                 self.trainer.metric_values.setdefault(k, []).append(v)
 
 
+# Types which ``_unpack`` returns unchanged
+_PLAIN = frozenset({str, int, float, bool, bytes, type(None)})
+
+
+class _KeyGetter:
+    """Get the value of a (possibly dotted) key from a document.
+
+    Dotted keys are resolved like ``MongoStyleDict.__getitem__`` resolves
+    them, but without copying the intermediate sub-documents.
+
+    :param key: The key to get.
+    """
+
+    __slots__ = ('key', 'dotted')
+
+    def __init__(self, key: str):
+        self.key = key
+        self.dotted = '.' in key
+
+    def __call__(self, r):
+        if self.key == '_base':
+            return r
+        if not self.dotted:
+            return r[self.key]
+        key = self.key
+        while True:
+            try:
+                return dict.__getitem__(r, key) if isinstance(r, dict) else r[key]
+            except KeyError:
+                if '.' not in key:
+                    raise
+                parent, key = key.split('.', 1)
+                r = r[parent]
+
+    def __reduce__(self):
+        return type(self), (self.key,)
+
+
+def _cache_config_value(value):
+    # Components and functions are identified by their identifier and source
+    if isinstance(value, Component):
+        return f'{value.type_id}/{value.identifier}'
+    if callable(value) and not isinstance(value, type):
+        try:
+            return inspect.getsource(value)
+        except (OSError, TypeError):
+            return f'{value.__module__}.{getattr(value, "__qualname__", value)}'
+    return value
+
+
 class Mapping:
     """Class to represent model inputs for mapping database collections or tables.
 
+    The mapping is compiled once into getters, so that extracting the inputs
+    of a row doesn't copy the row.
+
     :param mapping: Mapping that represents a collection or table map.
     :param signature: Signature for the model.
     """
@@ -372,6 +428,8 @@ class Mapping:
     def __init__(self, mapping: ModelInputType, signature: Signature):
         self.mapping = self._map_args_kwargs(mapping)
         self.signature = signature
+        self._args = tuple(_KeyGetter(k) for k in self.mapping[0])
+        self._kwargs = tuple((v, _KeyGetter(k)) for k, v in self.mapping[1].items())
 
     @property
     def id_key(self):
@@ -385,6 +443,11 @@ class Mapping:
             outputs.append(f'{key}={value}')
         return ', '.join(outputs)
 
+    @property
+    def keys(self):
+        """The keys read from the documents by the mapping."""
+        return [*self.mapping[0], *self.mapping[1].keys()]
+
     @staticmethod
     def _map_args_kwargs(mapping):
         if isinstance(mapping, str):
@@ -409,24 +472,24 @@ class Mapping:
         >>> _Predictor._data_from_input_type(docs)
         ([1], {'X': 2})
         """
-        if not isinstance(r, Document):
-            r = Document(r)
-        args = []
-        kwargs = {}
+        getter = None
         try:
-            for k in self.mapping[0]:
-                args.append(r[k])
-            for k, v in self.mapping[1].items():
-                kwargs[v] = r[k]
+            args = []
+            for getter in self._args:
+                value = getter(r)
+                args.append(value if type(value) in _PLAIN else _unpack(value))
+            kwargs = {}
+            for name, getter in self._kwargs:
+                value = getter(r)
+                kwargs[name] = value if type(value) in _PLAIN else _unpack(value)
         except KeyError:
-            raise KeyError(f'Key `{k}` not found in document {r}.')
-        args = Document({'_base': args}).unpack()
-        kwargs = Document(kwargs).unpack()
+            assert getter is not None
+            raise KeyError(f'Key `{getter.key}` not found in document {r}.')
 
         if self.signature == '**kwargs':
             return kwargs
         elif self.signature == '*args':
-            return (*args, *list(kwargs.values()))
+            return (*args, *kwargs.values())
         elif self.signature == 'singleton':
             if args:
                 assert not kwargs
@@ -435,10 +498,17 @@ class Mapping:
             else:
                 assert kwargs
                 assert len(kwargs) == 1
-                return next(kwargs.values())
+                return next(iter(kwargs.values()))
         assert self.signature == '*args,**kwargs'
         return args, kwargs
 
+    def map_many(self, rows: t.Iterable) -> t.List:
+        """Get the model inputs of several rows.
+
+        :param rows: The rows to map.
+        """
+        return [self(r) for r in rows]
+
 
 def init_decorator(func):
     """Decorator to set _is_initialized to True after init method is called.
@@ -487,9 +557,28 @@ class Model(Component, metaclass=ModelMeta):
     :param validation: The validation ``Dataset`` instances to use.
     :param metric_values: The metrics to evaluate on.
     :param num_workers: Number of workers to use for parallel prediction.
+    :param cache_predictions: Cache the outputs of predictions on the inputs
+                              of a select, so that they are not recomputed.
+                              Only API and LLM models, whose outputs do not
+                              depend on trained weights, support it.
     """
 
     type_id: t.ClassVar[str] = 'model'
+    # The prediction cache is keyed on the configuration of the model, which
+    # does not cover the weights held in its artifacts
+    _cacheable_predictions: t.ClassVar[bool] = False
+    # Fields which don't change the outputs, left out of the cache key
+    _cache_ignore: t.ClassVar[t.Sequence[str]] = (
+        'uuid',
+        'upstream',
+        'plugins',
+        'compute_kwargs',
+        'validation',
+        'metric_values',
+        'num_workers',
+        'cache_predictions',
+        'trainer',
+    )
     signature: Signature = '*args,**kwargs'
     datatype: EncoderArg = None
     output_schema: t.Optional[Schema] = None
@@ -500,6 +589,7 @@ class Model(Component, metaclass=ModelMeta):
     validation: t.Optional[Validation] = None
     metric_values: t.Dict = dc.field(default_factory=dict)
     num_workers: int = 0
+    cache_predictions: bool = False
 
     def __post_init__(self, db, artifacts):
         super().__post_init__(db, artifacts)
@@ -510,6 +600,24 @@ class Model(Component, metaclass=ModelMeta):
         self._is_initialized = False
         if not self.identifier:
             raise Exception('_Predictor identifier must be non-empty')
+        if self.cache_predictions and not self._cacheable_predictions:
+            raise ValueError(
+                f'{type(self).__name__} does not support cache_predictions; '
+                'only API and LLM models do'
+            )
+
+    def cleanup(self, db: 'Datalayer'):
+        """Remove the training checkpoints with the last version of the model.
+
+        :param db: Datalayer instance.
+        """
+        from superduper.components.training import (
+            checkpoint_identifier,
+            remove_checkpoints,
+        )
+
+        if len(db.show('model', self.identifier)) <= 1:
+            remove_checkpoints(db, checkpoint_identifier(self.identifier))
 
     def jobs(self, db: 'Datalayer'):
         """List jobs ids related to the model."""
@@ -723,28 +831,40 @@ class Model(Component, metaclass=ModelMeta):
     ):
         X_data: t.Any
         mapping = Mapping(X, self.signature)
+        # Only fetch, and decode, the fields which the model reads
         if in_memory:
             if db is None:
                 raise ValueError('db cannot be None')
-            docs = list(db.execute(select.select_using_ids(ids)))
-            X_data = list(map(lambda x: mapping(x), docs))
+            query = select.select_using_ids(ids).select_using_keys(mapping.keys)
+            docs = list(db.execute(query))
+            if len(docs) > len(ids):
+                raise Exception(
+                    'You\'ve specified more documents than unique ids;'
+                    f' Is it possible that {select.table_or_collection.primary_id}'
+                    f' isn\'t uniquely identifying?'
+                )
+            # Align the documents with the ids, without those deleted since
+            # the ids were listed
+            primary_id = select.primary_id
+            docs_by_id = {str(doc[primary_id]): doc for doc in docs}
+            ids = [id for id in ids if str(id) in docs_by_id]
+            X_data = mapping.map_many([docs_by_id[str(id)] for id in ids])
         else:
-            X_data = QueryDataset(
-                select=select,
+            # Documents deleted since the ids were listed are skipped
+            existing = {
+                str(r[select.primary_id])
+                for r in db.execute(select.select_using_ids(ids).select_ids)
+            }
+            ids = [id for id in ids if str(id) in existing]
+            X_data = CachedQueryDataset(
+                select=select.select_using_keys(mapping.keys),
                 ids=ids,
                 fold=None,
                 db=db,
                 in_memory=False,
                 mapping=mapping,
             )
-
-        if len(X_data) > len(ids):
-            raise Exception(
-                'You\'ve specified more documents than unique ids;'
-                f' Is it possible that {select.table_or_collection.primary_id}'
-                f' isn\'t uniquely identifying?'
-            )
-        return X_data, mapping
+        return X_data, mapping, ids
 
     @staticmethod
     def handle_input_type(data, signature):
@@ -797,15 +917,17 @@ class Model(Component, metaclass=ModelMeta):
                 it += 1
             return
 
-        dataset, mapping = self._prepare_inputs_from_select(
+        dataset, mapping, ids = self._prepare_inputs_from_select(
             X=X,
             db=db,
             select=select,
             ids=ids,
             in_memory=in_memory,
         )
+        if not ids:
+            return
 
-        outputs = self.predict_batches(dataset)
+        outputs = self._predict_batches_with_cache(dataset)
         self._infer_auto_schema(outputs, predict_id)
         # TODO implement this so that we can toggle between different ibis/ mongodb
         outputs = self.encode_outputs(outputs)
@@ -831,6 +953,46 @@ class Model(Component, metaclass=ModelMeta):
             else:
                 update.execute(db=db)
 
+    @property
+    def _prediction_namespace(self) -> str:
+        # Independent of the version, so that re-created models hit the cache
+        cls = type(self)
+        config = {'class': f'{cls.__module__}.{cls.__qualname__}'}
+        for f in dc.fields(self):
+            if f.name not in self._cache_ignore:
+                config[f.name] = _cache_config_value(getattr(self, f.name))
+        return json.dumps(config, sort_keys=True, default=str)
+
+    def _predict_batches_with_cache(
+        self, dataset: t.Union[t.List, QueryDataset]
+    ) -> t.List:
+        if not self.cache_predictions:
+            return self.predict_batches(dataset)
+
+        from superduper import CFG
+
+        cfg = CFG.prediction_cache
+        cache = get_prediction_cache(cfg.path, cfg.ttl, cfg.max_entries)
+        items = [dataset[i] for i in range(len(dataset))]
+        try:
+            namespace = self._prediction_namespace
+            keys = [cache.key(namespace, item) for item in items]
+        except Exception as e:
+            logging.warn(f'Not caching predictions of {self.identifier}: {e}')
+            return self.predict_batches(dataset)
+
+        found = cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        logging.info(
+            f'Found {len(items) - len(missing)}/{len(items)} cached predictions'
+        )
+        if missing:
+            outputs = self.predict_batches([items[i] for i in missing])
+            computed = {keys[i]: output for i, output in zip(missing, outputs)}
+            cache.put_many(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
     def encode_outputs(self, outputs):
         """Method that encodes outputs of a model for saving in the database.
 
@@ -1059,22 +1221,34 @@ class Model(Component, metaclass=ModelMeta):
         )
         return listener
 
-    def validate(self, key, dataset: Dataset, metrics: t.Sequence[Metric]):
+    def validate(
+        self,
+        key,
+        dataset: Dataset,
+        metrics: t.Sequence[Metric],
+        chunk_size: int = 1000,
+    ):
         """Validate `dataset` on metrics.
 
+        The dataset is predicted chunk by chunk, and each chunk is added to
+        the state of the metrics, so that only one chunk is held in memory
+        for incremental metrics.
+
         :param key: Define input map
         :param dataset: Dataset to run validation on.
         :param metrics: Metrics for performing validation
+        :param chunk_size: Number of documents predicted at a time.
         """
         mapping1 = Mapping(key[0], self.signature)
         mapping2 = Mapping(key[1], 'singleton')
-        inputs = [mapping1(r) for r in dataset.data]
-        predictions = self.predict_batches(inputs)
-        targets = [mapping2(r) for r in dataset.data]
-        results = {}
-        for m in metrics:
-            results[m.identifier] = m(predictions, targets)
-        return results
+        states = [m.init_state() for m in metrics]
+        for chunk in dataset.iter_chunks(chunk_size):
+            predictions = self.predict_batches(mapping1.map_many(chunk))
+            targets = mapping2.map_many(chunk)
+            states = [
+                m.update(s, predictions, targets) for m, s in zip(metrics, states)
+            ]
+        return {m.identifier: m.compute(s) for m, s in zip(metrics, states)}
 
     def validate_in_db_job(self, db, dependencies: t.Sequence[str] = ()):
         """Perform a validation job.
@@ -1240,10 +1414,25 @@ class APIBaseModel(Model):
 
     :param model: The Model to use, e.g. ``'text-embedding-ada-002'``
     :param max_batch_size: Maximum  batch size.
+    :param max_concurrency: Maximum number of requests in flight.
+    :param requests_per_minute: Maximum number of requests per minute.
+    :param tokens_per_minute: Maximum number of tokens per minute.
     """
 
     model: t.Optional[str] = None
     max_batch_size: int = 8
+    max_concurrency: int = 8
+    requests_per_minute: t.Optional[int] = None
+    tokens_per_minute: t.Optional[int] = None
+
+    _cacheable_predictions: t.ClassVar[bool] = True
+    _cache_ignore: t.ClassVar[t.Sequence[str]] = (
+        *Model._cache_ignore,
+        'max_batch_size',
+        'max_concurrency',
+        'requests_per_minute',
+        'tokens_per_minute',
+    )
 
     def __post_init__(self, db, artifacts):
         super().__post_init__(db, artifacts)
@@ -1251,24 +1440,51 @@ class APIBaseModel(Model):
             assert self.identifier is not None
             self.model = self.identifier
 
+    @property
+    def engine(self) -> RequestEngine:
+        """The engine running concurrent requests within the rate limits."""
+        # The engine isn't kept on the model, which stays copyable and picklable
+        return shared_engine(
+            f'api-model:{type(self).__qualname__}:{self.identifier}',
+            max_concurrency=self.max_concurrency,
+            requests_per_minute=self.requests_per_minute,
+            tokens_per_minute=self.tokens_per_minute,
+        )
+
+    def _count_tokens(self, item: t.Any) -> int:
+        """Estimate the number of tokens sent with a request.
+
+        :param item: The item, or batch of items, of the request.
+        """
+        if isinstance(item, str):
+            # Roughly 4 characters per token for english text
+            return len(item) // 4 + 1
+        if isinstance(item, (list, tuple)):
+            return sum(self._count_tokens(x) for x in item)
+        if isinstance(item, dict):
+            return sum(self._count_tokens(x) for x in item.values())
+        return 0
+
+    def _concurrent_map(self, function: t.Callable, items: t.Iterable) -> t.List:
+        """Call ``function`` on each item concurrently, keeping the order.
+
+        :param function: Function making the request for an item.
+        :param items: Items, or batches of items, to request.
+        """
+        return self.engine.map(function, items, cost=self._count_tokens)
+
     @ensure_initialized
     def _multi_predict(
         self, dataset: t.Union[t.List, QueryDataset], *args, **kwargs
     ) -> t.List:
-        """Use multi-threading to predict on a series of data points.
+        """Predict concurrently on a series of data points.
 
         :param dataset: Series of data points.
         """
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.max_batch_size
-        ) as executor:
-            results = list(
-                executor.map(
-                    lambda x: self.predict(x, *args, **kwargs),
-                    dataset,  # type: ignore[arg-type]
-                )
-            )
-        return results
+        return self._concurrent_map(
+            lambda x: self.predict(x, *args, **kwargs),
+            [dataset[i] for i in range(len(dataset))],
+        )
 
 
 class APIModel(APIBaseModel):
@@ -1312,7 +1528,8 @@ class APIModel(APIBaseModel):
         :param kwargs: Keyword arguments to predict on.
         """
         runtime_params = self.inputs(*args, **kwargs)
-        out = requests.get(self.build_url(params=runtime_params)).json()
+        url = self.build_url(params=runtime_params)
+        out = http_session.request('get', url).json()
         if self.postprocess is not None:
             out = self.postprocess(out)
         return out
@@ -1427,3 +1644,85 @@ class SequentialModel(Model):
             else:
                 out = p.predict_batches(out)
         return out
+
+
+class BatchedModel(Model):
+    """Model which serves concurrent single predictions in batches.
+
+    Calls of ``predict`` from concurrent threads (for example, one per
+    ``like`` query) are queued for up to ``max_latency`` seconds or until
+    ``max_batch_size`` of them are waiting, and are then computed with a
+    single ``predict_batches`` call of the wrapped model.
+
+    :param model: The model whose predictions are batched.
+    :param max_batch_size: Maximum number of inputs per batch.
+    :param max_latency: Maximum time in seconds an input waits for a batch.
+    """
+
+    model: Model
+    max_batch_size: int = 32
+    max_latency: float = 0.01
+
+    def __post_init__(self, db, artifacts):
+        self.signature = self.model.signature
+        self.datatype = self.model.datatype
+        self.output_schema = self.model.output_schema
+        self.flatten = self.model.flatten
+        super().__post_init__(db, artifacts)
+        self._batcher: t.Optional[MicroBatcher] = None
+
+    @property
+    def inputs(self) -> Inputs:
+        """Instance of `Inputs` to represent model params."""
+        return self.model.inputs
+
+    @property
+    def batcher(self) -> MicroBatcher:
+        """The batcher which groups concurrent predictions."""
+        if self._batcher is None:
+            self._batcher = MicroBatcher(
+                self.model.predict_batches,
+                max_batch_size=self.max_batch_size,
+                max_latency=self.max_latency,
+                name=f'batched-model:{self.identifier}',
+            )
+        return self._batcher
+
+    def post_create(self, db: Datalayer):
+        """Post create hook.
+
+        :param db: Datalayer instance.
+        """
+        self.model.post_create(db)
+        super().post_create(db)
+
+    def _to_item(self, args, kwargs):
+        if self.signature == 'singleton':
+            if args:
+                assert len(args) == 1 and not kwargs
+                return args[0]
+            assert len(kwargs) == 1
+            return next(iter(kwargs.values()))
+        if self.signature == '*args':
+            return (*args, *kwargs.values())
+        if self.signature == '**kwargs':
+            return {**self.inputs.get_kwargs(args), **kwargs}
+        return args, kwargs
+
+    def predict(self, *args, **kwargs):
+        """Predict on a single data point.
+
+        The data point is queued and computed together with other
+        concurrent predictions.
+
+        :param args: Positional arguments to predict on.
+        :param kwargs: Keyword arguments to predict on.
+        """
+        return self.batcher(self._to_item(args, kwargs))
+
+    def predict_batches(self, dataset: t.Union[t.List, QueryDataset]) -> t.List:
+        """Execute on series of data point defined in dataset.
+
+        :param dataset: Series of data point to predict on.
+        """
+        return self.model.predict_batches(dataset)
@@ -5,6 +5,7 @@ from overrides import override
 
 from superduper.components.component import Component
 from superduper.components.datatype import DataType
+from superduper.misc.hash import hash_many
 from superduper.misc.reference import parse_reference
 from superduper.misc.special_dicts import SuperDuperFlatEncode
 
@@ -81,35 +82,68 @@ class Schema(Component):
         :param builds: Builds.
         :param blobs: Blobs.
         :param files: Files.
+        :param leaves_to_keep: Types of values which are not encoded.
         """
+        return self.encode_many(
+            [out], [builds], [blobs], [files], leaves_to_keep=leaves_to_keep
+        )[0]
+
+    def encode_many(
+        self,
+        outs: t.Sequence[t.Dict],
+        builds: t.Sequence[t.Dict],
+        blobs: t.Sequence[t.Dict],
+        files: t.Sequence[t.Dict],
+        leaves_to_keep: t.Sequence = (),
+    ) -> t.List[t.Dict]:
+        """Encode the data of several documents, column by column.
+
+        Each field is encoded with the ``encode_many`` method of its datatype.
+
+        :param outs: Data of the documents to encode.
+        :param builds: Builds of each document.
+        :param blobs: Blobs of each document.
+        :param files: Files of each document.
+        :param leaves_to_keep: Types of values which are not encoded.
+        """
+        artifacts = []
         for k, field in self.fields.items():
             if not isinstance(field, DataType):
                 continue
 
-            if k not in out:
-                continue
-
-            if isinstance(out[k], leaves_to_keep):
+            rows = [
+                i
+                for i, out in enumerate(outs)
+                if k in out and not isinstance(out[k], leaves_to_keep)
+            ]
+            if not rows:
                 continue
 
-            data, identifier = field.encode_data_with_identifier(out[k])
-            if field.encodable_cls.artifact:
-                reference = field.encodable_cls.build_reference(identifier, data)
-                ref_obj = parse_reference(reference)
-
-                if ref_obj.name == 'blob':
-                    blobs[identifier] = data
-                elif ref_obj.name == 'file':
-                    files[identifier] = data
+            datas = field.encode_many([outs[i][k] for i in rows])
+            for i, data in zip(rows, datas):
+                if field.encodable_cls.artifact:
+                    artifacts.append((i, k, field, data))
                 else:
-                    assert False, f'Unknown reference type {ref_obj.name}'
-                out[k] = reference
+                    outs[i][k] = data
+
+        # Only artifacts need the hash, as the id of their reference
+        identifiers = hash_many([data for _, _, _, data in artifacts])
+        for (i, k, field, data), identifier in zip(artifacts, identifiers):
+            reference = field.encodable_cls.build_reference(identifier, data)
+            ref_obj = parse_reference(reference)
+
+            if ref_obj.name == 'blob':
+                blobs[i][identifier] = data
+            elif ref_obj.name == 'file':
+                files[i][identifier] = data
             else:
-                out[k] = data
+                assert False, f'Unknown reference type {ref_obj.name}'
+            outs[i][k] = reference
 
-        out['_schema'] = self.identifier
+        for out in outs:
+            out['_schema'] = self.identifier
 
-        return out
+        return list(outs)
 
     def __call__(self, data: dict[str, t.Any]) -> dict[str, t.Any]:
         """Encode data using the schema's encoders.
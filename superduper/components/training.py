@@ -1,8 +1,17 @@
+import concurrent.futures
+import os
+import pickle
+import shutil
+import tempfile
 import typing as t
 
+from superduper import logging
 from superduper.components.component import Component
 from superduper.components.datatype import DataType, file_lazy
 
+if t.TYPE_CHECKING:
+    from superduper.base.datalayer import Datalayer
+
 
 class Checkpoint(Component):
     """Checkpoint component for saving the model checkpoint.
@@ -19,3 +28,131 @@ class Checkpoint(Component):
     def __post_init__(self, db, artifacts):
         super().__post_init__(db, artifacts)
         self.version = int(self.step)
+
+
+def checkpoint_identifier(model: str) -> str:
+    """Identifier of the training checkpoints of a model.
+
+    :param model: The identifier of the model.
+    """
+    return f'{model}-checkpoint'
+
+
+def remove_checkpoints(db: 'Datalayer', identifier: str):
+    """Remove all the versions of a checkpoint, and their files.
+
+    :param db: The datalayer holding the checkpoints.
+    :param identifier: The identifier of the checkpoints.
+    """
+    for version in db.show('checkpoint', identifier) or []:
+        db.remove('checkpoint', identifier, version, force=True)
+
+
+class AsyncCheckpointer:
+    """Write training checkpoints to the datalayer in a background thread.
+
+    ``save`` only blocks while the caller snapshots the state; snapshots are
+    serialized, uploaded and registered as the version ``step`` of a
+    ``Checkpoint`` in a single writer thread, in order. Checkpoints stored
+    before a crash thus stay referenced by the metadata store. Only the
+    ``keep`` most recent checkpoints are kept.
+
+    :param db: The datalayer receiving the checkpoints.
+    :param identifier: The identifier of the ``Checkpoint`` components.
+    :param keep: Number of most recent checkpoints to keep.
+    :param serializer: Function converting a snapshot into bytes.
+    :param deserializer: Function converting bytes back into a snapshot.
+    :param max_pending: Number of snapshots waiting to be written after which
+                        ``save`` blocks, bounding the memory used by snapshots.
+    :param replace_previous: Remove the checkpoints of previous runs once the
+                             first checkpoint of this one is stored.
+    """
+
+    def __init__(
+        self,
+        db: 'Datalayer',
+        identifier: str,
+        keep: int = 3,
+        serializer: t.Callable[[t.Any], bytes] = pickle.dumps,
+        deserializer: t.Callable[[bytes], t.Any] = pickle.loads,
+        max_pending: int = 1,
+        replace_previous: bool = False,
+    ):
+        self.db = db
+        self.identifier = identifier
+        self.keep = max(keep, 1)
+        self.serializer = serializer
+        self.deserializer = deserializer
+        self.max_pending = max(max_pending, 1)
+        self.replace_previous = replace_previous
+        self.checkpoints: t.List[int] = []
+        self._futures: t.List[concurrent.futures.Future] = []
+        self._dir = tempfile.mkdtemp(prefix='superduper-checkpoint-')
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='superduper-checkpoint'
+        )
+
+    def save(self, step: int, snapshot: t.Any) -> concurrent.futures.Future:
+        """Queue a snapshot to be written as the checkpoint of ``step``.
+
+        :param step: The training step of the snapshot.
+        :param snapshot: The state to save, which mustn't be modified afterwards.
+        """
+        while self._futures and (
+            self._futures[0].done() or len(self._futures) >= self.max_pending
+        ):
+            self._futures.pop(0).result()
+        future = self._executor.submit(self._write, step, snapshot)
+        self._futures.append(future)
+        return future
+
+    def _write(self, step: int, snapshot: t.Any):
+        path = os.path.join(self._dir, f'checkpoint-{step}')
+        with open(path, 'wb') as f:
+            f.write(self.serializer(snapshot))
+        try:
+            if self.replace_previous and not self.checkpoints:
+                remove_checkpoints(self.db, self.identifier)
+            elif step in self.db.show('checkpoint', self.identifier):
+                self.db.remove('checkpoint', self.identifier, step, force=True)
+            self.db.apply(Checkpoint(identifier=self.identifier, path=path, step=step))
+        finally:
+            os.remove(path)
+        self.checkpoints.append(step)
+        logging.info(f'Saved checkpoint {self.identifier} of step {step}')
+        while len(self.checkpoints) > self.keep:
+            old = self.checkpoints.pop(0)
+            self.db.remove('checkpoint', self.identifier, old, force=True)
+
+    def wait(self):
+        """Wait until all queued checkpoints are written and stored."""
+        while self._futures:
+            self._futures.pop(0).result()
+
+    def load(self, step: t.Optional[int] = None) -> t.Any:
+        """Load a checkpoint.
+
+        :param step: The step of the checkpoint, defaults to the latest one.
+        """
+        self.wait()
+        for s in reversed(self.checkpoints):
+            if step is None or s == step:
+                checkpoint = self.db.load('checkpoint', self.identifier, version=s)
+                checkpoint.init()
+                with open(checkpoint.path, 'rb') as f:
+                    return self.deserializer(f.read())
+        raise FileNotFoundError(f'No checkpoint found for step {step}')
+
+    def clear(self):
+        """Remove the checkpoints, including those of previous runs."""
+        self.wait()
+        remove_checkpoints(self.db, self.identifier)
+        self.checkpoints = []
+
+    def close(self):
+        """Wait for the queued checkpoints and stop the writer thread."""
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
+            shutil.rmtree(self._dir, ignore_errors=True)
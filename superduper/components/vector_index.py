@@ -325,6 +325,13 @@ class EncodeArray:
             raise TypeError(f'dtype was {x.dtype}, expected {self.dtype}')
         return memoryview(x).tobytes()
 
+    def encode_many(self, xs: t.Sequence) -> t.List[bytes]:
+        """Encode the arrays of several rows.
+
+        :param xs: The arrays to encode
+        """
+        return [self(x) for x in xs]
+
 
 class DecodeArray:
     """Class to decode an array.
@@ -343,6 +350,16 @@ class DecodeArray:
         """
         return np.frombuffer(bytes, dtype=self.dtype).tolist()
 
+    def decode_many(self, blobs: t.Sequence) -> t.List:
+        """Decode the arrays of several rows, with a single buffer conversion.
+
+        :param blobs: The bytes of the rows
+        """
+        if len({len(b) for b in blobs}) != 1:
+            return [self(b) for b in blobs]
+        array = np.frombuffer(b''.join(blobs), dtype=self.dtype)
+        return array.reshape(len(blobs), -1).tolist()
+
 
 @component(
     {'name': 'shape', 'type': 'int'},
@@ -93,4 +93,6 @@ class AnthropicCompletions(Anthropic):
 
         :param dataset: The dataset to predict the embeddings of.
         """
-        return [self.predict(dataset[i]) for i in range(len(dataset))]
+        return self._concurrent_map(
+            self.predict, [dataset[i] for i in range(len(dataset))]
+        )
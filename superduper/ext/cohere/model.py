@@ -2,7 +2,6 @@ import dataclasses as dc
 import typing as t
 
 import cohere
-import tqdm
 from cohere.error import CohereAPIError, CohereConnectionError
 
 from superduper.backends.ibis.data_backend import IbisDataBackend
@@ -30,6 +29,14 @@ class Cohere(APIBaseModel):
     def __post_init__(self, db, artifacts):
         super().__post_init__(db, artifacts)
         self.identifier = self.identifier or self.model
+        self._client: t.Optional[cohere.Client] = None
+
+    @property
+    def client(self) -> cohere.Client:
+        """The client, shared by all requests of the model."""
+        if self._client is None:
+            self._client = cohere.Client(get_key(KEY_NAME), **self.client_kwargs)
+        return self._client
 
 
 class CohereEmbed(Cohere):
@@ -70,14 +77,14 @@ class CohereEmbed(Cohere):
 
         :param X: The text to predict the embedding of.
         """
-        client = cohere.Client(get_key(KEY_NAME), **self.client_kwargs)
-        e = client.embed(texts=[X], model=self.identifier, **self.predict_kwargs)
+        e = self.client.embed(texts=[X], model=self.identifier, **self.predict_kwargs)
         return e.embeddings[0]
 
     @retry
     def _predict_a_batch(self, texts: t.List[str]):
-        client = cohere.Client(get_key(KEY_NAME), **self.client_kwargs)
-        out = client.embed(texts=texts, model=self.identifier, **self.predict_kwargs)
+        out = self.client.embed(
+            texts=texts, model=self.identifier, **self.predict_kwargs
+        )
         return [r for r in out.embeddings]
 
     def predict_batches(self, dataset: t.Union[t.List, QueryDataset]) -> t.List:
@@ -85,14 +92,12 @@ class CohereEmbed(Cohere):
 
         :param dataset: The dataset to predict the embeddings of.
         """
-        out = []
-        for i in tqdm.tqdm(range(0, len(dataset), self.batch_size)):
-            out.extend(
-                self._predict_a_batch(
-                    dataset[i : i + self.batch_size], **self.predict_kwargs
-                )
-            )
-        return out
+        batches = [
+            [dataset[j] for j in range(i, min(len(dataset), i + self.batch_size))]
+            for i in range(0, len(dataset), self.batch_size)
+        ]
+        out = self._concurrent_map(self._predict_a_batch, batches)
+        return [e for batch in out for e in batch]
 
 
 class CohereGenerate(Cohere):
@@ -127,16 +132,16 @@ class CohereGenerate(Cohere):
         """
         if context is not None:
             prompt = format_prompt(prompt, self.prompt, context=context)
-        client = cohere.Client(get_key(KEY_NAME), **self.client_kwargs)
-        resp = client.generate(
+        resp = self.client.generate(
             prompt=prompt, model=self.identifier, **self.predict_kwargs
         )
         return resp.generations[0].text
 
-    @retry
     def predict_batches(self, dataset: t.Union[t.List, QueryDataset]) -> t.List:
         """Predict the generations of a dataset.
 
         :param dataset: The dataset to predict the generations of.
         """
-        return [self.predict(dataset[i]) for i in range(len(dataset))]
+        return self._concurrent_map(
+            self.predict, [dataset[i] for i in range(len(dataset))]
+        )
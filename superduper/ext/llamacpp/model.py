@@ -2,25 +2,26 @@ import dataclasses as dc
 import os
 import typing as t
 
-import requests
 from llama_cpp import Llama
 
 from superduper.ext.llm.model import BaseLLM
+from superduper.misc import http_session
 
 
-# TODO use core downloader already implemented
 def download_uri(uri, save_path):
     """Download file.
 
+    The file is streamed to disk, and an interrupted download is resumed.
+
     :param uri: URI to download
     :param save_path: place to save
     """
-    response = requests.get(uri)
-    if response.status_code == 200:
-        with open(save_path, 'wb') as file:
-            file.write(response.content)
-    else:
-        raise Exception(f"Error while downloading uri {uri}")
+    if os.path.exists(save_path):
+        return
+    try:
+        http_session.download(uri, save_path)
+    except Exception as e:
+        raise Exception(f"Error while downloading uri {uri}") from e
 
 
 class LlamaCpp(BaseLLM):
@@ -67,12 +68,20 @@ class LlamaCpp(BaseLLM):
 class LlamaCppEmbedding(LlamaCpp):
     """Llama.cpp connector for embeddings."""
 
-    def _generate(self, prompt: str, **kwargs) -> str:
+    def _generate(self, prompt: str, **kwargs) -> t.List[float]:
         """Generate embedding from a prompt.
 
         :param prompt: The prompt to generate the embedding from.
         :param kwargs: The keyword arguments to pass to the llm model.
         """
-        return self._model.create_embedding(
-            prompt, embedding=True, **self.predict_kwargs, **kwargs
-        )
+        return self._generate_batch([prompt], **kwargs)[0]
+
+    def _generate_batch(self, prompts: t.List[str], **kwargs) -> t.List:
+        """Generate embeddings from a batch of prompts in a single call.
+
+        :param prompts: The prompts to generate the embeddings from.
+        :param kwargs: The keyword arguments to pass to the llm model.
+        """
+        out = self._model.create_embedding(prompts, **self.predict_kwargs, **kwargs)
+        data = sorted(out['data'], key=lambda r: r['index'])
+        return [r['embedding'] for r in data]
@@ -31,6 +31,8 @@ class BaseLLM(Model):
     max_batch_size: t.Optional[int] = 4
     signature: str = 'singleton'
 
+    _cacheable_predictions: t.ClassVar[bool] = True
+
     def __post_init__(self, db, artifacts):
         super().__post_init__(db, artifacts)
         self.takes_context = True
@@ -54,16 +56,45 @@ class BaseLLM(Model):
     def _generate(self, prompt: str, **kwargs: t.Any):
         raise NotImplementedError
 
-    def _batch_generate(self, prompts: t.List[str], **kwargs) -> t.List[str]:
-        """Base method to batch generate text from a list of prompts.
+    def _generate_batch(self, prompts: t.List[str], **kwargs) -> t.List:
+        """Generate text from a batch of prompts of similar length.
 
         If the model can run batch generation efficiently, pls override this method.
 
+        :param prompts: The list of prompts to generate text from.
+        :param kwargs: The keyword arguments to pass to the llm model.
+        """
+        return [self._generate(prompt, **kwargs) for prompt in prompts]
+
+    def _iter_batch_generate(self, prompts: t.List[str], **kwargs) -> t.Iterator:
+        """Generate text from prompts, yielding the outputs in input order.
+
+        Prompts are sorted by length and submitted in batches of
+        ``max_batch_size``, so that each batch needs little padding.
+
+        :param prompts: The list of prompts to generate text from.
+        :param kwargs: The keyword arguments to pass to the llm model.
+        """
+        batch_size = self.max_batch_size or len(prompts) or 1
+        order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+        done: t.Dict[int, t.Any] = {}
+        position = 0
+        for i in range(0, len(order), batch_size):
+            batch = order[i : i + batch_size]
+            outputs = self._generate_batch([prompts[j] for j in batch], **kwargs)
+            done.update(zip(batch, outputs))
+            while position in done:
+                yield done.pop(position)
+                position += 1
+
+    def _batch_generate(self, prompts: t.List[str], **kwargs) -> t.List[str]:
+        """Base method to batch generate text from a list of prompts.
+
         :param prompts: The list of prompts to generate text from.
         :param kwargs: The keyword arguments to pass to the prompt function and
                         the llm model.
         """
-        return [self._generate(prompt, **self.predict_kwargs) for prompt in prompts]
+        return list(self._iter_batch_generate(prompts, **kwargs))
 
     @ensure_initialized
     def predict(self, X: t.Union[str, dict[str, str]], context=None, **kwargs):
@@ -92,6 +123,20 @@ class BaseLLM(Model):
         kwargs.pop("context", None)
         return self._batch_generate(xs, **kwargs)
 
+    @ensure_initialized
+    def stream_batches(
+        self, dataset: t.Union[t.List, QueryDataset], **kwargs
+    ) -> t.Iterator:
+        """Generate text from a dataset, yielding the outputs in order.
+
+        :param dataset: The dataset to generate text from.
+        :param kwargs: The keyword arguments to pass to the prompt function and
+                        the llm model.
+        """
+        xs = [self.prompter(dataset[i], **kwargs) for i in range(len(dataset))]
+        kwargs.pop("context", None)
+        return self._iter_batch_generate(xs, **kwargs)
+
     def get_kwargs(self, func: t.Callable, *kwargs_list):
         """Get kwargs and object attributes that are in the function signature.
 
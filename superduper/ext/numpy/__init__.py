@@ -1,7 +1,23 @@
 import typing as t
 
 from .encoder import array
+from .metric import (
+    Accuracy,
+    F1Score,
+    MeanAbsoluteError,
+    MeanSquaredError,
+    Precision,
+    Recall,
+)
 
 requirements: t.List = []
 
-__all__ = ['array']
+__all__ = [
+    'array',
+    'Accuracy',
+    'F1Score',
+    'MeanAbsoluteError',
+    'MeanSquaredError',
+    'Precision',
+    'Recall',
+]
@@ -1,3 +1,4 @@
+import struct
 import typing as t
 
 import numpy
@@ -6,6 +7,107 @@ from superduper.components.datatype import DataType, DataTypeFactory
 from superduper.ext.utils import str_shape
 from superduper.misc.annotations import component
 
+_MAGIC = b'\x93SDA'
+_HEADER = struct.Struct('<4sBB')
+_ALIGNMENT = 16
+
+
+def _header(dtype: numpy.dtype, shape: t.Sequence[int]) -> bytes:
+    # ``dtype.str`` carries the byte-order, e.g. '<f4'
+    dtype_str = dtype.str.encode()
+    header = (
+        _HEADER.pack(_MAGIC, len(shape), len(dtype_str))
+        + dtype_str
+        + struct.pack(f'<{len(shape)}q', *shape)
+    )
+    # Pad so that the data is aligned when decoded in place
+    return header + b'\x00' * (-len(header) % _ALIGNMENT)
+
+
+def _parse_header(data) -> t.Optional[t.Tuple[numpy.dtype, t.Tuple, int]]:
+    if len(data) < _HEADER.size or bytes(data[: len(_MAGIC)]) != _MAGIC:
+        return None
+    _, ndim, n = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    dtype = numpy.dtype(bytes(data[offset : offset + n]).decode())
+    offset += n
+    shape = struct.unpack_from(f'<{ndim}q', data, offset)
+    offset += 8 * ndim
+    return dtype, shape, offset + (-offset % _ALIGNMENT)
+
+
+def encode_array(x: numpy.ndarray, header: t.Optional[bytes] = None) -> bytes:
+    """Encode an array to bytes, with a header for its dtype and shape.
+
+    The data of a contiguous array is written to the output without
+    intermediate copies.
+
+    :param x: The array to encode.
+    :param header: A header computed for the dtype and shape of ``x``.
+    """
+    x = numpy.asarray(x)
+    if not x.flags.c_contiguous:
+        x = numpy.ascontiguousarray(x)
+    if header is None:
+        header = _header(x.dtype, x.shape)
+    return b''.join((header, memoryview(x).cast('B')))
+
+
+def decode_array(data, dtype=None, shape=None) -> numpy.ndarray:
+    """Decode an array from bytes, as a read-only view of the bytes.
+
+    Bytes without a header, written by earlier versions, are decoded with
+    ``dtype`` and ``shape``.
+
+    :param data: The bytes to decode.
+    :param dtype: The dtype of bytes without a header.
+    :param shape: The shape of bytes without a header.
+    """
+    parsed = _parse_header(data)
+    if parsed is None:
+        array = numpy.frombuffer(data, dtype=dtype)
+        return array.reshape(shape) if shape is not None else array
+    dtype, shape, offset = parsed
+    count = int(numpy.prod(shape)) if shape else 1
+    return numpy.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(
+        shape
+    )
+
+
+def _decode_joined(blobs: t.Sequence, dtype, shape) -> t.Optional[numpy.ndarray]:
+    # Rows sharing a header (or legacy rows of a fixed shape) are joined
+    # and decoded at once, into a new writable buffer
+    parsed = _parse_header(blobs[0])
+    if parsed is not None:
+        offset = parsed[2]
+        header = bytes(blobs[0][:offset])
+        if all(bytes(b[:offset]) == header for b in blobs[1:]):
+            data = bytearray().join(memoryview(b)[offset:] for b in blobs)
+            return numpy.frombuffer(data, dtype=parsed[0]).reshape(
+                (len(blobs), *parsed[1])
+            )
+    elif shape is not None and all(_parse_header(b) is None for b in blobs[1:]):
+        data = bytearray().join(blobs)
+        return numpy.frombuffer(data, dtype=dtype).reshape((len(blobs), *shape))
+    return None
+
+
+def decode_arrays(blobs: t.Sequence, dtype=None, shape=None) -> numpy.ndarray:
+    """Decode the arrays of several rows into a single stacked array.
+
+    When all rows share a header, the data is joined and decoded at once.
+
+    :param blobs: The bytes of the rows.
+    :param dtype: The dtype of bytes without a header.
+    :param shape: The shape of bytes without a header.
+    """
+    if not blobs:
+        return numpy.empty((0, *(shape or ())), dtype=dtype)
+    array = _decode_joined(blobs, dtype, shape)
+    if array is None:
+        array = numpy.stack([decode_array(b, dtype=dtype, shape=shape) for b in blobs])
+    return array
+
 
 class EncodeArray:
     """Encode a numpy array to bytes.
@@ -24,12 +126,31 @@ class EncodeArray:
         """
         if x.dtype != self.dtype:
             raise TypeError(f'dtype was {x.dtype}, expected {self.dtype}')
-        return memoryview(x).tobytes()
+        return encode_array(x)
+
+    def encode_many(self, xs: t.Sequence[numpy.ndarray]) -> t.List[bytes]:
+        """Encode the arrays of several rows to bytes.
+
+        :param xs: The numpy arrays.
+        """
+        headers: t.Dict = {}
+        out = []
+        for x in xs:
+            if x.dtype != self.dtype:
+                raise TypeError(f'dtype was {x.dtype}, expected {self.dtype}')
+            key = (x.dtype, x.shape)
+            if key not in headers:
+                headers[key] = _header(*key)
+            out.append(encode_array(x, header=headers[key]))
+        return out
 
 
 class DecodeArray:
     """Decode a numpy array from bytes.
 
+    The shape is read from the header of the bytes, so arrays of any shape
+    round-trip; ``shape`` is only used for bytes without a header.
+
     :param dtype: The dtype of the array.
     :param shape: The shape of the array.
     """
@@ -44,13 +165,26 @@ class DecodeArray:
         :param bytes: The bytes to decode.
         :param info: The info of the encoding.
         """
-        return numpy.frombuffer(bytes, dtype=self.dtype).reshape(self.shape)
+        return decode_array(bytes, dtype=self.dtype, shape=self.shape)
+
+    def decode_many(self, blobs: t.Sequence, stack: bool = False):
+        """Decode the arrays of several rows.
+
+        :param blobs: The bytes of the rows.
+        :param stack: Return a single array stacking the rows.
+        """
+        if stack:
+            return decode_arrays(blobs, dtype=self.dtype, shape=self.shape)
+        array = _decode_joined(blobs, self.dtype, self.shape) if blobs else None
+        if array is None:
+            return [self(b) for b in blobs]
+        return list(array)
 
 
 @component()
 def array(
     dtype: str,
-    shape: t.Sequence,
+    shape: t.Optional[t.Sequence] = None,
     bytes_encoding: t.Optional[str] = None,
     encodable: str = 'encodable',
 ):
@@ -58,12 +192,12 @@ def array(
     Create an encoder of numpy arrays.
 
     :param dtype: The dtype of the array.
-    :param shape: The shape of the array.
+    :param shape: The shape of the array; ``None`` for arrays of any shape.
     :param bytes_encoding: The bytes encoding to use.
     :param encodable: The encodable to use.
     """
     return DataType(
-        identifier=f'numpy-{dtype}[{str_shape(shape)}]',
+        identifier=f'numpy-{dtype}[{str_shape(shape) if shape else "var"}]',
         encoder=EncodeArray(dtype),
         decoder=DecodeArray(dtype, shape),
         shape=shape,
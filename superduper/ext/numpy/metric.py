@@ -0,0 +1,166 @@
+import typing as t
+
+import numpy
+
+from superduper.components.metric import IncrementalMetric
+
+
+def _as_arrays(x, y):
+    x, y = numpy.asarray(x), numpy.asarray(y)
+    if x.shape != y.shape:
+        raise ValueError(f'Shape mismatch: {x.shape} != {y.shape}')
+    return x, y
+
+
+class Accuracy(IncrementalMetric):
+    """Fraction of predictions equal to the targets.
+
+    Multi-dimensional predictions, e.g. multilabel indicators, are correct
+    only if the whole row matches the target, as in ``accuracy_score``.
+
+    :param object: Unused; incremental metrics are computed by their methods.
+    """
+
+    def init_state(self):
+        """Return the number of correct predictions and of predictions."""
+        return 0, 0
+
+    def update(self, state, x, y):
+        """Add the counts of a chunk of data.
+
+        :param state: The current counts.
+        :param x: Chunk of predictions.
+        :param y: Chunk of targets.
+        """
+        x, y = _as_arrays(x, y)
+        correct = (x == y).all(axis=tuple(range(1, x.ndim)))
+        return state[0] + int(correct.sum()), state[1] + len(x)
+
+    def compute(self, state):
+        """Compute the accuracy.
+
+        :param state: The accumulated counts.
+        """
+        return state[0] / state[1] if state[1] else 0.0
+
+
+class _BinaryMetric(IncrementalMetric):
+    """Base of the metrics computed from a binary confusion matrix.
+
+    :param pos_label: The label of the positive class.
+    """
+
+    pos_label: t.Any = 1
+
+    def init_state(self):
+        """Return the true positive, false positive and false negative counts."""
+        return 0, 0, 0
+
+    def update(self, state, x, y):
+        """Add the confusion counts of a chunk of data.
+
+        :param state: The current counts.
+        :param x: Chunk of predictions.
+        :param y: Chunk of targets.
+        """
+        x, y = _as_arrays(x, y)
+        predicted, actual = x == self.pos_label, y == self.pos_label
+        return (
+            state[0] + int((predicted & actual).sum()),
+            state[1] + int((predicted & ~actual).sum()),
+            state[2] + int((~predicted & actual).sum()),
+        )
+
+
+class Precision(_BinaryMetric):
+    """Fraction of positive predictions which are correct.
+
+    :param pos_label: The label of the positive class.
+    """
+
+    def compute(self, state):
+        """Compute the precision.
+
+        :param state: The accumulated confusion counts.
+        """
+        tp, fp, _ = state
+        return tp / (tp + fp) if tp + fp else 0.0
+
+
+class Recall(_BinaryMetric):
+    """Fraction of positive targets which are predicted.
+
+    :param pos_label: The label of the positive class.
+    """
+
+    def compute(self, state):
+        """Compute the recall.
+
+        :param state: The accumulated confusion counts.
+        """
+        tp, _, fn = state
+        return tp / (tp + fn) if tp + fn else 0.0
+
+
+class F1Score(_BinaryMetric):
+    """Harmonic mean of precision and recall.
+
+    :param pos_label: The label of the positive class.
+    """
+
+    def compute(self, state):
+        """Compute the F1 score.
+
+        :param state: The accumulated confusion counts.
+        """
+        tp, fp, fn = state
+        return 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+
+
+class _MeanErrorMetric(IncrementalMetric):
+    """Base of the metrics averaging an error over all values."""
+
+    def init_state(self):
+        """Return the sum of the errors and the number of values."""
+        return 0.0, 0
+
+    def _error(self, x, y):
+        raise NotImplementedError
+
+    def update(self, state, x, y):
+        """Add the errors of a chunk of data.
+
+        :param state: The current sum and count.
+        :param x: Chunk of predictions.
+        :param y: Chunk of targets.
+        """
+        x, y = _as_arrays(x, y)
+        x, y = x.astype(numpy.float64), y.astype(numpy.float64)
+        return state[0] + float(self._error(x, y).sum()), state[1] + x.size
+
+    def compute(self, state):
+        """Compute the mean error.
+
+        :param state: The accumulated sum and count.
+        """
+        return state[0] / state[1] if state[1] else 0.0
+
+
+class MeanSquaredError(_MeanErrorMetric):
+    """Mean of the squared differences between predictions and targets.
+
+    :param object: Unused; incremental metrics are computed by their methods.
+    """
+
+    def _error(self, x, y):
+        return numpy.square(x - y)
+
+
+class MeanAbsoluteError(_MeanErrorMetric):
+    """Mean of the absolute differences between predictions and targets.
+
+    :param object: Unused; incremental metrics are computed by their methods.
+    """
+
+    def _error(self, x, y):
+        return numpy.abs(x - y)
@@ -4,8 +4,6 @@ import json
 import os
 import typing as t
 
-import requests
-import tqdm
 from httpx import ResponseNotRead
 from openai import (
     APITimeoutError,
@@ -22,6 +20,7 @@ from superduper.backends.query_dataset import QueryDataset
 from superduper.base.datalayer import Datalayer
 from superduper.components.model import APIBaseModel, Inputs
 from superduper.components.vector_index import sqlvector, vector
+from superduper.misc import http_session
 from superduper.misc.compat import cache
 from superduper.misc.retry import Retry
 
@@ -86,13 +85,12 @@ class _OpenAI(APIBaseModel):
 
         :param dataset: The dataset to predict on.
         """
-        out = []
-        for i in tqdm.tqdm(range(0, len(dataset), self.batch_size)):
-            batch = [
-                dataset[i] for i in range(i, min(len(dataset), i + self.batch_size))
-            ]
-            out.extend(self._predict_a_batch(batch))
-        return out
+        batches = [
+            [dataset[j] for j in range(i, min(len(dataset), i + self.batch_size))]
+            for i in range(0, len(dataset), self.batch_size)
+        ]
+        out = self._concurrent_map(self._predict_a_batch, batches)
+        return [r for batch in out for r in batch]
 
 
 class OpenAIEmbedding(_OpenAI):
@@ -210,13 +208,9 @@ class OpenAIChatCompletion(_OpenAI):
 
         :param dataset: The dataset of prompts.
         """
-        out = []
-        for i in range(len(dataset)):
-            args, kwargs = self.handle_input_type(
-                data=dataset[i], signature=self.signature
-            )
-            out.append(self.predict(*args, **kwargs))
-        return out
+        return self._concurrent_map(
+            self._wrapper, [dataset[i] for i in range(len(dataset))]
+        )
 
 
 class OpenAIImageCreation(_OpenAI):
@@ -274,20 +268,16 @@ class OpenAIImageCreation(_OpenAI):
                 .data[0]
                 .url
             )
-            return requests.get(url).content
+            return http_session.request('get', url).content
 
     def predict_batches(self, dataset: t.Union[t.List, QueryDataset]) -> t.List:
         """Generates images from text prompts.
 
         :param dataset: The dataset of text prompts.
         """
-        out = []
-        for i in range(len(dataset)):
-            args, kwargs = self.handle_input_type(
-                data=dataset[i], signature=self.signature
-            )
-            out.append(self.predict(*args, **kwargs))
-        return out
+        return self._concurrent_map(
+            self._wrapper, [dataset[i] for i in range(len(dataset))]
+        )
 
 
 class OpenAIImageEdit(_OpenAI):
@@ -364,7 +354,7 @@ class OpenAIImageEdit(_OpenAI):
                 .data[0]
                 .url
             )
-            out = requests.get(url).content
+            out = http_session.request('get', url).content
         return out
 
     def predict_batches(self, dataset: t.Union[t.List, QueryDataset]) -> t.List:
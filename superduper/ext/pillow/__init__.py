@@ -2,6 +2,6 @@ from superduper.misc.annotations import requires_packages
 
 _, requirements = requires_packages(['PIL', '10.2.0', None, 'pillow'])
 
-from .encoder import pil_image
+from .encoder import image_type, load_images, pil_image
 
-__all__ = ['pil_image']
+__all__ = ['image_type', 'load_images', 'pil_image']
@@ -1,4 +1,6 @@
+import concurrent.futures
 import io
+import struct
 import typing as t
 
 import PIL.Image
@@ -14,25 +16,115 @@ if t.TYPE_CHECKING:
 BLANK_IMAGE = PIL.Image.new('RGB', (600, 600), (255, 255, 255))
 
 
-def encode_pil_image(x, info: t.Optional[t.Dict] = None):
-    """Encode a `PIL.Image` to bytes.
+_RAW_MAGIC = b'SDRAW'
+_RAW_HEADER = struct.Struct('>BII')
+_FORMATS = {'png': 'PNG', 'jpeg': 'JPEG', 'jpg': 'JPEG', 'webp': 'WEBP', 'raw': 'RAW'}
 
-    :param x: The image to encode.
-    :param info: Additional information.
+
+def _is_loaded(x):
+    # ``PIL`` keeps the pixels in ``_im`` since 11.0, and in ``im`` before
+    if hasattr(x, '_im'):
+        return x._im is not None
+    return getattr(x, 'im', None) is not None
+
+
+class EncoderPILImage:
+    """Encoder to convert a `PIL.Image` to `bytes`.
+
+    Bytes are passed through unchanged, as are images opened from a file
+    of the same format which haven't been loaded (and so can't have been
+    modified).
+
+    :param format: The image format; one of 'png', 'jpeg', 'webp' or 'raw'.
+                   'raw' stores the uncompressed pixels, which is the fastest
+                   to encode and decode.
+    :param quality: The quality of lossy formats ('jpeg' and 'webp').
     """
-    buffer = io.BytesIO()
-    x.save(buffer, 'png')
-    return buffer.getvalue()
+
+    def __init__(self, format: str = 'png', quality: t.Optional[int] = None):
+        if format.lower() not in _FORMATS:
+            raise ValueError(
+                f'Unsupported image format {format!r}, '
+                f'expected one of {sorted(_FORMATS)}'
+            )
+        self.format = _FORMATS[format.lower()]
+        self.quality = quality
+
+    def _passthrough(self, x):
+        fp = getattr(x, 'fp', None)
+        if x.format != self.format or fp is None or _is_loaded(x):
+            return None
+        position = fp.tell()
+        try:
+            fp.seek(0)
+            return fp.read()
+        finally:
+            fp.seek(position)
+
+    def __call__(self, x, info: t.Optional[t.Dict] = None):
+        """Encode a `PIL.Image` to bytes.
+
+        :param x: The image to encode.
+        :param info: Additional information.
+        """
+        if isinstance(x, (bytes, bytearray, memoryview)):
+            return bytes(x)
+        data = self._passthrough(x)
+        if data is not None:
+            return data
+        if self.format == 'RAW':
+            mode = x.mode.encode()
+            header = _RAW_HEADER.pack(len(mode), *x.size)
+            return _RAW_MAGIC + header + mode + x.tobytes()
+        if self.format == 'JPEG' and x.mode not in ('RGB', 'L', 'CMYK'):
+            x = x.convert('RGB')
+        kwargs = {}
+        if self.quality is not None:
+            kwargs['quality'] = self.quality
+        buffer = io.BytesIO()
+        x.save(buffer, self.format, **kwargs)
+        return buffer.getvalue()
+
+
+encode_pil_image = EncoderPILImage()
+
+
+def _decode_raw(bytes):
+    offset = len(_RAW_MAGIC)
+    n, width, height = _RAW_HEADER.unpack_from(bytes, offset)
+    offset += _RAW_HEADER.size
+    mode = bytes[offset : offset + n].decode()
+    return PIL.Image.frombuffer(
+        mode, (width, height), bytes[offset + n :], 'raw', mode, 0, 1
+    )
 
 
 class DecoderPILImage:
     """Decoder to convert `bytes` back into a `PIL.Image` class.
 
     :param handle_exceptions: return a blank image if failure
+    :param draft: Size hint ``(width, height)``; images are decoded at the
+                  smallest size at least as large as the hint. JPEG images
+                  are scaled while decoding, other formats are reduced by an
+                  integer factor after decoding.
     """
 
-    def __init__(self, handle_exceptions: bool = True):
+    def __init__(
+        self,
+        handle_exceptions: bool = True,
+        draft: t.Optional[t.Tuple[int, int]] = None,
+    ):
         self.handle_exceptions = handle_exceptions
+        self.draft = tuple(draft) if draft is not None else None
+
+    def _reduce(self, image):
+        if image.format == 'JPEG':
+            image.draft(image.mode, self.draft)
+            return image
+        factor = min(image.width // self.draft[0], image.height // self.draft[1])
+        if factor < 2:
+            return image
+        return image.reduce(factor)
 
     def __call__(self, bytes, info: t.Optional[t.Dict] = None):
         """Decode a `PIL.Image` from bytes.
@@ -41,38 +133,112 @@ class DecoderPILImage:
         :param info: Additional information.
         """
         try:
-            return PIL.Image.open(io.BytesIO(bytes))
+            if bytes[: len(_RAW_MAGIC)] == _RAW_MAGIC:
+                image = _decode_raw(bytes)
+            else:
+                image = PIL.Image.open(io.BytesIO(bytes))
+            if self.draft is not None:
+                image = self._reduce(image)
+            return image
         except Exception as e:
             if self.handle_exceptions:
                 return BLANK_IMAGE
             else:
                 raise e
 
+    def decode_many(
+        self, blobs: t.Sequence[bytes], max_workers: t.Optional[int] = None
+    ) -> t.List:
+        """Decode and load several images in a thread-pool.
+
+        Called by ``DataType.decode_many``, e.g. when the rows of a query
+        result are decoded with ``Document.decode_many``.
+
+        :param blobs: The bytes of the images.
+        :param max_workers: The number of threads.
+        """
+        return load_images([self(b) for b in blobs], max_workers=max_workers)
+
 
 decode_pil_image = DecoderPILImage()
 
 
+def _load(x):
+    if isinstance(x, PIL.Image.Image):
+        x.load()
+    elif isinstance(x, (list, tuple)):
+        for y in x:
+            _load(y)
+    elif isinstance(x, dict):
+        for y in x.values():
+            _load(y)
+
+
+def load_images(inputs: t.List, max_workers: t.Optional[int] = None) -> t.List:
+    """Decode the pixels of lazily opened images in a thread-pool.
+
+    `PIL.Image.open` only reads the header of an image; the pixels are
+    decoded, without holding the GIL, the first time they are used. This
+    is how ``DecoderPILImage.decode_many`` decodes the image columns of
+    query results in parallel. It may also be called on the inputs of
+    ``predict_batches``; images nested in ``*args`` tuples or ``**kwargs``
+    dictionaries are loaded too.
+
+    :param inputs: The inputs of ``predict_batches``.
+    :param max_workers: The number of threads.
+    """
+    if len(inputs) < 2:
+        for x in inputs:
+            _load(x)
+        return inputs
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix='superduper-pil'
+    ) as pool:
+        list(pool.map(_load, inputs))
+    return inputs
+
+
 @component(
     {'name': 'identifier', 'type': 'str'},
     {'name': 'media_type', 'type': 'str', 'default': 'image/png'},
+    {'name': 'format', 'type': 'str', 'default': 'png'},
+    {'name': 'quality', 'type': 'int', 'optional': True},
 )
 def image_type(
     identifier: str,
     encodable: str = 'lazy_artifact',
-    media_type: str = 'image/png',
+    media_type: t.Optional[str] = None,
+    format: str = 'png',
+    quality: t.Optional[int] = None,
+    draft: t.Optional[t.Tuple[int, int]] = None,
     db: t.Optional['Datalayer'] = None,
 ):
     """Create a `DataType` for an image.
 
     :param identifier: The identifier for the data type.
     :param encodable: The encodable type.
-    :param media_type: The media type.
+    :param media_type: The media type; defaults to that of ``format``.
+    :param format: The image format; one of 'png', 'jpeg', 'webp' or 'raw'.
+    :param quality: The quality of lossy formats ('jpeg' and 'webp').
+    :param draft: Size hint ``(width, height)`` used when decoding.
     :param db: The datalayer instance.
     """
+    encoder = EncoderPILImage(format=format, quality=quality)
+    if media_type is None:
+        media_type = (
+            'application/octet-stream'
+            if encoder.format == 'RAW'
+            else f'image/{encoder.format.lower()}'
+        )
+    if encoder.format == 'PNG' and quality is None:
+        encoder = encode_pil_image
+    decoder = decode_pil_image
+    if draft is not None:
+        decoder = DecoderPILImage(draft=draft)
     return DataType(
         identifier=identifier,
-        encoder=encode_pil_image,
-        decoder=decode_pil_image,
+        encoder=encoder,
+        decoder=decoder,
         encodable=encodable,
         media_type=media_type,
     )
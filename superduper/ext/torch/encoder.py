@@ -4,6 +4,12 @@ import numpy
 import torch
 
 from superduper.components.datatype import DataType, DataTypeFactory
+from superduper.ext.numpy.encoder import (
+    _decode_joined,
+    decode_array,
+    decode_arrays,
+    encode_array,
+)
 from superduper.ext.utils import str_shape
 from superduper.misc.annotations import component
 
@@ -11,6 +17,31 @@ if t.TYPE_CHECKING:
     from superduper.base.datalayer import Datalayer
 
 
+_NUMPY_DTYPES = {
+    torch.bool: numpy.dtype('bool'),
+    torch.uint8: numpy.dtype('uint8'),
+    torch.int8: numpy.dtype('int8'),
+    torch.int16: numpy.dtype('int16'),
+    torch.int32: numpy.dtype('int32'),
+    torch.int64: numpy.dtype('int64'),
+    torch.float16: numpy.dtype('float16'),
+    torch.float32: numpy.dtype('float32'),
+    torch.float64: numpy.dtype('float64'),
+    torch.complex64: numpy.dtype('complex64'),
+    torch.complex128: numpy.dtype('complex128'),
+}
+
+
+def _to_tensor(array: numpy.ndarray) -> torch.Tensor:
+    if not array.dtype.isnative:
+        array = array.astype(array.dtype.newbyteorder('='))
+    elif not array.flags.writeable:
+        # Arrays viewing the caller's bytes are copied, since tensors are
+        # writable; buffers owned by the decoder are shared
+        array = array.copy()
+    return torch.from_numpy(array)
+
+
 class EncodeTensor:
     """Encode a tensor to bytes.
 
@@ -28,18 +59,28 @@ class EncodeTensor:
         """
         if x.dtype != self.dtype:
             raise TypeError(f"dtype was {x.dtype}, expected {self.dtype}")
-        return memoryview(x.numpy()).tobytes()
+        return encode_array(x.detach().cpu().contiguous().numpy())
+
+    def encode_many(self, xs: t.Sequence[torch.Tensor]) -> t.List[bytes]:
+        """Encode the tensors of several rows to bytes.
+
+        :param xs: The tensors to encode.
+        """
+        return [self(x) for x in xs]
 
 
 class DecodeTensor:
     """Decode a tensor from bytes.
 
+    The shape is read from the header of the bytes, so tensors of any shape
+    round-trip; ``shape`` is only used for bytes without a header.
+
     :param dtype: The dtype of the tensor, eg. torch.float32
     :param shape: The shape of the tensor, eg. (3, 4)
     """
 
     def __init__(self, dtype, shape):
-        self.dtype = torch.randn(1).type(dtype).numpy().dtype
+        self.dtype = _NUMPY_DTYPES[dtype]
         self.shape = shape
 
     def __call__(self, bytes, info: t.Optional[t.Dict] = None):
@@ -48,14 +89,26 @@ class DecodeTensor:
         :param bytes: The bytes to decode.
         :param info: Additional information.
         """
-        array = numpy.frombuffer(bytes, dtype=self.dtype).reshape(self.shape)
-        return torch.from_numpy(array)
+        return _to_tensor(decode_array(bytes, dtype=self.dtype, shape=self.shape))
+
+    def decode_many(self, blobs: t.Sequence, stack: bool = False):
+        """Decode the tensors of several rows.
+
+        :param blobs: The bytes of the rows.
+        :param stack: Return a single tensor stacking the rows.
+        """
+        if stack:
+            return _to_tensor(decode_arrays(blobs, dtype=self.dtype, shape=self.shape))
+        array = _decode_joined(blobs, self.dtype, self.shape) if blobs else None
+        if array is None:
+            return [self(b) for b in blobs]
+        return list(_to_tensor(array).unbind(0))
 
 
 @component()
 def tensor(
     dtype,
-    shape: t.Sequence,
+    shape: t.Optional[t.Sequence] = None,
     bytes_encoding: t.Optional[str] = None,
     encodable: str = 'encodable',
     db: t.Optional['Datalayer'] = None,
@@ -63,15 +116,16 @@ def tensor(
     """Create an encoder for a tensor of a given dtype and shape.
 
     :param dtype: The dtype of the tensor.
-    :param shape: The shape of the tensor.
+    :param shape: The shape of the tensor; ``None`` for tensors of any shape.
     :param bytes_encoding: The bytes encoding to use.
     :param encodable: The encodable name
         ["artifact", "encodable", "lazy_artifact", "file"].
     :param db: The datalayer instance.
     """
     dtype = getattr(torch, dtype)
+    str_dtype = str(dtype).replace('.', '-')
     return DataType(
-        identifier=f"{str(dtype).replace('.', '-')}[{str_shape(shape)}]",
+        identifier=f"{str_dtype}[{str_shape(shape) if shape else 'var'}]",
         encoder=EncodeTensor(dtype),
         decoder=DecodeTensor(dtype, shape),
         shape=shape,
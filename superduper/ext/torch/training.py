@@ -1,17 +1,46 @@
 import dataclasses as dc
+import io
 import typing as t
 
 import torch
 from torch.utils.data import DataLoader
 
 from superduper import logging
-from superduper.backends.query_dataset import QueryDataset
+from superduper.backends.query_dataset import CachedQueryDataset, QueryDataset
 from superduper.base.datalayer import Datalayer
 from superduper.components.dataset import Dataset
 from superduper.components.model import Trainer
+from superduper.components.training import AsyncCheckpointer, checkpoint_identifier
 from superduper.ext.torch.model import TorchModel
 
 
+def _to_cpu(x):
+    if isinstance(x, torch.Tensor):
+        return x.detach().to('cpu', copy=True)
+    if isinstance(x, dict):
+        return {k: _to_cpu(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+        return type(x)(_to_cpu(v) for v in x)
+    return x
+
+
+def _snapshot(model, optimizers):
+    return {
+        'model': _to_cpu(model.object.state_dict()),
+        'optimizers': [_to_cpu(opt.state_dict()) for opt in optimizers],
+    }
+
+
+def _torch_dumps(snapshot):
+    f = io.BytesIO()
+    torch.save(snapshot, f)
+    return f.getvalue()
+
+
+def _torch_loads(b):
+    return torch.load(io.BytesIO(b), map_location='cpu')
+
+
 class TorchTrainer(Trainer):
     """
     Configuration for the PyTorch trainer.
@@ -29,6 +58,10 @@ class TorchTrainer(Trainer):
     :param optimizer_state: Latest state of the optimizer for contined training
     :param collate_fn: Collate function for the dataloader
     :param metric_values: Metric values
+    :param keep_checkpoints: Number of most recent checkpoints kept in the
+                             artifact store
+    :param checkpoints: ``(identifier, iteration)`` of the kept ``Checkpoint``
+                        versions
     """
 
     objective: t.Callable
@@ -43,6 +76,8 @@ class TorchTrainer(Trainer):
     optimizer_state: t.Optional[t.Dict] = None
     collate_fn: t.Optional[t.Callable] = None
     metric_values: t.Dict = dc.field(default_factory=dict)
+    keep_checkpoints: int = 3
+    checkpoints: t.List = dc.field(default_factory=list)
 
     def get_optimizers(self, model):
         """Get the optimizers for the model.
@@ -52,14 +87,31 @@ class TorchTrainer(Trainer):
         cls_ = getattr(torch.optim, self.optimizer_cls)
         optimizer = cls_(model.parameters(), **self.optimizer_kwargs)
         if self.optimizer_state is not None:
-            self.optimizer.load_state_dict(self.optimizer_state)
+            optimizer.load_state_dict(self.optimizer_state)
             self.optimizer_state = None
         return (optimizer,)
 
+    def cleanup(self, db: Datalayer):
+        """Remove the kept checkpoints.
+
+        :param db: Datalayer
+        """
+        for identifier, step in self.checkpoints:
+            if step in (db.show('checkpoint', identifier) or []):
+                db.remove('checkpoint', identifier, step, force=True)
+
     def _create_loader(self, dataset):
+        loader_kwargs = dict(self.loader_kwargs)
+        if isinstance(dataset, CachedQueryDataset) and loader_kwargs.pop(
+            'shuffle', False
+        ):
+            # Shuffle by block, so that each block is only fetched once per epoch
+            loader_kwargs['sampler'] = dataset.block_sampler()
+        if isinstance(dataset, CachedQueryDataset) and loader_kwargs.get('num_workers'):
+            loader_kwargs.setdefault('worker_init_fn', dataset.worker_init_fn)
         return torch.utils.data.DataLoader(
             dataset,
-            **self.loader_kwargs,
+            **loader_kwargs,
             collate_fn=self.collate_fn,
         )
 
@@ -136,10 +188,49 @@ class TorchTrainer(Trainer):
             validation_sets = []
 
         model.train()
-        iteration = 0
 
         optimizers = self.get_optimizers(model)
 
+        checkpointer = AsyncCheckpointer(
+            db,
+            checkpoint_identifier(model.identifier),
+            keep=self.keep_checkpoints,
+            serializer=_torch_dumps,
+            deserializer=_torch_loads,
+            # Checkpoints of a previous run are superseded by the first new one
+            replace_previous=True,
+        )
+        try:
+            self._train_loop(
+                model,
+                train_dataloader,
+                valid_dataloader,
+                validation_sets,
+                optimizers,
+                checkpointer,
+            )
+            checkpointer.wait()
+            if checkpointer.checkpoints:
+                # The latest checkpoint is the best one, persist it only once
+                state = checkpointer.load()
+                model.object.load_state_dict(state['model'])
+                self.checkpoints = [
+                    [checkpointer.identifier, step] for step in checkpointer.checkpoints
+                ]
+                db.replace(model, upsert=True)
+        finally:
+            checkpointer.close()
+
+    def _train_loop(
+        self,
+        model,
+        train_dataloader,
+        valid_dataloader,
+        validation_sets,
+        optimizers,
+        checkpointer,
+    ):
+        iteration = 0
         while True:
             for batch in train_dataloader:
                 train_objective = self.take_step(model, batch, optimizers)
@@ -161,8 +252,7 @@ class TorchTrainer(Trainer):
                     self.append_metrics(all_metrics)
                     self.log(fold='VALID', iteration=iteration, **all_metrics)
                     if self.saving_criterion():
-                        db.replace(model, upsert=True)
-                        self.changed.update({'all_metrics', 'optimizer_state'})
+                        checkpointer.save(iteration, _snapshot(model, optimizers))
                     stop = self.stopping_criterion(iteration)
                     if stop:
                         return
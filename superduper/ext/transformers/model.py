@@ -383,6 +383,9 @@ class LLM(BaseLLM, _Fittable):
             )
         if tokenizer.pad_token is None:
             tokenizer.pad_token = tokenizer.eos_token
+        # Decoder-only models generate after the prompt, so batches of
+        # prompts are padded on the left
+        tokenizer.padding_side = "left"
 
         return pipeline("text-generation", model=model, tokenizer=tokenizer)
 
@@ -434,16 +437,16 @@ class LLM(BaseLLM, _Fittable):
             X = self.prompter(X, **kwargs)
         return X
 
-    def _batch_generate(self, prompts: t.List[str], **kwargs) -> t.List[str]:
+    def _generate_batch(self, prompts: t.List[str], **kwargs) -> t.List[str]:
         """Generate text.
 
         Can overwrite this method to support more inference methods.
         """
-        kwargs = {**self.predict_kwargs, **kwargs.copy()}
-
+        kwargs = {**self.predict_kwargs, **kwargs}
         # Set default values, if not will cause bad output
         outputs = self.pipeline(
             prompts,
+            batch_size=len(prompts),
             return_type=ReturnType.NEW_TEXT,
             eos_token_id=self.pipeline.tokenizer.eos_token_id,
             pad_token_id=self.pipeline.tokenizer.eos_token_id,
@@ -1,9 +1,12 @@
+import threading
+import time
 import typing as t
 from abc import ABC, abstractmethod
 from collections import defaultdict
 
 from superduper import logging
 from superduper.base.event import Event
+from superduper.misc.runnable.thread import HasThread
 
 DependencyType = t.Union[t.Dict[str, str], t.Sequence[t.Dict[str, str]]]
 
@@ -104,6 +107,10 @@ class BaseQueuePublisher(ABC):
         logging.info(f'Declaring component {component.type_id}/{component.identifier}')
         self.db.compute.component_hook(component.identifier, type_id=component.type_id)
 
+    def flush(self):
+        """Process any events which are still buffered in the queue."""
+        pass
+
 
 class LocalQueuePublisher(BaseQueuePublisher):
     """
@@ -145,6 +152,157 @@ class LocalQueuePublisher(BaseQueuePublisher):
         )
 
 
+class DebouncedLocalQueuePublisher(LocalQueuePublisher):
+    """
+    Local queue which buffers events and consumes them in batches.
+
+    Events published within a window of ``max_latency`` seconds (or until
+    ``max_batch_size`` events are pending) are merged per component and
+    event type before ``run_jobs`` is called, so that a stream of small
+    inserts results in a few large jobs rather than one job per insert.
+    Publishers block while more than ``max_queue_size`` events are pending,
+    unless a flush is in progress. Events of components which aren't
+    visible yet, e.g. while they are being applied, are kept and retried
+    after ``max_latency`` seconds.
+
+    :param uri: uri to connect.
+    :param max_latency: Maximum time in seconds an event is buffered.
+    :param max_batch_size: Number of pending events which triggers a flush.
+    :param max_queue_size: Number of pending events above which
+                           ``publish`` blocks (backpressure).
+    """
+
+    def __init__(
+        self,
+        uri: t.Optional[str] = None,
+        max_latency: float = 0.5,
+        max_batch_size: int = 1000,
+        max_queue_size: int = 100_000,
+    ):
+        super().__init__(uri=uri)
+        self.max_latency = max_latency
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+        self._pending = 0
+        # Events kept by the last flush, which don't count for a new batch
+        self._deferred = 0
+        self._oldest: t.Optional[float] = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.RLock()
+        self._flushing = 0
+        self._thread: t.Optional[HasThread] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of events waiting to be consumed."""
+        return self._pending
+
+    def _start(self):
+        with self._condition:
+            if self._thread is None:
+                self._thread = HasThread(
+                    callback=self._wait_and_flush,
+                    daemon=True,
+                    looping=True,
+                    name='debounced-queue',
+                )
+                self._thread.start()
+
+    def publish(self, events: t.List[Event]):
+        """
+        Buffer events in the local queue.
+
+        :param events: list of events
+        """
+        self._start()
+        with self._condition:
+            # Events published while a flush is consuming, e.g. by its own
+            # jobs, must not wait for it, otherwise it would deadlock
+            while self._pending >= self.max_queue_size and not self._flushing:
+                self._condition.notify_all()
+                self._condition.wait()
+            for event in events:
+                self.queue[event.type_id, event.identifier].append(event)
+            self._pending += len(events)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._condition.notify_all()
+        # Jobs are created when the buffer is flushed
+        return {}
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        if self._pending - self._deferred >= self.max_batch_size:
+            return True
+        assert self._oldest is not None
+        return time.monotonic() - self._oldest >= self.max_latency
+
+    def _wait_and_flush(self):
+        with self._condition:
+            while not self._due():
+                if self._thread is None or not self._thread.running:
+                    return
+                timeout = None
+                if self._oldest is not None:
+                    timeout = self.max_latency - (time.monotonic() - self._oldest)
+                self._condition.wait(timeout=timeout)
+        try:
+            self.flush()
+        except Exception as e:
+            logging.error(f'Error consuming buffered events: {e}')
+
+    def flush(self):
+        """Consume all buffered events now."""
+        with self._condition:
+            self._flushing += 1
+        try:
+            with self._flush_lock:
+                with self._condition:
+                    queue, self.queue = self.queue, defaultdict(lambda: [])
+                    self._pending = 0
+                    self._deferred = 0
+                    self._oldest = None
+                    self._condition.notify_all()
+                if not queue:
+                    return
+                try:
+                    self.consumer.consume(
+                        db=self.db, queue=queue, components=self.components
+                    )
+                finally:
+                    self._requeue(queue)
+        finally:
+            with self._condition:
+                self._flushing -= 1
+                self._condition.notify_all()
+
+    def _requeue(self, queue: t.Dict):
+        # Put back the events which ``consume`` didn't take, before the
+        # events published since the flush started
+        left = {k: v for k, v in queue.items() if v}
+        if not left:
+            return
+        with self._condition:
+            for key, events in left.items():
+                self.queue[key] = events + self.queue.get(key, [])
+            n = sum(len(v) for v in left.values())
+            self._pending += n
+            self._deferred += n
+            self._oldest = time.monotonic()
+            self._condition.notify_all()
+
+    def close(self):
+        """Flush the remaining events and stop the background thread."""
+        if self._thread is not None:
+            self._thread.stop()
+            with self._condition:
+                self._condition.notify_all()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
 class LocalQueueConsumer(BaseQueueConsumer):
     """LocalQueueConsumer for consuming message from queue.
 
@@ -171,7 +329,8 @@ class LocalQueueConsumer(BaseQueueConsumer):
             component = components[type_id, identifier]
             jobs = []
             for event_type, type_events in DBEvent.chunk_by_event(events).items():
-                ids = [event.id for event in type_events]
+                # Coalesce repeated events on the same id
+                ids = list(dict.fromkeys(event.id for event in type_events))
                 overwrite = (
                     True if event_type in [DBEvent.insert, DBEvent.upsert] else False
                 )
@@ -0,0 +1,112 @@
+import concurrent.futures
+import threading
+import time
+import typing as t
+
+from superduper import logging
+
+
+class MicroBatcher:
+    """Group concurrent single calls into calls on batches.
+
+    Items submitted from several threads are queued for at most
+    ``max_latency`` seconds, or until ``max_batch_size`` items are waiting,
+    then ``function`` is called once on the list of items. The results are
+    handed back to each caller, in order, through a ``Future``.
+
+    :param function: Function taking a list of items and returning
+                     a list of results of the same length.
+    :param max_batch_size: Maximum number of items per call of ``function``.
+    :param max_latency: Maximum time in seconds an item waits in the queue.
+    :param name: Name of the worker thread.
+    """
+
+    def __init__(
+        self,
+        function: t.Callable[[t.List], t.Sequence],
+        max_batch_size: int = 32,
+        max_latency: float = 0.01,
+        name: str = 'micro-batcher',
+    ):
+        self.function = function
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.name = name
+        self._items: t.List[t.Tuple[t.Any, concurrent.futures.Future, float]] = []
+        self._condition = threading.Condition()
+        self._thread: t.Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, item: t.Any) -> concurrent.futures.Future:
+        """Queue an item and return a future for its result.
+
+        :param item: The item to process.
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f'{self.name} has been closed')
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._thread.start()
+            self._items.append((item, future, time.monotonic()))
+            self._condition.notify()
+        return future
+
+    def __call__(self, item: t.Any) -> t.Any:
+        """Process a single item, blocking until its batch has been computed.
+
+        :param item: The item to process.
+        """
+        return self.submit(item).result()
+
+    def _next_batch(self):
+        with self._condition:
+            while True:
+                if self._items:
+                    waited = time.monotonic() - self._items[0][2]
+                    if (
+                        len(self._items) >= self.max_batch_size
+                        or waited >= self.max_latency
+                        or self._closed
+                    ):
+                        batch = self._items[: self.max_batch_size]
+                        del self._items[: self.max_batch_size]
+                        return batch
+                    self._condition.wait(timeout=self.max_latency - waited)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            items = [item for item, _, _ in batch]
+            futures = [future for _, future, _ in batch]
+            logging.debug(f'{self.name}: processing batch of {len(items)} items')
+            try:
+                results = self.function(items)
+                if len(results) != len(items):
+                    raise ValueError(
+                        f'Expected {len(items)} results, got {len(results)}'
+                    )
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def close(self):
+        """Process the remaining items and stop the worker thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
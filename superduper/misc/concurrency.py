@@ -0,0 +1,199 @@
+import asyncio
+import concurrent.futures
+import inspect
+import threading
+import time
+import typing as t
+
+
+class RateLimiter:
+    """Budget of requests and tokens per minute.
+
+    Each budget is a bucket which refills continuously at its per-minute
+    rate, up to one minute's worth, so that bursts are allowed as long as
+    the rate over any minute stays within the budget.
+
+    :param requests_per_minute: Maximum number of requests per minute.
+    :param tokens_per_minute: Maximum number of tokens per minute.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: t.Optional[int] = None,
+        tokens_per_minute: t.Optional[int] = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._last = time.monotonic()
+        self._lock: t.Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed, self._last = now - self._last, now
+        if self.requests_per_minute:
+            self._requests = min(
+                float(self.requests_per_minute),
+                self._requests + elapsed * self.requests_per_minute / 60,
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                float(self.tokens_per_minute),
+                self._tokens + elapsed * self.tokens_per_minute / 60,
+            )
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 1:
+            wait = (1 - self._requests) * 60 / self.requests_per_minute
+        if self.tokens_per_minute:
+            # A request larger than the budget waits for a full bucket
+            tokens = min(tokens, self.tokens_per_minute)
+            if self._tokens < tokens:
+                wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+        return wait
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until a request of ``tokens`` tokens fits in the budgets.
+
+        :param tokens: Number of tokens used by the request.
+        """
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # Requests are admitted one at a time, in order of arrival
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = self._wait_time(tokens)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= min(tokens, self.tokens_per_minute)
+
+
+class RequestEngine:
+    """Run many requests concurrently on a background event loop.
+
+    Coroutine functions are awaited on the loop; plain functions, such as the
+    methods of synchronous API clients, are run in a thread-pool. At most
+    ``max_concurrency`` requests are in flight at once and all requests pass
+    through a shared :class:`RateLimiter`.
+
+    :param max_concurrency: Maximum number of requests in flight.
+    :param requests_per_minute: Maximum number of requests per minute.
+    :param tokens_per_minute: Maximum number of tokens per minute.
+    :param name: Name of the event loop thread.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_minute: t.Optional[int] = None,
+        tokens_per_minute: t.Optional[int] = None,
+        name: str = 'request-engine',
+    ):
+        self.max_concurrency = max_concurrency
+        self.limiter = RateLimiter(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+        )
+        self.name = name
+        self._loop: t.Optional[asyncio.AbstractEventLoop] = None
+        self._executor: t.Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The event loop, started in a daemon thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_concurrency,
+                    thread_name_prefix=self.name,
+                )
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(self._executor)
+                threading.Thread(
+                    target=loop.run_forever, name=self.name, daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def map(
+        self,
+        function: t.Callable,
+        items: t.Iterable,
+        cost: t.Optional[t.Callable[[t.Any], int]] = None,
+    ) -> t.List:
+        """Call ``function`` on every item and return the results in order.
+
+        :param function: Function or coroutine function of a single item.
+        :param items: The items to call ``function`` on.
+        :param cost: Function estimating the tokens used by an item.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._map(function, list(items), cost), self.loop
+        )
+        return future.result()
+
+    async def _map(self, function, items, cost):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        is_async = inspect.iscoroutinefunction(function)
+        loop = asyncio.get_running_loop()
+
+        async def call(item):
+            async with semaphore:
+                await self.limiter.acquire(cost(item) if cost is not None else 0)
+                if is_async:
+                    return await function(item)
+                return await loop.run_in_executor(None, function, item)
+
+        return await asyncio.gather(*(call(item) for item in items))
+
+    def close(self):
+        """Stop the event loop and the thread-pool."""
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+_engines: t.Dict[t.Tuple, RequestEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def shared_engine(
+    owner: str,
+    max_concurrency: int = 8,
+    requests_per_minute: t.Optional[int] = None,
+    tokens_per_minute: t.Optional[int] = None,
+) -> RequestEngine:
+    """Get the engine shared by all callers with the same owner and limits.
+
+    Copies of a model thus share their event loop, thread-pool and rate
+    limits, instead of starting new ones.
+
+    :param owner: Name of the user of the engine, e.g. the model.
+    :param max_concurrency: Maximum number of requests in flight.
+    :param requests_per_minute: Maximum number of requests per minute.
+    :param tokens_per_minute: Maximum number of tokens per minute.
+    """
+    key = (owner, max_concurrency, requests_per_minute, tokens_per_minute)
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = RequestEngine(
+                max_concurrency=max_concurrency,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                name=owner,
+            )
+        return _engines[key]
@@ -1,5 +1,27 @@
+import concurrent.futures
 import hashlib
 import os
+import threading
+import typing as t
+
+# ``hashlib`` releases the GIL while hashing large buffers, so batches
+# above this many bytes are hashed in a thread-pool
+PARALLEL_HASH_BYTES = 1 << 22
+
+_pool: t.Optional[concurrent.futures.ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _hash_pool() -> concurrent.futures.ThreadPoolExecutor:
+    # The pool is shared by all batches, rather than started for each
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                thread_name_prefix='superduper-hash',
+            )
+        return _pool
 
 
 def hash_string(string: str):
@@ -10,6 +32,31 @@ def hash_string(string: str):
     return hashlib.sha256(string.encode()).hexdigest()
 
 
+def hash_bytes(data: t.Union[bytes, str]) -> str:
+    """Hash content, e.g. to build content-addressed artifact ids.
+
+    Uses the (hardware-accelerated) sha1 of ``hashlib``, so that ids do not
+    depend on the installed packages.
+
+    :param data: bytes or string to hash
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    elif not isinstance(data, bytes):
+        raise ValueError(f'Unsupported data type: {type(data)}')
+    return hashlib.sha1(data).hexdigest()
+
+
+def hash_many(datas: t.Sequence[t.Union[bytes, str]]) -> t.List[str]:
+    """Hash several contents with ``hash_bytes``, in parallel for large batches.
+
+    :param datas: bytes or strings to hash
+    """
+    if len(datas) < 2 or sum(len(d) for d in datas) < PARALLEL_HASH_BYTES:
+        return [hash_bytes(d) for d in datas]
+    return list(_hash_pool().map(hash_bytes, datas))
+
+
 def random_sha1():
     """Generate random sha1 values."""
     random_data = os.urandom(256)
@@ -0,0 +1,83 @@
+import os
+import threading
+import typing as t
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from superduper import CFG
+
+_lock = threading.Lock()
+_session: t.Optional[requests.Session] = None
+
+
+def get_session() -> requests.Session:
+    """Get the HTTP session shared by all REST requests of the process.
+
+    Connections are kept alive and pooled per host, up to
+    ``CFG.http.pool_size`` connections.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=CFG.http.pool_size,
+                pool_maxsize=CFG.http.pool_size,
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def reset_session():
+    """Close the shared session, e.g. after changing ``CFG.http``."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the shared session.
+
+    :param method: HTTP method, e.g. ``'get'`` or ``'post'``.
+    :param url: URL to request.
+    :param kwargs: Keyword arguments of ``requests.Session.request``.
+    """
+    kwargs.setdefault('timeout', (CFG.http.connect_timeout, CFG.http.read_timeout))
+    return get_session().request(method, url, **kwargs)
+
+
+def download(url: str, path: str, chunk_size: int = 1 << 20, **kwargs) -> str:
+    """Stream a file to disk, resuming a previous partial download.
+
+    The file is written to ``path + '.part'`` and renamed to ``path`` once
+    complete. If the partial file exists, only the remaining bytes are
+    requested, unless the server doesn't support range requests.
+
+    :param url: URL of the file.
+    :param path: Path to save the file to.
+    :param chunk_size: Number of bytes read and written at a time.
+    :param kwargs: Keyword arguments of ``requests.Session.request``.
+    """
+    part = path + '.part'
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = dict(kwargs.pop('headers', None) or {})
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+
+    with request('get', url, headers=headers, stream=True, **kwargs) as response:
+        if response.status_code == 416:
+            # The partial file is already complete
+            os.replace(part, path)
+            return path
+        response.raise_for_status()
+        mode = 'ab' if offset and response.status_code == 206 else 'wb'
+        with open(part, mode) as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+    os.replace(part, path)
+    return path
@@ -0,0 +1,129 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import typing as t
+
+from superduper.misc.compat import cache
+from superduper.misc.hash import hash_bytes
+
+# Maximum number of variables in a single SQLite statement
+_CHUNK_SIZE = 500
+
+
+class PredictionCache:
+    """Cache of model outputs in a local SQLite file.
+
+    Outputs are stored under a key computed from a model namespace and the
+    content of the input, and are dropped once older than ``ttl`` seconds,
+    or, least recently used first, once there are more than ``max_entries``.
+
+    :param path: Path of the SQLite file.
+    :param ttl: Time in seconds after which an output expires.
+    :param max_entries: Maximum number of outputs kept.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: t.Optional[float] = None,
+        max_entries: t.Optional[int] = None,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection as c:
+            c.execute(
+                'CREATE TABLE IF NOT EXISTS predictions '
+                '(key TEXT PRIMARY KEY, value BLOB, created REAL, accessed REAL)'
+            )
+            c.execute(
+                'CREATE INDEX IF NOT EXISTS predictions_accessed '
+                'ON predictions (accessed)'
+            )
+
+    @staticmethod
+    def key(namespace: str, item: t.Any) -> str:
+        """Key of the output of a model on an input.
+
+        :param namespace: Identifies the model and its prediction config.
+        :param item: The input.
+        """
+        return hash_bytes(pickle.dumps((namespace, item), protocol=4))
+
+    def get_many(self, keys: t.Sequence[str]) -> t.Dict[str, t.Any]:
+        """Get the outputs stored under ``keys``, skipping missing ones.
+
+        :param keys: The keys to look up.
+        """
+        now = time.time()
+        found = {}
+        with self._lock, self._connection as c:
+            for i in range(0, len(keys), _CHUNK_SIZE):
+                chunk = list(keys[i : i + _CHUNK_SIZE])
+                rows = c.execute(
+                    'SELECT key, value, created FROM predictions '
+                    f'WHERE key IN ({", ".join("?" * len(chunk))})',
+                    chunk,
+                ).fetchall()
+                for key, value, created in rows:
+                    if self.ttl is None or now - created <= self.ttl:
+                        found[key] = value
+                c.execute(
+                    'UPDATE predictions SET accessed = ? '
+                    f'WHERE key IN ({", ".join("?" * len(chunk))})',
+                    [now, *chunk],
+                )
+        return {key: pickle.loads(value) for key, value in found.items()}
+
+    def put_many(self, items: t.Dict[str, t.Any]):
+        """Store outputs under their keys.
+
+        :param items: Mapping of keys to outputs.
+        """
+        now = time.time()
+        rows = [
+            (key, pickle.dumps(value, protocol=4), now, now)
+            for key, value in items.items()
+        ]
+        with self._lock, self._connection as c:
+            c.executemany(
+                'INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)', rows
+            )
+            if self.ttl is not None:
+                c.execute('DELETE FROM predictions WHERE created < ?', [now - self.ttl])
+            if self.max_entries is not None:
+                c.execute(
+                    'DELETE FROM predictions WHERE key IN (SELECT key FROM '
+                    'predictions ORDER BY accessed DESC, rowid DESC LIMIT -1 OFFSET ?)',
+                    [self.max_entries],
+                )
+
+    def clear(self):
+        """Remove all outputs."""
+        with self._lock, self._connection as c:
+            c.execute('DELETE FROM predictions')
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM predictions'
+            ).fetchone()[0]
+
+
+@cache
+def get_prediction_cache(
+    path: str, ttl: t.Optional[float] = None, max_entries: t.Optional[int] = None
+) -> PredictionCache:
+    """Get the prediction cache for a file, shared within the process.
+
+    :param path: Path of the SQLite file.
+    :param ttl: Time in seconds after which an output expires.
+    :param max_entries: Maximum number of outputs kept.
+    """
+    return PredictionCache(path, ttl=ttl, max_entries=max_entries)
@@ -1,21 +1,35 @@
 import base64
 import json
+import typing as t
 from functools import lru_cache
 
-import requests
-
 from superduper import CFG, logging
 from superduper.base import exceptions
+from superduper.misc import http_session, wire
 from superduper.misc.auto_schema import DEFAULT_DATATYPE
 
 primitives = (bool, str, int, float, type(None), list, dict)
 
+# Endpoints of the vector search service which are sent to ``write_uri``
+_WRITE_ENDPOINTS = {
+    'create/search',
+    'drop/search',
+    'add/search',
+    'delete/search',
+    'query/post_create',
+}
+
+# Endpoints which answered that they don't accept frames (415)
+_frames_unsupported: t.Set[t.Tuple[str, str]] = set()
+
 
 @lru_cache(maxsize=None)
 def _handshake(service: str):
     endpoint = 'handshake/config'
     cfg = json.dumps(CFG.comparables)
-    _request_server(service, args={'cfg': cfg}, endpoint=endpoint)
+    result = _request_server(service, args={'cfg': cfg}, endpoint=endpoint)
+    # Services which predate the binary protocol answer ``null``
+    return result if isinstance(result, dict) else {}
 
 
 def server_request_decoder(x):
@@ -34,13 +48,13 @@ def _server_request_encoder(x):
     return {'_b64data': base64.b64encode(x).decode()}
 
 
-def _request_server(
-    service: str = 'vector_search', data=None, endpoint='add', args={}, type='post'
-):
+def _service_url(service: str, endpoint: str):
     if service == 'cdc':
         service_uri = CFG.cluster.cdc.uri
     elif service == 'vector_search':
         service_uri = CFG.cluster.vector_search.uri
+        if endpoint in _WRITE_ENDPOINTS and CFG.cluster.vector_search.write_uri:
+            service_uri = CFG.cluster.vector_search.write_uri
     elif service == 'scheduler':
         service_uri = CFG.cluster.scheduler.uri
     else:
@@ -48,8 +62,13 @@ def _request_server(
 
     assert isinstance(service_uri, str)
     service_uri = 'http://' + ''.join(service_uri.split('://')[1:])
+    return service_uri + '/' + endpoint
 
-    url = service_uri + '/' + endpoint
+
+def _request_server(
+    service: str = 'vector_search', data=None, endpoint='add', args={}, type='post'
+):
+    url = _service_url(service, endpoint)
     logging.debug(f'Trying to connect {service} at {url} method: {type}')
 
     if type == 'post':
@@ -61,10 +80,10 @@ def _request_server(
             if not isinstance(data, primitives):
                 data = _server_request_encoder(data)
 
-        response = requests.post(url, json=data, params=args)
+        response = http_session.request('post', url, json=data, params=args)
         result = json.loads(response.content)
     else:
-        response = requests.get(url, params=args)
+        response = http_session.request('get', url, params=args)
         result = None
     if response.status_code != 200:
         error = json.loads(response.content)
@@ -88,3 +107,63 @@ def request_server(
     return _request_server(
         service=service, data=data, endpoint=endpoint, args=args, type=type
     )
+
+
+def request_server_frames(
+    service: str,
+    frames: t.Iterable[t.Dict[str, t.Any]],
+    endpoint: str,
+    args={},
+) -> t.Optional[t.List[t.Dict[str, t.Any]]]:
+    """Request server with data sent as a stream of binary frames.
+
+    The frames are sent with chunked transfer encoding, so that large batches
+    are encoded while they are being sent. The response is decoded from frames
+    or, if the server doesn't answer with frames, from JSON.
+
+    Returns ``None`` if the service doesn't announce frames in its handshake
+    or answers 415 at this endpoint, in which case the caller should fall
+    back to ``request_server``.
+
+    :param service: Service name
+    :param frames: Dictionaries to send, see ``superduper.misc.wire``
+    :param endpoint: Endpoint to hit
+    :param args: Arguments to pass
+    """
+    if (service, endpoint) in _frames_unsupported:
+        return None
+    if not _handshake(service).get('frames'):
+        return None
+    url = _service_url(service, endpoint)
+    logging.debug(f'Trying to connect {service} at {url} with frames')
+
+    response = http_session.request(
+        'post',
+        url,
+        data=wire.encode_frames(frames),
+        params=args,
+        headers={
+            'Content-Type': wire.CONTENT_TYPE,
+            'Accept': f'{wire.CONTENT_TYPE}, application/json',
+        },
+        stream=True,
+    )
+    with response:
+        if response.status_code == 415:
+            logging.warn(
+                f'{service} does not accept frames at {endpoint}, '
+                'falling back to JSON'
+            )
+            _frames_unsupported.add((service, endpoint))
+            return None
+        if response.status_code != 200:
+            msg = (
+                f'Server error at {service} with {response.status_code} :: '
+                f'{response.text}'
+            )
+            raise exceptions.ServiceRequestException(msg)
+        content_type = response.headers.get('Content-Type', '')
+        if content_type.startswith(wire.CONTENT_TYPE):
+            return list(wire.decode_frames(response.iter_content(chunk_size=None)))
+        result = json.loads(response.content)
+    return result if isinstance(result, list) else [result]
@@ -0,0 +1,147 @@
+import json
+import struct
+import typing as t
+
+import numpy
+import numpy.typing
+
+CONTENT_TYPE = 'application/x-superduper-frames'
+
+_MAGIC = b'SDF1'
+# Magic, length of the JSON header, length of the array buffers
+_PREFIX = struct.Struct('<4sII')
+
+
+class FrameError(Exception):
+    """
+    Exception raised when a buffer is not a valid frame.
+
+    :param args: *args for Exception
+    :param kwargs: **kwargs for Exception
+    """
+
+
+def encode_frame(obj: t.Dict[str, t.Any]) -> bytes:
+    """Encode a dictionary as a binary frame.
+
+    ``numpy`` arrays are written as raw buffers after a JSON header holding
+    the other values, so that vectors don't need to be serialized one float
+    at a time.
+
+    :param obj: Dictionary of JSON-serializable values and ``numpy`` arrays.
+    """
+    header: t.Dict[str, t.Any] = {}
+    arrays = []
+    buffers = []
+    offset = 0
+    for key, value in obj.items():
+        if isinstance(value, numpy.ndarray):
+            value = numpy.ascontiguousarray(value)
+            arrays.append(
+                {
+                    'key': key,
+                    'dtype': value.dtype.str,
+                    'shape': list(value.shape),
+                    'offset': offset,
+                }
+            )
+            buffers.append(value.tobytes())
+            offset += value.nbytes
+        else:
+            header[key] = value
+    if arrays:
+        header['_arrays'] = arrays
+    encoded = json.dumps(header).encode()
+    return b''.join([_PREFIX.pack(_MAGIC, len(encoded), offset), encoded, *buffers])
+
+
+def _decode_frame(buffer: memoryview) -> t.Tuple[t.Dict[str, t.Any], int]:
+    magic, header_size, body_size = _PREFIX.unpack_from(buffer)
+    if magic != _MAGIC:
+        raise FrameError(f'Invalid frame prefix {bytes(magic)!r}')
+    start = _PREFIX.size + header_size
+    end = start + body_size
+    if len(buffer) < end:
+        raise FrameError('Truncated frame')
+    obj = json.loads(bytes(buffer[_PREFIX.size : start]))
+    for spec in obj.pop('_arrays', []):
+        dtype = numpy.dtype(spec['dtype'])
+        count = int(numpy.prod(spec['shape'], dtype=numpy.int64))
+        obj[spec['key']] = numpy.frombuffer(
+            buffer, dtype=dtype, count=count, offset=start + spec['offset']
+        ).reshape(spec['shape'])
+    return obj, end
+
+
+def decode_frame(buffer: t.Union[bytes, bytearray, memoryview]):
+    """Decode a binary frame created with ``encode_frame``.
+
+    Arrays are read-only views on ``buffer``.
+
+    :param buffer: The frame.
+    """
+    return _decode_frame(memoryview(buffer))[0]
+
+
+def encode_frames(objs: t.Iterable[t.Dict[str, t.Any]]) -> t.Iterator[bytes]:
+    """Encode dictionaries as a stream of frames.
+
+    :param objs: Dictionaries to encode.
+    """
+    for obj in objs:
+        yield encode_frame(obj)
+
+
+def decode_frames(
+    chunks: t.Union[bytes, t.Iterable[bytes]],
+) -> t.Iterator[t.Dict[str, t.Any]]:
+    """Decode a stream of frames, however it is split into chunks.
+
+    :param chunks: Bytes or chunks of bytes of concatenated frames.
+    """
+    if isinstance(chunks, (bytes, bytearray)):
+        chunks = [chunks]
+    pending = bytearray()
+    for chunk in chunks:
+        pending.extend(chunk)
+        while len(pending) >= _PREFIX.size:
+            _, header_size, body_size = _PREFIX.unpack_from(pending)
+            size = _PREFIX.size + header_size + body_size
+            if len(pending) < size:
+                break
+            # Copy, so that the decoded arrays don't pin ``pending``
+            obj, _ = _decode_frame(memoryview(bytes(pending[:size])))
+            del pending[:size]
+            yield obj
+    if pending:
+        raise FrameError('Truncated frame')
+
+
+def vector_frames(
+    ids: t.Sequence[str],
+    vectors: t.Sequence[numpy.typing.ArrayLike],
+    frame_size: int,
+) -> t.Iterator[t.Dict[str, t.Any]]:
+    """Split ids and vectors into frames of at most ``frame_size`` vectors.
+
+    :param ids: Ids of the vectors.
+    :param vectors: The vectors.
+    :param frame_size: Maximum number of vectors per frame.
+    """
+    for i in range(0, len(ids), frame_size):
+        yield {
+            'ids': list(ids[i : i + frame_size]),
+            'vectors': numpy.stack(
+                [numpy.asarray(v) for v in vectors[i : i + frame_size]]
+            ),
+        }
+
+
+def accepts_frames(accept: t.Optional[str]) -> bool:
+    """Whether an ``Accept`` header value allows a frames response.
+
+    :param accept: The ``Accept`` header value.
+    """
+    if not accept:
+        return False
+    return any(part.split(';')[0].strip() == CONTENT_TYPE for part in accept.split(','))
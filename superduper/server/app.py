@@ -0,0 +1,124 @@
+import json
+import typing as t
+from urllib.parse import urlparse
+
+from fastapi import FastAPI, HTTPException
+from prettytable import PrettyTable
+
+from superduper import CFG, logging
+from superduper.base.datalayer import Datalayer
+
+
+def port_from_uri(uri: t.Optional[str], default: int = 8000) -> int:
+    """Get the port of a service URI.
+
+    :param uri: URI of the service, e.g. ``'http://localhost:8000'``
+    :param default: Port used if the URI has none
+    """
+    if uri is None:
+        return default
+    return urlparse(uri).port or default
+
+
+class SuperDuperApp:
+    """A ``FastAPI`` application serving a superduper service.
+
+    The datalayer is built from ``CFG`` in server mode when the application
+    starts, unless one is passed. Clients check that their configuration
+    matches the one of the service with the ``handshake/config`` endpoint,
+    which also answers whether the service accepts binary frames.
+
+    :param service: Name of the service, e.g. ``'vector_search'``
+    :param port: Port to serve on
+    :param db: Datalayer to serve
+    :param init_hook: Called with the datalayer before serving
+    :param shutdown_hook: Called with the datalayer when the app stops
+    :param frames: Whether the service accepts data sent as binary frames,
+                   see ``superduper.misc.wire``
+    """
+
+    def __init__(
+        self,
+        service: str = 'vector_search',
+        port: int = 8000,
+        db: t.Optional[Datalayer] = None,
+        init_hook: t.Optional[t.Callable[[Datalayer], None]] = None,
+        shutdown_hook: t.Optional[t.Callable[[Datalayer], None]] = None,
+        frames: bool = False,
+    ):
+        self.service = service
+        self.port = port
+        self._db = db
+        self.init_hook = init_hook
+        self.shutdown_hook = shutdown_hook
+        self.frames = frames
+        self._started = False
+        self.app = FastAPI(
+            title=f'superduper {service}',
+            on_startup=[self.pre_start],
+            on_shutdown=[self.shutdown],
+        )
+        self.add('/handshake/config')(self._handshake)
+
+    @property
+    def db(self) -> Datalayer:
+        """The datalayer served by the application."""
+        if self._db is None:
+            from superduper.base.build import build_datalayer
+
+            self._db = build_datalayer(CFG)
+        self._db.server_mode = True
+        return self._db
+
+    def _handshake(self, cfg: str):
+        if not CFG.match(json.loads(cfg)):
+            raise HTTPException(
+                status_code=400,
+                detail=f'Configuration of the {self.service} service does not '
+                'match the configuration of the client',
+            )
+        return {'frames': self.frames}
+
+    def add(self, route: str, method: str = 'post', **kwargs):
+        """Register a function as the handler of a route.
+
+        :param route: Path of the route, e.g. ``'/query/search'``
+        :param method: HTTP method of the route
+        :param kwargs: Keyword arguments of ``FastAPI.add_api_route``
+        """
+
+        def decorator(function):
+            self.app.add_api_route(route, function, methods=[method.upper()], **kwargs)
+            return function
+
+        return decorator
+
+    def pre_start(self):
+        """Build the datalayer and run the init hook, once."""
+        if self._started:
+            return
+        self._started = True
+        if self.init_hook is not None:
+            self.init_hook(self.db)
+
+    def shutdown(self):
+        """Run the shutdown hook."""
+        if self._started and self.shutdown_hook is not None:
+            self.shutdown_hook(self.db)
+        self._started = False
+
+    def print_routes(self):
+        """Log the routes of the application."""
+        table = PrettyTable()
+        table.field_names = ['Route', 'Methods', 'Function']
+        for route in self.app.routes:
+            methods = getattr(route, 'methods', None) or []
+            table.add_row([route.path, ', '.join(sorted(methods)), route.name])
+        logging.info(f'Routes of the {self.service} service:\n{table}')
+
+    def start(self):
+        """Serve the application with ``uvicorn``."""
+        import uvicorn
+
+        self.print_routes()
+        uvicorn.run(self.app, host='0.0.0.0', port=self.port)
@@ -5,10 +5,11 @@ import typing as t
 from functools import cached_property
 
 import pymongo
+from bson import ObjectId
 
 from superduper import CFG, logging
 from superduper.components.model import APIBaseModel
-from superduper.vector_search.base import BaseVectorSearcher
+from superduper.vector_search.base import BaseVectorSearcher, VectorItem
 
 if t.TYPE_CHECKING:
     from superduper.components.vector_index import VectorIndex
@@ -22,8 +23,16 @@ class MongoAtlasVectorSearcher(BaseVectorSearcher):
     :param dimensions: Dimension of the vector embeddings
     :param measure: measure to assess similarity
     :param output_path: Path to the output
+    :param num_candidates_multiplier: Number of candidates considered by the
+                                      search per result returned
+    :param batch_size: Number of vectors written or deleted per request
+    :param database: Database holding the index collection; by default
+                     connected to from the vector search URI
     """
 
+    # Upper bound of ``numCandidates`` accepted by ``$vectorSearch``
+    MAX_CANDIDATES = 10_000
+
     def __init__(
         self,
         identifier: str,
@@ -31,12 +40,19 @@ class MongoAtlasVectorSearcher(BaseVectorSearcher):
         dimensions: t.Optional[int] = None,
         measure: t.Optional[str] = None,
         output_path: t.Optional[str] = None,
+        num_candidates_multiplier: int = 10,
+        batch_size: int = 1000,
+        database: t.Optional['pymongo.database.Database'] = None,
     ):
         self.identifier = identifier
-        vector_search_uri = CFG.cluster.vector_search.uri
-        assert vector_search_uri, 'Vector search URI is required'
-        db_name = vector_search_uri.split('/')[-1]
-        self.database = getattr(pymongo.MongoClient(vector_search_uri), db_name)
+        if database is None:
+            vector_search_uri = CFG.cluster.vector_search.uri
+            assert vector_search_uri, 'Vector search URI is required'
+            db_name = vector_search_uri.split('/')[-1]
+            database = getattr(pymongo.MongoClient(vector_search_uri), db_name)
+        self.database = database
+        self.num_candidates_multiplier = num_candidates_multiplier
+        self.batch_size = batch_size
         assert output_path
         self.output_path = output_path
         self.collection = collection
@@ -95,7 +111,7 @@ class MongoAtlasVectorSearcher(BaseVectorSearcher):
         vector = step['$vectorSearch']['like']
         step['$vectorSearch']['queryVector'] = vector
 
-        step['$vectorSearch']['path'] = self.output_path
+        step['$vectorSearch']['path'] = self._vector_path
         step['$vectorSearch']['index'] = self.identifier
         del step['$vectorSearch']['like']
         return step
@@ -113,29 +129,56 @@ class MongoAtlasVectorSearcher(BaseVectorSearcher):
         )
         return pipeline
 
-    def _find(self, h, n=100):
+    def _find(self, h, n=100, within_ids=None):
         h = self.to_list(h)
+        search = {
+            'like': h,
+            'limit': n,
+            'numCandidates': min(
+                n * self.num_candidates_multiplier, self.MAX_CANDIDATES
+            ),
+        }
+        if within_ids and self._is_external:
+            search['filter'] = {'id': {'$in': list(within_ids)}}
+        elif within_ids:
+            search['filter'] = {'_id': {'$in': [ObjectId(id) for id in within_ids]}}
         pl = [
-            {
-                "$vectorSearch": {
-                    'like': h,
-                    "limit": n,
-                    'numCandidates': n,
-                }
-            },
+            {"$vectorSearch": search},
             {'$addFields': {'score': {'$meta': 'vectorSearchScore'}}},
         ]
         pl = self._prepare_pipeline(
             pl,
         )
         cursor = self.index.aggregate(pl)
+        id_field = 'id' if self._is_external else '_id'
         scores = []
         ids = []
         for vector in cursor:
             scores.append(vector['score'])
-            ids.append(str(vector['_id']))
+            ids.append(str(vector[id_field]))
         return ids, scores
 
+    @property
+    def _is_external(self):
+        # Otherwise the vectors are the outputs stored in the collection itself
+        return CFG.cluster.vector_search.uri != CFG.data_backend
+
+    @property
+    def _vector_path(self):
+        return 'vector' if self._is_external else self.output_path
+
+    def _get_vector(self, id: str):
+        path = self._vector_path
+        if self._is_external:
+            r = self.index.find_one({'id': id}, {path: 1})
+        else:
+            r = self.index.find_one({'_id': ObjectId(id)}, {path: 1})
+        if r is None:
+            raise KeyError(id)
+        for part in path.split('.'):
+            r = r[part]
+        return r
+
     def find_nearest_from_id(self, id: str, n=100, within_ids=None):
         """Find the nearest vectors to the given ID.
 
@@ -143,7 +186,7 @@ class MongoAtlasVectorSearcher(BaseVectorSearcher):
         :param n: number of nearest vectors to return
         :param within_ids: list of IDs to search within
         """
-        h = self.index.find_one({'id': id})
+        h = self._get_vector(id)
         return self.find_nearest_from_array(h, n=n, within_ids=within_ids)
 
     def find_nearest_from_array(self, h, n=100, within_ids=None):
@@ -153,25 +196,43 @@ class MongoAtlasVectorSearcher(BaseVectorSearcher):
         :param n: number of nearest vectors to return
         :param within_ids: list of IDs to search within
         """
-        return self._find(h, n=n)
+        return self._find(h, n=n, within_ids=within_ids)
 
-    def add(self, items):
+    def add(self, items: t.Sequence[VectorItem]):
         """Add vectors to the index.
 
+        Vectors are upserted by id, so that re-running a backfill is safe.
+
         :param items: List of vectors to add
         """
-        items = list(map(lambda x: x.to_dict(), items))
-        if not CFG.cluster.vector_search == CFG.data_backend:
-            self.index.insert_many(items)
+        if not self._is_external:
+            return
+        items = list(items)
+        for i in range(0, len(items), self.batch_size):
+            operations = [
+                pymongo.UpdateOne(
+                    {'id': item.id},
+                    {'$set': {'id': item.id, 'vector': self.to_list(item.vector)}},
+                    upsert=True,
+                )
+                for item in items[i : i + self.batch_size]
+            ]
+            self.index.bulk_write(operations, ordered=False)
 
-    def delete(self, items):
+    def delete(self, ids: t.Sequence[str]):
         """Delete vectors from the index.
 
-        :param items: List of vectors to delete
+        :param ids: List of IDs to delete
         """
-        ids = list(map(lambda x: x.id, items))
-        if not CFG.cluster.vector_search == CFG.data_backend:
-            self.index.delete_many({'id': {'$in': ids}})
+        if not self._is_external:
+            return
+        ids = list(ids)
+        operations = [
+            pymongo.DeleteMany({'id': {'$in': ids[i : i + self.batch_size]}})
+            for i in range(0, len(ids), self.batch_size)
+        ]
+        if operations:
+            self.index.bulk_write(operations, ordered=False)
 
     def _create_index(self, collection: str, output_path: str):
         """
@@ -184,33 +245,40 @@ class MongoAtlasVectorSearcher(BaseVectorSearcher):
         if re.match(r'^_outputs\.[A-Za-z0-9_]+\.[A-Za-z0-9_]+', key):
             key = key.split('.')[1]
 
-        fields4 = {
-            str(version): [
-                {
-                    "dimensions": self.dimensions,
-                    "similarity": self.measure,
-                    "type": "knnVector",
+        vector_field = [
+            {
+                "dimensions": self.dimensions,
+                "similarity": self.measure,
+                "type": "knnVector",
+            }
+        ]
+        if self._is_external:
+            # Vectors are stored by ``add`` with the ids of their documents
+            fields1 = {
+                "id": {"type": "token"},
+                "vector": vector_field,
+            }
+        else:
+            fields4 = {str(version): vector_field}
+            fields3 = {
+                model: {
+                    "fields": fields4,
+                    "type": "document",
                 }
-            ]
-        }
-        fields3 = {
-            model: {
-                "fields": fields4,
-                "type": "document",
             }
-        }
-        fields2 = {
-            key: {
-                "fields": fields3,
-                "type": "document",
+            fields2 = {
+                key: {
+                    "fields": fields3,
+                    "type": "document",
+                }
             }
-        }
-        fields1 = {
-            "_outputs": {
-                "fields": fields2,
-                "type": "document",
+            fields1 = {
+                "_id": {"type": "objectId"},
+                "_outputs": {
+                    "fields": fields2,
+                    "type": "document",
+                },
             }
-        }
         index_definition = {
             "createSearchIndexes": collection,
             "indexes": [
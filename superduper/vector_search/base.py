@@ -118,6 +118,21 @@ class BaseVectorSearcher(ABC):
         :param within_ids: list of ids to search within
         """
 
+    def find_nearest_from_arrays(
+        self,
+        hs: t.Sequence[numpy.typing.ArrayLike],
+        n: int = 100,
+        within_ids: t.Sequence[str] = (),
+    ) -> t.List[t.Tuple[t.List[str], t.List[float]]]:
+        """
+        Find the nearest vectors to each of the given vectors.
+
+        :param hs: vectors
+        :param n: number of nearest vectors to return per vector
+        :param within_ids: list of ids to search within
+        """
+        return [self.find_nearest_from_array(h, n=n, within_ids=within_ids) for h in hs]
+
     def post_create(self):
         """Post create method.
 
@@ -148,7 +148,12 @@ class InMemoryVectorSearcher(BaseVectorSearcher):
         :param ids: List of IDs to delete
         """
         self.post_create()
-        ix = list(map(self.lookup.__getitem__, ids))
+        if self.h is None:
+            return
+        ix = [self.lookup[_id] for _id in ids if _id in self.lookup]
+        if not ix:
+            return
         h = numpy.delete(self.h, ix, axis=0)
-        index = [_id for _id in self.index if _id not in set(ids)]
+        ids = set(ids)
+        index = [_id for _id in self.index if _id not in ids]
         self._setup(h, index)
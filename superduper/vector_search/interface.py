@@ -3,7 +3,8 @@ import typing as t
 import numpy as np
 
 from superduper import CFG
-from superduper.misc.server import request_server
+from superduper.misc import wire
+from superduper.misc.server import request_server, request_server_frames
 from superduper.vector_search.base import BaseVectorSearcher, VectorItem
 
 if t.TYPE_CHECKING:
@@ -57,14 +58,38 @@ class FastVectorSearcher(BaseVectorSearcher):
     def __len__(self):
         return len(self.searcher)
 
+    def _request_frames(self, frames, endpoint):
+        if not CFG.cluster.vector_search.binary_protocol:
+            return None
+        return request_server_frames(
+            service='vector_search',
+            frames=frames,
+            endpoint=endpoint,
+            args={'vector_index': self.vector_index},
+        )
+
+    @staticmethod
+    def _from_frame(frame):
+        scores = frame['scores']
+        if isinstance(scores, np.ndarray):
+            scores = scores.tolist()
+        return list(frame['ids']), scores
+
     def add(self, items: t.Sequence[VectorItem]) -> None:
         """
         Add items to the index.
 
         :param items: t.Sequence of VectorItems
         """
-        vector_items = [{'vector': i.vector, 'id': i.id} for i in items]
         if CFG.cluster.vector_search.uri is not None:
+            frames = wire.vector_frames(
+                [i.id for i in items],
+                [i.vector for i in items],
+                frame_size=CFG.cluster.vector_search.frame_size,
+            )
+            if self._request_frames(frames, 'add/search') is not None:
+                return
+            vector_items = [{'vector': i.vector, 'id': i.id} for i in items]
             request_server(
                 service='vector_search',
                 data=vector_items,
@@ -83,6 +108,12 @@ class FastVectorSearcher(BaseVectorSearcher):
         :param ids: t.Sequence of ids of vectors.
         """
         if CFG.cluster.vector_search.uri is not None:
+            size = CFG.cluster.vector_search.frame_size
+            frames = (
+                {'ids': list(ids[i : i + size])} for i in range(0, len(ids), size)
+            )
+            if self._request_frames(frames, 'delete/search') is not None:
+                return
             request_server(
                 service='vector_search',
                 data=ids,
@@ -132,6 +163,12 @@ class FastVectorSearcher(BaseVectorSearcher):
         :param within_ids: list of ids to search within
         """
         if CFG.cluster.vector_search.uri is not None:
+            frame = {'vectors': self.to_numpy(h)[None], 'n': n}
+            if within_ids:
+                frame['within_ids'] = list(within_ids)
+            responses = self._request_frames([frame], 'query/search')
+            if responses is not None:
+                return self._from_frame(responses[0])
             response = request_server(
                 service='vector_search',
                 data=h,
@@ -142,6 +179,33 @@ class FastVectorSearcher(BaseVectorSearcher):
 
         return self.searcher.find_nearest_from_array(h=h, n=n, within_ids=within_ids)
 
+    def find_nearest_from_arrays(
+        self,
+        hs: t.Sequence[np.typing.ArrayLike],
+        n: int = 100,
+        within_ids: t.Sequence[str] = (),
+    ) -> t.List[t.Tuple[t.List[str], t.List[float]]]:
+        """
+        Find the nearest vectors to each of the given vectors.
+
+        :param hs: vectors
+        :param n: number of nearest vectors to return per vector
+        :param within_ids: list of ids to search within
+        """
+        if CFG.cluster.vector_search.uri is not None:
+            frame = {
+                'vectors': np.stack([self.to_numpy(h) for h in hs]),
+                'n': n,
+            }
+            if within_ids:
+                frame['within_ids'] = list(within_ids)
+            responses = self._request_frames([frame], 'query/batch/search')
+            if responses is not None:
+                return [self._from_frame(r) for r in responses]
+            return super().find_nearest_from_arrays(hs, n=n, within_ids=within_ids)
+
+        return self.searcher.find_nearest_from_arrays(hs, n=n, within_ids=within_ids)
+
     def post_create(self):
         """Post create method for vector searcher."""
         if CFG.cluster.is_remote_vector_search:
@@ -1,11 +1,14 @@
+import concurrent.futures
+import math
 import os
+import threading
 import typing as t
 
 import lance
 import numpy as np
 import pyarrow as pa
 
-from superduper import CFG
+from superduper import CFG, logging
 from superduper.vector_search.base import (
     BaseVectorSearcher,
     VectorIndexMeasureType,
@@ -24,6 +27,16 @@ class LanceVectorSearcher(BaseVectorSearcher):
     :param measure: measure to assess similarity
     """
 
+    # Number of rows from which an IVF_PQ index is built
+    INDEX_THRESHOLD = 100_000
+    # Unindexed fraction of rows at which the IVF_PQ index is rebuilt,
+    # when ``lance`` cannot optimize indices incrementally
+    REINDEX_FRACTION = 0.2
+    # Number of fragments above which the dataset is compacted
+    MAX_FRAGMENTS = 32
+    # Number of ids per delete statement
+    DELETE_BATCH_SIZE = 1000
+
     def __init__(
         self,
         identifier: str,
@@ -37,6 +50,15 @@ class LanceVectorSearcher(BaseVectorSearcher):
         self.measure = (
             measure.name if isinstance(measure, VectorIndexMeasureType) else measure
         )
+        self.nprobes = 20
+        self.refine_factor = 10
+        self._indexed_rows = 0
+        self._lock = threading.RLock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='superduper-lance'
+        )
+        self._maintenance: t.Optional[concurrent.futures.Future] = None
+        self._dataset = None
         if h is not None:
             if not os.path.exists(self.dataset_path):
                 os.makedirs(self.dataset_path, exist_ok=True)
@@ -44,10 +66,20 @@ class LanceVectorSearcher(BaseVectorSearcher):
 
     @property
     def dataset(self):
-        """Return the Lance dataset."""
-        if not os.path.exists(self.dataset_path):
-            self._create_or_append_to_dataset([], [], mode='create')
-        return lance.dataset(self.dataset_path)
+        """Return the Lance dataset.
+
+        The dataset is opened once and reopened only when its latest
+        version changes, whether written to by this searcher or by another
+        process.
+        """
+        dataset = self._dataset
+        if dataset is not None and dataset.latest_version != dataset.version:
+            dataset = None
+        if dataset is None:
+            if not os.path.exists(self.dataset_path):
+                self._create_or_append_to_dataset([], [], mode='create')
+            dataset = self._dataset = lance.dataset(self.dataset_path)
+        return dataset
 
     def __len__(self):
         return self.dataset.count_rows()
@@ -61,30 +93,115 @@ class LanceVectorSearcher(BaseVectorSearcher):
         _ids = pa.array(ids, type=pa.string())
         _table = pa.Table.from_arrays([_ids, _vecs], names=['id', 'vector'])
 
-        if mode == 'upsert':
-            dataset = lance.dataset(self.dataset_path)
-            dataset.merge_insert(
+        if mode == 'upsert' and hasattr(self.dataset, 'merge_insert'):
+            self.dataset.merge_insert(
                 "id"
             ).when_matched_update_all().when_not_matched_insert_all().execute(_table)
+        elif mode == 'upsert':
+            # Older versions of lance have no ``merge_insert``
+            for i in range(0, len(ids), self.DELETE_BATCH_SIZE):
+                batch = ids[i : i + self.DELETE_BATCH_SIZE]
+                self.dataset.delete(f'id IN {_sql_tuple(batch)}')
+            lance.write_dataset(_table, self.dataset_path, mode='append')
         else:
             lance.write_dataset(_table, self.dataset_path, mode=mode)
+        self._dataset = None
 
     def add(self, items: t.Sequence[VectorItem]) -> None:
         """Add vectors to the index.
 
+        Vectors with existing ids are replaced. Fragments are compacted and
+        the vector index is built or refreshed in the background.
+
         :param items: List of vectors to add
         """
         ids = [item.id for item in items]
         vectors = [item.vector for item in items]
-        self._create_or_append_to_dataset(vectors, ids, mode='append')
+        with self._lock:
+            if os.path.exists(self.dataset_path):
+                self._create_or_append_to_dataset(vectors, ids, mode='upsert')
+            else:
+                self._create_or_append_to_dataset(vectors, ids, mode='create')
+        self._schedule_maintenance()
 
     def delete(self, ids: t.Sequence[str]) -> None:
         """Delete vectors from the index.
 
         :param ids: List of IDs to delete
         """
-        to_remove = ", ".join(f"'{str(id)}'" for id in ids)
-        self.dataset.delete(f"id IN ({to_remove})")
+        ids = list(ids)
+        with self._lock:
+            dataset = self.dataset
+            for i in range(0, len(ids), self.DELETE_BATCH_SIZE):
+                batch = ids[i : i + self.DELETE_BATCH_SIZE]
+                # Rows are marked in deletion vectors and dropped on compaction
+                dataset.delete(f'id IN {_sql_tuple(batch)}')
+            self._dataset = None
+        self._schedule_maintenance()
+
+    def post_create(self):
+        """Compact the dataset and build the vector index after a backfill."""
+        if self._maintenance is not None:
+            self._maintenance.result()
+        self._maintain()
+
+    def _schedule_maintenance(self):
+        if self._maintenance is not None and not self._maintenance.done():
+            return
+        self._maintenance = self._executor.submit(self._maintain_in_background)
+
+    def _maintain_in_background(self):
+        try:
+            self._maintain()
+        except Exception as e:
+            logging.warn(f'Maintenance of {self.dataset_path} failed: {e}')
+
+    def _maintain(self):
+        with self._lock:
+            dataset = self.dataset
+            if len(dataset.get_fragments()) > self.MAX_FRAGMENTS:
+                dataset.optimize.compact_files()
+                self._dataset = None
+                dataset = self.dataset
+
+            n_rows = dataset.count_rows()
+            indexed = self._indexed_columns(dataset)
+            if n_rows < self.INDEX_THRESHOLD:
+                return
+            if 'vector' not in indexed:
+                self._create_vector_index(dataset, n_rows)
+            elif hasattr(dataset.optimize, 'optimize_indices'):
+                dataset.optimize.optimize_indices()
+                self._indexed_rows = n_rows
+            elif n_rows - self._indexed_rows > self.REINDEX_FRACTION * n_rows:
+                self._create_vector_index(dataset, n_rows)
+
+            if 'id' not in indexed and hasattr(dataset, 'create_scalar_index'):
+                dataset.create_scalar_index('id', index_type='BTREE')
+            self._dataset = None
+
+    def _create_vector_index(self, dataset, n_rows: int):
+        num_sub_vectors = next(
+            (
+                m
+                for m in (96, 64, 48, 32, 16, 8, 4, 2)
+                if self.dimensions % m == 0 and self.dimensions // m >= 8
+            ),
+            1,
+        )
+        dataset.create_index(
+            'vector',
+            index_type='IVF_PQ',
+            metric=self.measure or 'l2',
+            num_partitions=max(1, int(math.sqrt(n_rows))),
+            num_sub_vectors=num_sub_vectors,
+            replace=True,
+        )
+        self._indexed_rows = n_rows
+
+    @staticmethod
+    def _indexed_columns(dataset) -> t.Set[str]:
+        return {field for index in dataset.list_indices() for field in index['fields']}
 
     def find_nearest_from_id(
         self,
@@ -98,16 +215,13 @@ class LanceVectorSearcher(BaseVectorSearcher):
         :param n: Number of results to return
         :param within_ids: List of IDs to search within
         """
-        # The ``lance`` file format has been specifically designed for fast
-        # random access. The logic to take advantage of this is implemented
-        # by the ``.take`` method.
-
-        # See https://blog.lancedb.com/benchmarking-random-access-in-lance-ed690757a826
-        # for further details.
-
-        vector = self.dataset.take([int(_id)], columns=['vector']).to_pydict()[
-            'vector'
-        ][0]
+        # Served by the scalar index on ``id`` once it exists
+        result = self.dataset.to_table(
+            columns=['vector'], filter=f'id = {_sql_literal(_id)}'
+        )
+        if not result.num_rows:
+            raise KeyError(_id)
+        vector = result['vector'][0].as_py()
         return self.find_nearest_from_array(vector, n=n, within_ids=within_ids)
 
     def find_nearest_from_array(
@@ -122,32 +236,50 @@ class LanceVectorSearcher(BaseVectorSearcher):
         :param n: Number of results to return
         :param within_ids: List of IDs to search within
         """
-        # NOTE: filter is currently applied AFTER vector-search
-        # See https://lancedb.github.io/lance/api/python/lance.html#lance.dataset.LanceDataset.scanner
-        if within_ids:
-            if isinstance(within_ids, (list, set)):
-                within_ids = tuple(within_ids)
-            assert (
-                type(within_ids) == tuple
-            ), 'within_ids must be a [tuple | list | set] for lance sql parser'
-            result = self.dataset.to_table(
+        return self._search(self.dataset, h, n=n, filter=_id_filter(within_ids))
+
+    def find_nearest_from_arrays(
+        self,
+        hs: t.Sequence[np.typing.ArrayLike],
+        n: int = 100,
+        within_ids: t.Sequence[str] = (),
+    ) -> t.List[t.Tuple[t.List[str], t.List[float]]]:
+        """Find the nearest vectors to each of several vectors.
+
+        The searches share one dataset version and id filter, and run
+        concurrently, since ``lance`` releases the GIL while scanning.
+
+        :param hs: Vectors to search
+        :param n: Number of results to return per vector
+        :param within_ids: List of IDs to search within
+        """
+        dataset = self.dataset
+        filter = _id_filter(within_ids)
+        max_workers = min(len(hs), os.cpu_count() or 1) or 1
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(
+                pool.map(lambda h: self._search(dataset, h, n=n, filter=filter), hs)
+            )
+
+    def _search(self, dataset, h, n: int, filter=None):
+        nearest = {
+            'column': 'vector',
+            'q': h,
+            'k': n,
+            'metric': self.measure,
+            'nprobes': self.nprobes,
+            'refine_factor': self.refine_factor,
+        }
+        if filter is not None:
+            result = dataset.to_table(
                 columns=['id'],
-                nearest={
-                    'column': 'vector',
-                    'q': h,
-                    'k': n,
-                    'metric': self.measure,
-                },
-                filter=f"id in {within_ids}",
+                nearest=nearest,
+                filter=filter,
                 prefilter=True,
                 offset=0,
             )
         else:
-            result = self.dataset.to_table(
-                columns=['id'],
-                nearest={"column": 'vector', "q": h, "k": n, 'metric': self.measure},
-                offset=0,
-            )
+            result = dataset.to_table(columns=['id'], nearest=nearest, offset=0)
         ids = result['id'].to_pylist()
         distances = result['_distance'].to_pylist()
         scores = self._convert_distances_to_scores(distances)
@@ -164,3 +296,18 @@ class LanceVectorSearcher(BaseVectorSearcher):
             scores = distances
 
         return scores
+
+
+def _sql_literal(id: str) -> str:
+    escaped = str(id).replace("'", "''")
+    return f"'{escaped}'"
+
+
+def _id_filter(ids: t.Sequence[str]) -> t.Optional[str]:
+    if not len(ids):
+        return None
+    return f'id IN {_sql_tuple(ids)}'
+
+
+def _sql_tuple(ids: t.Iterable[str]) -> str:
+    return f"({', '.join(map(_sql_literal, ids))})"
@@ -0,0 +1,209 @@
+import typing as t
+
+import numpy
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from superduper import CFG
+from superduper.base.datalayer import Datalayer
+from superduper.misc import wire
+from superduper.misc.server import server_request_decoder
+from superduper.server.app import SuperDuperApp, port_from_uri
+from superduper.vector_search.server.service import (
+    ReadOnlyReplica,
+    VectorSearchService,
+)
+
+
+def _service(request: Request) -> VectorSearchService:
+    return request.app.state.service
+
+
+async def _read(request: Request) -> t.Tuple[t.Optional[t.List[t.Dict]], t.Any]:
+    """Read the frames, or else the JSON data, of a request."""
+    body = await request.body()
+    if request.headers.get('content-type', '').startswith(wire.CONTENT_TYPE):
+        return list(wire.decode_frames(body)), None
+    if not body:
+        return None, None
+    data = await request.json()
+    if isinstance(data, dict) and '_b64data' in data:
+        data = server_request_decoder(data)
+    return None, data
+
+
+def _results(request: Request, results, single: bool = False) -> Response:
+    if wire.accepts_frames(request.headers.get('accept')):
+        frames = [
+            {'ids': ids, 'scores': numpy.asarray(scores, dtype=numpy.float32)}
+            for ids, scores in results
+        ]
+        return Response(
+            b''.join(wire.encode_frames(frames)), media_type=wire.CONTENT_TYPE
+        )
+    out = [{'ids': list(ids), 'scores': list(scores)} for ids, scores in results]
+    return JSONResponse(out[0] if single else out)
+
+
+def build_app(
+    db: t.Optional[Datalayer] = None,
+    replica: t.Optional[bool] = None,
+    fetch: t.Optional[t.Callable[[int, t.Optional[str]], bytes]] = None,
+) -> SuperDuperApp:
+    """Build the vector search service application.
+
+    :param db: Datalayer to serve, built from ``CFG`` by default
+    :param replica: Whether the service is a read replica,
+                    ``CFG.cluster.vector_search.replica`` by default
+    :param fetch: Function fetching the operations of the primary,
+                  see ``VectorSearchService``
+    """
+    if replica is None:
+        replica = CFG.cluster.vector_search.replica
+
+    def init_hook(db: Datalayer):
+        service = VectorSearchService(
+            db,
+            replica=replica,
+            primary_uri=CFG.cluster.vector_search.write_uri,
+            fetch=fetch,
+        )
+        app.app.state.service = service
+        service.start()
+
+    def shutdown_hook(db: Datalayer):
+        app.app.state.service.stop()
+
+    app = SuperDuperApp(
+        'vector_search',
+        port=port_from_uri(CFG.cluster.vector_search.uri),
+        db=db,
+        init_hook=init_hook,
+        shutdown_hook=shutdown_hook,
+        frames=True,
+    )
+
+    @app.app.exception_handler(KeyError)
+    async def unknown_key(request: Request, e: KeyError):
+        return JSONResponse({'detail': str(e)}, status_code=400)
+
+    @app.app.exception_handler(ReadOnlyReplica)
+    async def read_only(request: Request, e: ReadOnlyReplica):
+        return JSONResponse({'detail': str(e)}, status_code=403)
+
+    @app.add('/health', method='get')
+    def health(request: Request):
+        service = _service(request)
+        return {
+            'replica': service.replica,
+            'epoch': service.epoch,
+            'seq': service._seq,
+            'vector_indexes': service.list(),
+        }
+
+    @app.add('/list/search', method='get')
+    def list_search(request: Request):
+        return _service(request).list()
+
+    @app.add('/create/search', method='get')
+    def create_search(request: Request, vector_index: str):
+        _service(request).create(vector_index)
+
+    @app.add('/drop/search')
+    def drop_search(request: Request, vector_index: str):
+        _service(request).drop(vector_index)
+
+    @app.add('/query/post_create', method='get')
+    def post_create(request: Request, vector_index: str):
+        _service(request).post_create(vector_index)
+
+    @app.add('/add/search')
+    async def add_search(request: Request, vector_index: str):
+        service = _service(request)
+        frames, data = await _read(request)
+        if frames is None:
+            data = data or []
+            frames = (
+                [
+                    {
+                        'ids': [str(r['id']) for r in data],
+                        'vectors': numpy.stack(
+                            [numpy.asarray(r['vector']) for r in data]
+                        ),
+                    }
+                ]
+                if data
+                else []
+            )
+        for frame in frames:
+            await run_in_threadpool(
+                service.add, vector_index, frame['ids'], frame['vectors']
+            )
+
+    @app.add('/delete/search')
+    async def delete_search(request: Request, vector_index: str):
+        service = _service(request)
+        frames, data = await _read(request)
+        if frames is None:
+            frames = [{'ids': data or []}]
+        for frame in frames:
+            await run_in_threadpool(service.delete, vector_index, frame['ids'])
+
+    @app.add('/query/id/search')
+    async def query_id_search(
+        request: Request, vector_index: str, id: str, n: int = 100
+    ):
+        service = _service(request)
+        result = await run_in_threadpool(service.query_id, vector_index, id, n)
+        return _results(request, [result], single=True)
+
+    @app.add('/query/search')
+    async def query_search(request: Request, vector_index: str, n: int = 100):
+        service = _service(request)
+        frames, data = await _read(request)
+        if frames is None:
+            frame = {'vectors': numpy.asarray(data)[None], 'n': n}
+        else:
+            frame = frames[0]
+        results = await run_in_threadpool(
+            service.query,
+            vector_index,
+            frame['vectors'],
+            frame.get('n', n),
+            frame.get('within_ids', ()),
+        )
+        return _results(request, results, single=True)
+
+    @app.add('/query/batch/search')
+    async def query_batch_search(request: Request, vector_index: str, n: int = 100):
+        service = _service(request)
+        frames, _ = await _read(request)
+        if frames is None:
+            raise HTTPException(
+                status_code=415, detail='Batched queries must be sent as frames'
+            )
+        results = []
+        for frame in frames:
+            results.extend(
+                await run_in_threadpool(
+                    service.query,
+                    vector_index,
+                    frame['vectors'],
+                    frame.get('n', n),
+                    frame.get('within_ids', ()),
+                )
+            )
+        return _results(request, results)
+
+    @app.add('/changes', method='get')
+    def changes(request: Request, since: int = -1, epoch: str = ''):
+        frames = _service(request).changes(since, epoch or None)
+        return StreamingResponse(
+            wire.encode_frames(frames), media_type=wire.CONTENT_TYPE
+        )
+
+    return app
+
+
+app = build_app()
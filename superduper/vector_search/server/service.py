@@ -0,0 +1,332 @@
+import dataclasses as dc
+import threading
+import typing as t
+import uuid
+from collections import deque
+
+import numpy
+
+from superduper import CFG, logging
+from superduper.backends.base.backends import vector_searcher_implementations
+from superduper.misc import http_session, wire
+from superduper.vector_search.base import BaseVectorSearcher, VectorItem
+
+if t.TYPE_CHECKING:
+    from superduper.base.datalayer import Datalayer
+
+
+class ReadOnlyReplica(Exception):
+    """
+    Exception raised when writing to a read replica.
+
+    :param args: *args for Exception
+    :param kwargs: **kwargs for Exception
+    """
+
+
+@dc.dataclass
+class _Operation:
+    seq: int
+    type: str
+    vector_index: str
+    ids: t.List[str] = dc.field(default_factory=list)
+    vectors: t.Optional[numpy.ndarray] = None
+
+    def to_frame(self):
+        frame = {
+            'seq': self.seq,
+            'type': self.type,
+            'vector_index': self.vector_index,
+            'ids': self.ids,
+        }
+        if self.vectors is not None:
+            frame['vectors'] = self.vectors
+        return frame
+
+
+class VectorSearchService:
+    """Vector indexes of a datalayer, served to ``FastVectorSearcher`` clients.
+
+    Writes are recorded in a bounded log of operations. A replica follows the
+    log of the primary service, so that reads can be balanced over several
+    replicas while writes go to the primary. A replica which is new, or too
+    far behind the primary, rebuilds its vector indexes from the database.
+
+    :param db: Datalayer holding the vector indexes
+    :param replica: Whether the service is a read replica
+    :param primary_uri: URI of the primary service followed by a replica
+    :param log_size: Maximum number of ids in the operations kept for replicas
+    :param fetch: Function of the last applied sequence number and epoch of
+                  the primary returning the frames of the next operations,
+                  by default requested from ``primary_uri``
+    """
+
+    def __init__(
+        self,
+        db: 'Datalayer',
+        replica: bool = False,
+        primary_uri: t.Optional[str] = None,
+        log_size: int = 100_000,
+        fetch: t.Optional[t.Callable[[int, t.Optional[str]], bytes]] = None,
+    ):
+        if replica and primary_uri is None and fetch is None:
+            raise ValueError('A replica needs the URI of the primary service')
+        self.db = db
+        self.db.server_mode = True
+        self.replica = replica
+        self.primary_uri = primary_uri
+        self.fetch = fetch or self._fetch
+        self.epoch = uuid.uuid4().hex
+        self.searchers: t.Dict[str, BaseVectorSearcher] = {}
+        self._index_locks: t.Dict[str, threading.RLock] = {}
+        self.log_size = log_size
+        self._log: t.Deque[_Operation] = deque()
+        self._log_ids = 0
+        self._seq = 0
+        self._lock = threading.RLock()
+        self._cursor: t.Tuple[t.Optional[str], int] = (None, -1)
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+
+    def start(self):
+        """Load the vector indexes, and follow the primary if a replica."""
+        if not self.replica:
+            for identifier in self.db.show('vector_index'):
+                self.create(identifier)
+            return
+        self.sync()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sync_forever, daemon=True, name='vector-search-sync'
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop following the primary."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def list(self) -> t.List[str]:
+        """List the loaded vector indexes."""
+        return list(self.searchers)
+
+    def _check_writable(self):
+        if self.replica:
+            raise ReadOnlyReplica(
+                'Writes must be sent to the primary vector search service'
+            )
+
+    def _searcher(self, vector_index: str):
+        try:
+            return self.searchers[vector_index], self._index_locks[vector_index]
+        except KeyError:
+            raise KeyError(f'Vector index {vector_index} is not loaded')
+
+    def _record(self, type: str, vector_index: str, ids=(), vectors=None):
+        with self._lock:
+            self._seq += 1
+            self._log.append(
+                _Operation(self._seq, type, vector_index, list(ids), vectors)
+            )
+            self._log_ids += len(ids)
+            while self._log_ids > self.log_size and len(self._log) > 1:
+                self._log_ids -= len(self._log.popleft().ids)
+
+    def _load(self, vector_index: str) -> BaseVectorSearcher:
+        vi = self.db.vector_indices.force_load(vector_index)
+        searcher_cls = vector_searcher_implementations[CFG.cluster.vector_search.type]
+        searcher = searcher_cls.from_component(vi)
+        self.db.backfill_vector_search(vi, searcher)
+        return searcher
+
+    def create(self, vector_index: str):
+        """Load a vector index, and its vectors from the database.
+
+        :param vector_index: Identifier of the vector index
+        """
+        self._check_writable()
+        if vector_index in self.searchers:
+            return
+        searcher = self._load(vector_index)
+        with self._lock:
+            self.searchers[vector_index] = searcher
+            self._index_locks[vector_index] = threading.RLock()
+            self._record('create', vector_index)
+
+    def drop(self, vector_index: str):
+        """Unload a vector index.
+
+        :param vector_index: Identifier of the vector index
+        """
+        self._check_writable()
+        with self._lock:
+            self.searchers.pop(vector_index, None)
+            self._index_locks.pop(vector_index, None)
+            self._record('drop', vector_index)
+
+    def add(self, vector_index: str, ids: t.Sequence[str], vectors: numpy.ndarray):
+        """Add or replace vectors.
+
+        :param vector_index: Identifier of the vector index
+        :param ids: Ids of the vectors
+        :param vectors: Vectors, one per row
+        """
+        self._check_writable()
+        searcher, lock = self._searcher(vector_index)
+        with lock:
+            searcher.add([VectorItem(id=i, vector=v) for i, v in zip(ids, vectors)])
+            self._record('add', vector_index, ids, vectors)
+
+    def delete(self, vector_index: str, ids: t.Sequence[str]):
+        """Delete vectors.
+
+        :param vector_index: Identifier of the vector index
+        :param ids: Ids of the vectors
+        """
+        self._check_writable()
+        searcher, lock = self._searcher(vector_index)
+        with lock:
+            searcher.delete(list(ids))
+            self._record('delete', vector_index, ids)
+
+    def post_create(self, vector_index: str):
+        """Incorporate the added vectors in the index.
+
+        :param vector_index: Identifier of the vector index
+        """
+        searcher, lock = self._searcher(vector_index)
+        with lock:
+            searcher.post_create()
+
+    def query(
+        self,
+        vector_index: str,
+        vectors: t.Sequence[numpy.ndarray],
+        n: int = 100,
+        within_ids: t.Sequence[str] = (),
+    ) -> t.List[t.Tuple[t.List[str], t.List[float]]]:
+        """Find the nearest vectors to each of a batch of vectors.
+
+        :param vector_index: Identifier of the vector index
+        :param vectors: Vectors to search
+        :param n: Number of nearest vectors to return per vector
+        :param within_ids: Ids to search within
+        """
+        searcher, lock = self._searcher(vector_index)
+        with lock:
+            return searcher.find_nearest_from_arrays(
+                list(vectors), n=n, within_ids=within_ids
+            )
+
+    def query_id(
+        self, vector_index: str, id: str, n: int = 100
+    ) -> t.Tuple[t.List[str], t.List[float]]:
+        """Find the nearest vectors to the vector of an id.
+
+        :param vector_index: Identifier of the vector index
+        :param id: Id of the vector
+        :param n: Number of nearest vectors to return
+        """
+        searcher, lock = self._searcher(vector_index)
+        with lock:
+            return searcher.find_nearest_from_id(id, n=n)
+
+    def changes(
+        self, since: int, epoch: t.Optional[str] = None
+    ) -> t.Iterator[t.Dict[str, t.Any]]:
+        """Frames of the operations after a sequence number, for replicas.
+
+        The first frame holds the current sequence number, and whether the
+        replica must rebuild its vector indexes from the database, because
+        it follows another epoch of the primary or missed operations.
+
+        :param since: Last sequence number applied by the replica
+        :param epoch: Epoch of the primary followed by the replica
+        """
+        with self._lock:
+            operations = list(self._log)
+            seq = self._seq
+            indexes = list(self.searchers)
+        first = operations[0].seq if operations else seq + 1
+        reset = epoch != self.epoch or since > seq or since < first - 1
+        yield {'epoch': self.epoch, 'seq': seq, 'reset': reset, 'indexes': indexes}
+        if not reset:
+            for operation in operations:
+                if operation.seq > since:
+                    yield operation.to_frame()
+
+    def _fetch(self, since: int, epoch: t.Optional[str]) -> bytes:
+        assert self.primary_uri is not None
+        uri = 'http://' + ''.join(self.primary_uri.split('://')[1:])
+        response = http_session.request(
+            'get',
+            f'{uri}/changes',
+            params={'since': since, 'epoch': epoch or ''},
+            headers={'Accept': wire.CONTENT_TYPE},
+        )
+        response.raise_for_status()
+        return response.content
+
+    def sync(self) -> int:
+        """Apply the new operations of the primary, returning their number."""
+        with self._sync_lock:
+            return self._sync()
+
+    def _sync(self) -> int:
+        epoch, since = self._cursor
+        frames = wire.decode_frames(self.fetch(since, epoch))
+        header = next(frames)
+        if header['reset']:
+            logging.info('Rebuilding vector indexes from the database')
+            searchers = {vi: self._load(vi) for vi in header['indexes']}
+            with self._lock:
+                self.searchers = searchers
+                self._index_locks = {vi: threading.RLock() for vi in searchers}
+            self._cursor = (header['epoch'], header['seq'])
+            return 0
+
+        applied = 0
+        touched = set()
+        for frame in frames:
+            self._apply(frame)
+            touched.add(frame['vector_index'])
+            self._cursor = (header['epoch'], frame['seq'])
+            applied += 1
+        for vector_index in touched & set(self.searchers):
+            self.post_create(vector_index)
+        self._cursor = (header['epoch'], header['seq'])
+        return applied
+
+    def _apply(self, frame: t.Dict[str, t.Any]):
+        vector_index = frame['vector_index']
+        if frame['type'] == 'drop':
+            with self._lock:
+                self.searchers.pop(vector_index, None)
+                self._index_locks.pop(vector_index, None)
+            return
+        if vector_index not in self.searchers:
+            searcher = self._load(vector_index)
+            with self._lock:
+                self.searchers[vector_index] = searcher
+                self._index_locks[vector_index] = threading.RLock()
+        searcher, lock = self._searcher(vector_index)
+        with lock:
+            if frame['type'] == 'add':
+                searcher.add(
+                    [
+                        VectorItem(id=i, vector=v)
+                        for i, v in zip(frame['ids'], frame['vectors'])
+                    ]
+                )
+            elif frame['type'] == 'delete':
+                searcher.delete(frame['ids'])
+
+    def _sync_forever(self):
+        while not self._stop.wait(CFG.cluster.vector_search.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                logging.error(f'Error syncing with the primary vector search: {e}')
@@ -124,6 +124,50 @@ def test_execute_like_queries_mongodb(db):
     assert result[0]['_id'] == ObjectId(r['_id'])
 
 
+def test_execute_post_like_with_filter_mongodb(db):
+    collection = MongoQuery(table='documents', db=db)
+    r = collection.find_one({}).do_execute(db)
+
+    # The candidates passing the filter are returned
+    n_train = len(list(collection.find({'_fold': 'train'}).do_execute(db)))
+    q = collection.find({'_fold': 'train'}).like(
+        Document({'x': r['x']}), vector_index='test_vector_search', n=3
+    )
+    result = list(q.do_execute(db))
+    assert len(result) == min(3, n_train)
+    assert all(d['_fold'] == 'train' for d in result)
+
+    # Too few candidates pass, so the search is within the filtered ids
+    ids = [d['_id'] for d in collection.find({}, {'_id': 1}).do_execute(db)][-2:]
+    q = collection.find({'_id': {'$in': ids}}).like(
+        Document({'x': r['x']}), vector_index='test_vector_search', n=3
+    )
+    result = q.do_execute(db)
+    assert sorted(d['_id'] for d in result) == sorted(ids)
+    assert set(result.scores) == {str(id) for id in ids}
+
+
+def test_execute_post_like_with_outputs_filter_mongodb(db, monkeypatch):
+    collection = MongoQuery(table='documents', db=db)
+    r = collection.find_one({}).do_execute(db)
+
+    calls = []
+    select_nearest = db.select_nearest
+
+    def _select_nearest(*args, **kwargs):
+        calls.append(kwargs.get('ids'))
+        return select_nearest(*args, **kwargs)
+
+    monkeypatch.setattr(db, 'select_nearest', _select_nearest)
+    q = collection.find({'_outputs.vector-y': {'$exists': True}}).like(
+        Document({'x': r['x']}), vector_index='test_vector_search', n=3
+    )
+    result = list(q.do_execute(db))
+    assert len(result) == 3
+    # The candidates all have outputs, so there is no fallback search
+    assert calls == [None]
+
+
 @pytest.mark.parametrize("db", [DBConfig.sqldb], indirect=True)
 def test_execute_like_queries_sqldb(db):
     table = db.load('table', 'documents')
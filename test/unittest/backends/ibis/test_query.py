@@ -138,6 +138,40 @@ def test_insert_select(db):
     assert all(all([k in ['id', 'x', 'y'] for k in x.unpack().keys()]) for x in r)
 
 
+@pytest.mark.skipif(not torch, reason='Torch not installed')
+@pytest.mark.parametrize(
+    "db",
+    [
+        (DBConfig.sqldb_data, {'n_data': 5}),
+    ],
+    indirect=True,
+)
+def test_insert_select_encodes_columns(db, monkeypatch):
+    from superduper.components.datatype import DataType
+
+    calls = []
+    for method in ('encode_many', 'decode_many'):
+        original = getattr(DataType, method)
+
+        def wrapped(self, items, *args, _method=method, _original=original):
+            calls.append((_method, self.identifier, len(items)))
+            return _original(self, items, *args)
+
+        monkeypatch.setattr(DataType, method, wrapped)
+
+    xs = [torch.randn(32) for _ in range(3)]
+    documents = [Document({'x': x, 'y': 100 + i, 'z': x}) for i, x in enumerate(xs)]
+    db.execute(db['documents'].insert(documents))
+    # The tensors of all rows are encoded, then decoded, at once
+    assert ('encode_many', 'torch-float32[32]', 3) in calls
+
+    t = db['documents']
+    r = list(db.execute(t.select('id', 'x', 'y').filter(t.y >= 100)))
+    assert ('decode_many', 'torch-float32[32]', 3) in calls
+    decoded = {d['y']: d.unpack()['x'] for d in r}
+    assert all(torch.equal(decoded[100 + i], x) for i, x in enumerate(xs))
+
+
 @pytest.mark.skipif(not torch, reason='Torch not installed')
 @pytest.mark.parametrize(
     "db",
@@ -209,3 +243,25 @@ def test_post_like(db):
     s = list(db.execute(query))
     assert len(s) == 2
     assert all([d['id'] in ['1', '2', '3'] for d in s])
+
+
+@pytest.mark.skipif(not torch, reason='Torch not installed')
+@pytest.mark.parametrize(
+    "db",
+    [
+        (DBConfig.sqldb_data, {'n_data': 5}),
+    ],
+    indirect=True,
+)
+def test_select_using_keys(db):
+    t = db['documents']
+    ids = [r['id'] for r in db.execute(t.select('id'))][:3]
+
+    q = t.select().select_using_ids(ids).select_using_keys(['x'])
+    r = list(db.execute(q))
+    assert len(r) == 3
+    assert all(sorted(x.unpack().keys()) == ['id', 'x'] for x in r)
+
+    # Unknown columns leave the query unchanged
+    q = t.select().select_using_keys(['x', 'missing'])
+    assert q.parts == t.select().parts
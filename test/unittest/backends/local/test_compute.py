@@ -0,0 +1,101 @@
+import threading
+import time
+from test.db_config import DBConfig
+
+import pytest
+
+from superduper.backends.local.compute import LocalPoolComputeBackend
+from superduper.backends.mongodb.query import MongoQuery
+from superduper.components.listener import Listener
+from superduper.components.model import ObjectModel
+
+
+def _record(value, log, delay=0.0, **kwargs):
+    time.sleep(delay)
+    log.append(value)
+    return value
+
+
+def test_submit_returns_future():
+    compute = LocalPoolComputeBackend(max_workers=2)
+    future = compute.submit(_record, 1, [], delay=0.2, job_id='a')
+    assert compute.result('a') == 1
+    assert future.result() == 1
+    # Completed jobs are forgotten, once their callbacks have run
+    for _ in range(50):
+        if not compute.tasks:
+            break
+        time.sleep(0.01)
+    assert compute.tasks == {}
+    compute.shutdown()
+
+
+def test_dependencies_are_respected():
+    compute = LocalPoolComputeBackend(max_workers=4)
+    log = []
+    first = compute.submit(_record, 'first', log, delay=0.2, job_id='first')
+    compute.submit(_record, 'second', log, job_id='second', dependencies=('first',))
+    compute.submit(_record, 'third', log, job_id='third', dependencies=[first])
+    compute.wait_all()
+    assert log[0] == 'first'
+    assert set(log) == {'first', 'second', 'third'}
+    compute.shutdown()
+
+
+def test_failed_dependency_propagates():
+    compute = LocalPoolComputeBackend(max_workers=2)
+
+    def fail(**kwargs):
+        raise ValueError('boom')
+
+    event = threading.Event()
+    compute.submit(fail, job_id='fail')
+    child = compute.submit(
+        lambda **kwargs: event.set(), job_id='child', dependencies=['fail']
+    )
+    compute.wait_all()
+    with pytest.raises(ValueError):
+        child.result()
+    assert not event.is_set()
+    assert set(compute.tasks) == {'fail', 'child'}
+    compute.shutdown()
+
+
+def test_result_after_wait_all():
+    compute = LocalPoolComputeBackend(max_workers=1, max_finished=3)
+
+    def fail(**kwargs):
+        raise ValueError('boom')
+
+    for i in range(4):
+        compute.submit(_record, i, [], job_id=str(i))
+    compute.submit(fail, job_id='fail')
+    compute.wait_all()
+    # The results of the last completed jobs are kept, failed jobs included
+    assert compute.result('3') == 3
+    with pytest.raises(ValueError):
+        compute.result('fail')
+    with pytest.raises(KeyError):
+        compute.result('0')
+    compute.shutdown()
+
+
+@pytest.mark.parametrize("db", [DBConfig.mongodb_empty], indirect=True)
+def test_insert_runs_listener_in_background(db):
+    db.set_compute(LocalPoolComputeBackend(max_workers=2))
+    collection = MongoQuery(table='test', db=db)
+    db.execute(collection.insert_many([{'x': i} for i in range(5)]))
+
+    listener = Listener(
+        model=ObjectModel('m', object=lambda x: x + 1),
+        select=collection.find({}),
+        key='x',
+        identifier='listener',
+    )
+    db.add(listener)
+    db.execute(collection.insert_many([{'x': i} for i in range(5, 10)]))
+    db.compute.wait_all()
+
+    docs = list(db.execute(MongoQuery(table=listener.outputs).find({})))
+    assert len(docs) == 10
+    db.compute.shutdown()
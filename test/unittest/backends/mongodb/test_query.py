@@ -98,3 +98,16 @@ def test_special_query_serialization(db):
 
     rq2 = Document.decode(encoded_query).unpack()
     assert rq2.parts[0][1][0] == {'x': {'$lt': 9}}
+
+
+def test_select_using_keys(db):
+    ids = [r['_id'] for r in db.execute(q.MongoQuery(table='documents').find())][:3]
+
+    select = q.MongoQuery(table='documents').find().select_using_ids(ids)
+    out = list(db.execute(select.select_using_keys(['x'])))
+    assert len(out) == 3
+    assert all(set(r.keys()) == {'_id', 'x'} for r in out)
+
+    # An explicit projection is left untouched
+    select = q.MongoQuery(table='documents').find({}, {'_id': 1})
+    assert select.select_using_keys(['x']).parts == select.parts
@@ -56,3 +56,105 @@ def test(metadata):
 
     assert r['identifier'] == 'other-model'
     assert r['version'] == 0
+
+
+def _component(identifier, version, uuid):
+    return {
+        'identifier': identifier,
+        'type_id': 'model',
+        'version': version,
+        '_path': 'superduper.container.model.Model',
+        'uuid': uuid,
+    }
+
+
+def test_get_component_versions_and_subtree(metadata):
+    for version in range(3):
+        metadata.create_component(_component('my-model', version, f'm{version}'))
+    metadata.create_component(_component('child', 0, 'c0'))
+    metadata.create_component(_component('grandchild', 0, 'g0'))
+    metadata.create_parent_child('m2', 'c0')
+    metadata.create_parent_child('c0', 'g0')
+
+    versions = metadata.get_component_versions('model', 'my-model')
+    assert [r['version'] for r in versions] == [0, 1, 2]
+
+    r = metadata.get_component('model', 'my-model')
+    assert r['version'] == 2 and r['uuid'] == 'm2'
+
+    assert sorted(metadata.get_component_subtree('m2')) == [
+        ('c0', 'g0'),
+        ('m2', 'c0'),
+    ]
+    assert metadata.component_version_has_parents('model', 'child', 0)
+    assert not metadata.component_version_has_parents('model', 'my-model', 2)
+
+
+def test_job_writes_are_batched():
+    import datetime
+
+    metadata = SQLAlchemyMetadata(DATABASE_URL, job_flush_interval=0.1)
+
+    metadata.create_job(
+        {
+            'identifier': 'job-1',
+            'time': datetime.datetime.now(),
+            'status': 'pending',
+            'args': [],
+            'kwargs': {},
+            'stdout': [],
+            'stderr': [],
+            'job_id': 'job-1',
+        }
+    )
+    metadata.update_job('job-1', 'status', 'running')
+    assert metadata._job_writer.inserts['job-1']['status'] == 'running'
+
+    metadata.flush_jobs()
+    metadata.update_job('job-1', 'status', 'success')
+    assert metadata._job_writer.updates['job-1'] == {'status': 'success'}
+
+    assert metadata.get_job('job-1')['status'] == 'success'
+    assert not metadata._job_writer.updates
+    metadata.drop(force=True)
+
+
+def test_component_indexes(metadata):
+    from sqlalchemy import inspect
+
+    inspector = inspect(metadata.conn)
+    indexes = {i['name']: i['column_names'] for i in inspector.get_indexes('COMPONENT')}
+    assert indexes['COMPONENT_type_id_identifier_version'] == [
+        'type_id',
+        'identifier',
+        'version',
+    ]
+    child_indexes = inspector.get_indexes('PARENT_CHILD_ASSOCIATION')
+    assert [i['column_names'] for i in child_indexes] == [['child_id']]
+
+
+def test_show_cache_is_invalidated_on_write(metadata):
+    from superduper.backends.base.metadata import MetaDataStoreProxy
+
+    proxy = MetaDataStoreProxy(metadata, cache_ttl=60)
+    proxy.create_component(_component('my-model', 0, 'm0'))
+    assert proxy.show_component_versions('model', 'my-model') == [0]
+
+    # Writes bypassing the proxy are only seen once the TTL expires
+    metadata.create_component(_component('my-model', 1, 'm1'))
+    assert proxy.show_component_versions('model', 'my-model') == [0]
+
+    proxy.create_component(_component('my-model', 2, 'm2'))
+    assert proxy.show_component_versions('model', 'my-model') == [0, 1, 2]
+    assert proxy.show_components('model') == ['my-model']
+
+    proxy.delete_component_version('model', 'my-model', 2)
+    assert proxy.show_component_versions('model', 'my-model') == [0, 1]
+
+
+def test_job_flush_interval_is_configured():
+    from superduper.base.build import build_datalayer
+
+    db = build_datalayer(data_backend='sqlite://', metadata_job_flush_interval=0.1)
+    assert db.metadata._job_writer.flush_interval == 0.1
+    db.metadata.drop(force=True)
@@ -1,7 +1,10 @@
+from test.db_config import DBConfig
+from unittest.mock import patch
+
 import pytest
 
 from superduper.backends.mongodb.query import MongoQuery
-from superduper.backends.query_dataset import QueryDataset
+from superduper.backends.query_dataset import CachedQueryDataset, QueryDataset
 from superduper.components.model import Mapping
 
 try:
@@ -57,3 +60,46 @@ def test_query_dataset_base(db):
     r = train_data[0]
     assert isinstance(r, tuple)
     assert len(r) == 2
+
+
+@pytest.mark.skipif(not torch, reason='Torch not installed')
+@pytest.mark.parametrize(
+    "db",
+    [
+        (DBConfig.mongodb_data, {'n_data': 25}),
+        (DBConfig.sqldb_data, {'n_data': 25}),
+    ],
+    indirect=True,
+)
+def test_cached_query_dataset(db):
+    dataset = CachedQueryDataset(
+        db=db,
+        select=db['documents'].select_table,
+        mapping=Mapping('x', signature='singleton'),
+        fold=None,
+        prefetch_size=4,
+        max_cache_blocks=2,
+    )
+    assert len(dataset) == 25 and dataset.n_blocks == 7
+    primary_id = dataset.select.primary_id
+    expected = {
+        str(r[primary_id]): r['x'] for r in db.execute(db['documents'].select_table)
+    }
+
+    sampler = dataset.block_sampler(seed=0)
+    indices = list(sampler)
+    assert sorted(indices) == list(range(25))
+    assert {i // 4 for i in indices[:4]} == {indices[0] // 4}
+
+    for i in indices:
+        assert (dataset[i] == expected[str(dataset._ids[i])]).all()
+        assert len(dataset._cache) <= 2
+    with pytest.raises(IndexError):
+        dataset[25]
+
+    # In-memory test databases can't be reconnected to
+    with patch.object(db.databackend.type, 'reconnect') as reconnect:
+        dataset.reconnect()
+    reconnect.assert_called_once()
+    assert not dataset._cache
+
@@ -713,3 +713,43 @@ def test_retry_on_token_expiry(db):
             db.databackend.test_retry()
             assert reconnect.call_count == 1
             assert mock_test_retry.call_count == 2
+
+
+@pytest.mark.parametrize("db", EMPTY_CASES, indirect=True)
+def test_bulk_insert(db):
+    import pandas
+
+    db.cfg.auto_schema = True
+
+    rows = ({'x': i, 'y': numpy.full(4, i, dtype='float32')} for i in range(25))
+    ids = db.bulk_insert('documents', rows, batch_size=10, max_workers=3)
+    assert len(ids) == 25
+
+    df = pandas.DataFrame({'x': range(25, 30)})
+    df['y'] = [numpy.full(4, i, dtype='float32') for i in range(25, 30)]
+    ids += db.bulk_insert('documents', df, batch_size=2)
+    assert len(ids) == len(set(ids)) == 30
+
+    r = sorted(db['documents'].select().execute(), key=lambda r: r['x'])
+    assert [r['x'] for r in r] == list(range(30))
+    assert all(numpy.array_equal(r['y'], numpy.full(4, r['x'])) for r in r)
+    assert {r['_fold'] for r in r} <= {'train', 'valid'}
+
+
+@pytest.mark.parametrize("db", [DBConfig.mongodb_empty], indirect=True)
+def test_bulk_insert_artifacts(db):
+    from superduper.ext.numpy import array
+
+    schema = Schema(
+        'schema',
+        fields={
+            'x': dtype('int'),
+            'y': array(dtype='float32', shape=(4,), encodable='artifact'),
+        },
+    )
+    db.apply(Table('documents', schema=schema))
+
+    rows = [{'x': i, 'y': numpy.full(4, i % 3, dtype='float32')} for i in range(10)]
+    db.bulk_insert('documents', rows, batch_size=4)
+    r = sorted(db['documents'].select().execute(), key=lambda r: r['x'])
+    assert all(numpy.array_equal(r['y'], numpy.full(4, r['x'] % 3)) for r in r)
@@ -0,0 +1,165 @@
+from test.db_config import DBConfig
+
+import pytest
+from fastapi.testclient import TestClient
+
+from superduper import CFG
+from superduper.backends.ibis.field_types import dtype
+from superduper.base.config import PollingStrategy
+from superduper.base.enums import DBType
+from superduper.cdc.app import build_app
+from superduper.cdc.cdc import DatabaseChangeDataCapture
+from superduper.components.schema import Schema
+from superduper.components.table import Table
+
+
+class _External:
+    """Writes to the ``orders`` table bypassing the datalayer."""
+
+    def __init__(self, db):
+        self.mongo = db.databackend.db_type == DBType.MONGODB
+        if self.mongo:
+            self.collection = db.databackend.db['orders']
+        else:
+            db.apply(
+                Table(
+                    'orders',
+                    schema=Schema(
+                        'orders', fields={'id': dtype('str'), 'seq': dtype('int64')}
+                    ),
+                )
+            )
+            self.conn = db.databackend.conn
+        self.ids = {}
+
+    def insert(self, name, seq):
+        if self.mongo:
+            self.ids[name] = self.collection.insert_one({'seq': seq}).inserted_id
+        else:
+            self.ids[name] = name
+            self.conn.raw_sql(f"INSERT INTO orders (id, seq) VALUES ('{name}', {seq})")
+
+    def update(self, name, seq):
+        if self.mongo:
+            self.collection.update_one({'_id': self.ids[name]}, {'$set': {'seq': seq}})
+        else:
+            self.conn.raw_sql(f"UPDATE orders SET seq = {seq} WHERE id = '{name}'")
+
+    def delete(self, name):
+        if self.mongo:
+            self.collection.delete_one({'_id': self.ids[name]})
+        else:
+            self.conn.raw_sql(f"DELETE FROM orders WHERE id = '{name}'")
+
+
+@pytest.fixture
+def events(db, monkeypatch):
+    events = []
+
+    def on_event(query, ids, event_type='insert'):
+        events.append((query.table, event_type, sorted(map(str, ids))))
+
+    monkeypatch.setattr(db, 'on_event', on_event)
+    return events
+
+
+@pytest.mark.parametrize(
+    "db", [DBConfig.mongodb_empty, DBConfig.sqldb_empty], indirect=True
+)
+def test_polling_with_high_water_mark(db, events, tmp_path):
+    orders = _External(db)
+    orders.insert('a', 1)
+    orders.insert('b', 2)
+
+    cdc = DatabaseChangeDataCapture(
+        db,
+        PollingStrategy(auto_increment_field='seq', batch_size=2),
+        state_path=str(tmp_path),
+    )
+    cdc.listen('orders')
+    assert cdc.poll() == 0
+
+    # Rows sharing a mark are not skipped across batches
+    for name in 'cde':
+        orders.insert(name, 3)
+    orders.update('a', 4)
+    orders.delete('b')
+    assert cdc.poll() == 5
+
+    str_ids = {k: str(v) for k, v in orders.ids.items()}
+    assert events == [
+        ('orders', 'insert', sorted([str_ids['c'], str_ids['d']])),
+        ('orders', 'insert', [str_ids['e']]),
+        ('orders', 'upsert', [str_ids['a']]),
+        ('orders', 'delete', [str_ids['b']]),
+    ]
+    assert cdc.poll() == 0
+
+
+@pytest.mark.parametrize(
+    "db", [DBConfig.mongodb_empty, DBConfig.sqldb_empty], indirect=True
+)
+def test_polling_without_field(db, events, tmp_path):
+    orders = _External(db)
+    orders.insert('a', 1)
+
+    cdc = DatabaseChangeDataCapture(
+        db, PollingStrategy(batch_size=2), state_path=str(tmp_path)
+    )
+    cdc.listen('orders')
+    orders.insert('b', 1)
+    orders.delete('a')
+    # Updates are not detected without a field
+    orders.update('b', 2)
+    assert cdc.poll() == 2
+
+    assert events == [
+        ('orders', 'insert', [str(orders.ids['b'])]),
+        ('orders', 'delete', [str(orders.ids['a'])]),
+    ]
+
+    # The ids are not read again while the table is unchanged
+    scans = []
+    all_ids = cdc._all_ids
+    cdc._all_ids = lambda reader: scans.append(reader) or all_ids(reader)
+    assert cdc.poll() == 0
+    assert not scans
+
+
+@pytest.mark.parametrize(
+    "db", [DBConfig.mongodb_empty, DBConfig.sqldb_empty], indirect=True
+)
+def test_polling_resumes_from_saved_state(db, events, tmp_path):
+    orders = _External(db)
+    orders.insert('a', 1)
+    orders.insert('b', 2)
+
+    strategy = PollingStrategy(auto_increment_field='seq', batch_size=2)
+    cdc = DatabaseChangeDataCapture(db, strategy, state_path=str(tmp_path))
+    cdc.listen('orders')
+
+    # Changes made while the service is down are detected after a restart
+    orders.insert('c', 3)
+    orders.update('a', 4)
+    orders.delete('b')
+    cdc = DatabaseChangeDataCapture(db, strategy, state_path=str(tmp_path))
+    cdc.listen('orders')
+    assert cdc.poll() == 3
+
+    str_ids = {k: str(v) for k, v in orders.ids.items()}
+    assert events == [
+        ('orders', 'insert', [str_ids['c']]),
+        ('orders', 'upsert', [str_ids['a']]),
+        ('orders', 'delete', [str_ids['b']]),
+    ]
+
+
+def test_app_watches_tables_of_listeners(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(CFG.cluster.cdc, 'state_path', str(tmp_path))
+    with TestClient(build_app(db=db).app) as client:
+        assert client.get('/health').json() == {'tables': ['documents']}
+
+        listener = db.load('listener', db.show('listener')[0])
+        response = client.get('/listener/add', params={'name': listener.identifier})
+        assert response.status_code == 200
+        assert list(db.cdc.watchers) == ['documents']
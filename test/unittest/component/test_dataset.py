@@ -1,5 +1,6 @@
 from test.db_config import DBConfig
 
+import numpy
 import pytest
 
 from superduper.components.dataset import DataInit, Dataset
@@ -47,3 +48,25 @@ def test_init_data(db):
     for i, d in enumerate(data):
         assert d["x"] == i
         assert d["y"] == [1, 2, 3]
+
+
+@pytest.mark.parametrize("db", DBConfig.EMPTY_CASES, indirect=True)
+def test_dataset_sample_chunks(db):
+    db.cfg.auto_schema = True
+    db["documents"].insert([{"x": i} for i in range(25)]).execute()
+    select = db["documents"].select()
+
+    all_x = [r["x"] for r in db.execute(select)]
+    perm = numpy.random.default_rng(seed=42).permutation(25).tolist()
+    expected = [all_x[perm[i]] for i in range(10)]
+
+    d = Dataset(identifier="sampled", select=select, sample_size=10, random_seed=42)
+    db.apply(d)
+    dataset: Dataset = db.load("dataset", "sampled")
+
+    chunks = list(dataset.iter_chunks(4))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert [r["x"] for c in chunks for r in c] == expected
+    # Streaming doesn't load the data
+    assert dataset._data is None
+    assert [r["x"] for r in dataset.data] == expected
@@ -1,4 +1,5 @@
 import dataclasses as dc
+import typing as t
 from test.db_config import DBConfig
 from unittest.mock import MagicMock, patch
 
@@ -18,6 +19,8 @@ from superduper.components.dataset import Dataset
 from superduper.components.datatype import DataType, pickle_decode, pickle_encode
 from superduper.components.metric import Metric
 from superduper.components.model import (
+    APIBaseModel,
+    BatchedModel,
     Mapping,
     Model,
     ObjectModel,
@@ -149,6 +152,8 @@ def test_pm_predict_batches(predict_mixin):
     db.metadata = MagicMock()
     db.databackend = MagicMock()
     select = MagicMock(spec=Query)
+    select.primary_id = '_id'
+    db.execute.return_value = [Document({'x': 1, '_id': 1})]
     predict_mixin.db = db
 
     with patch.object(predict_mixin, 'predict_batches') as predict_func, patch.object(
@@ -162,12 +167,13 @@ def test_pm_predict_batches(predict_mixin):
 def test_pm_predict_with_select_ids(monkeypatch, predict_mixin):
     xs = [np.random.randn(4) for _ in range(10)]
 
-    docs = [Document({'x': x}) for x in xs]
+    docs = [Document({'x': x, '_id': i}) for i, x in enumerate(xs)]
     X = 'x'
 
     ids = [i for i in range(10)]
 
     select = MagicMock(spec=Query)
+    select.primary_id = '_id'
     db = MagicMock(spec=Datalayer)
     db.databackend = MagicMock(spec=BaseDataBackend)
     db.execute.return_value = docs
@@ -227,6 +233,36 @@ def test_pm_predict_with_select_ids(monkeypatch, predict_mixin):
             assert kwargs.get('outputs') == [str({'out': 2}) for _ in range(10)]
 
 
+@pytest.mark.parametrize("in_memory", [True, False])
+@pytest.mark.parametrize("db", [DBConfig.mongodb_empty], indirect=True)
+def test_predict_in_db_skips_deleted_documents(db, in_memory):
+    collection = MongoQuery(table='documents', db=db)
+    db.execute(collection.insert_many([{'x': i} for i in range(6)]))
+    ids = [str(r['_id']) for r in db.execute(collection.find({}, {'_id': 1}))]
+
+    # Deleted after the ids were listed, without triggering the listeners
+    db.databackend.db['documents'].delete_one({'_id': bson.ObjectId(ids[2])})
+
+    m = ObjectModel('m', object=lambda x: x + 1)
+    m.version = 0
+    m.predict_in_db(
+        X='x',
+        db=db,
+        select=collection.find(),
+        predict_id='m',
+        ids=ids,
+        overwrite=True,
+        in_memory=in_memory,
+    )
+    outputs = {
+        str(r['_source']): r['_outputs']['m']
+        for r in db.execute(MongoQuery(table='_outputs.m').find())
+    }
+    sources = {str(r['_id']): r['x'] for r in db.execute(collection.find())}
+    assert ids[2] not in outputs
+    assert outputs == {id: x + 1 for id, x in sources.items()}
+
+
 def test_model_append_metrics():
     @dc.dataclass
     class _Tmp(ObjectModel, _Fittable):
@@ -256,6 +292,27 @@ def test_model_append_metrics():
     assert model.trainer.metric_values.get('loss') == [0.5, 0.4]
 
 
+def test_mapping():
+    import pickle
+
+    rows = [Document({'x': i, 'y': {'z': [i]}, 'y.w': -i}) for i in range(3)]
+
+    mapping = Mapping((['x'], {'y.z': 'z', 'y.w': 'w'}), '*args,**kwargs')
+    assert mapping.map_many(rows) == [([i], {'z': [i], 'w': -i}) for i in range(3)]
+
+    mapping = Mapping({'y.z': 'z'}, '**kwargs')
+    assert mapping({'y': {'z': 1}}) == {'z': 1}
+    assert Mapping('x', 'singleton').map_many(rows) == [0, 1, 2]
+    assert Mapping(['x', 'y.z'], '*args')(rows[1]) == (1, [1])
+    assert Mapping('_base', 'singleton')({'x': 1}) == {'x': 1}
+
+    mapping = pickle.loads(pickle.dumps(Mapping(('x', 'y.z'), '*args')))
+    assert mapping(rows[2]) == (2, [2])
+
+    with pytest.raises(KeyError, match='y.v'):
+        Mapping('y.v', 'singleton')(rows[0])
+
+
 @patch.object(Mapping, '__call__')
 def test_model_validate(mock_call):
     # Check the metadadata recieves the correct values
@@ -266,6 +323,7 @@ def test_model_validate(mock_call):
     mock_call.return_value = 1
     dataset = MagicMock(spec=Dataset)
     dataset.data = [{'X': 1, 'y': 1} for _ in range(4)]
+    dataset.iter_chunks.return_value = [dataset.data]
 
     def acc(x, y):
         return sum([xx == yy for xx, yy in zip(x, y)]) / len(x)
@@ -421,6 +479,134 @@ def test_sequential_model():
     assert m.predict_batches([((1,), {}) for _ in range(4)]) == [4, 4, 4, 4]
 
 
+def test_batched_model():
+    import concurrent.futures
+
+    batch_sizes = []
+
+    class Doubler(ObjectModel):
+        def predict_batches(self, dataset):
+            batch_sizes.append(len(dataset))
+            return super().predict_batches(dataset)
+
+    m = BatchedModel(
+        identifier='test-batched-model',
+        model=Doubler(
+            identifier='test-doubler', object=lambda x: 2 * x, signature='singleton'
+        ),
+        max_batch_size=8,
+        max_latency=0.2,
+    )
+    assert m.signature == 'singleton'
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(m.predict, range(8)))
+
+    assert results == [2 * i for i in range(8)]
+    assert batch_sizes == [8]
+    assert m.predict_batches([1, 2]) == [2, 4]
+    m.batcher.close()
+
+
+@dc.dataclass
+class _CachedModel(ObjectModel):
+    _cacheable_predictions: t.ClassVar[bool] = True
+
+
+def test_predict_batches_with_cache(monkeypatch, tmp_path):
+    from superduper import CFG
+
+    monkeypatch.setattr(
+        CFG.prediction_cache, 'path', str(tmp_path / 'predictions.sqlite')
+    )
+    calls = []
+
+    def f(x):
+        calls.append(x)
+        return x * 5
+
+    with pytest.raises(ValueError):
+        ObjectModel('test-cache', object=f, cache_predictions=True)
+
+    m = _CachedModel('test-cache', object=f, cache_predictions=True)
+    assert m._predict_batches_with_cache([((1,), {}), ((2,), {})]) == [5, 10]
+    assert m._predict_batches_with_cache([((2,), {}), ((3,), {})]) == [10, 15]
+    assert calls == [1, 2, 3]
+
+    m.predict_kwargs = {'temperature': 0}
+    assert m._predict_batches_with_cache([((2,), {})]) == [10]
+    assert calls == [1, 2, 3, 2]
+
+    m.cache_predictions = False
+    assert m._predict_batches_with_cache([((1,), {})]) == [5]
+    assert calls == [1, 2, 3, 2, 1]
+
+
+def test_prediction_cache_key_covers_the_config(monkeypatch, tmp_path):
+    from superduper import CFG
+    from superduper.ext.llm.model import BaseLLM
+
+    monkeypatch.setattr(
+        CFG.prediction_cache, 'path', str(tmp_path / 'predictions.sqlite')
+    )
+    calls = []
+
+    @dc.dataclass
+    class _Echo(BaseLLM):
+        def init(self):
+            pass
+
+        def _generate(self, prompt, **kwargs):
+            calls.append(prompt)
+            return prompt
+
+    m = _Echo('echo', prompt='a {input}', cache_predictions=True)
+    assert m._predict_batches_with_cache(['x']) == ['a x']
+    # Settings which don't change the outputs keep the cache
+    m.num_workers = 4
+    assert m._predict_batches_with_cache(['x']) == ['a x']
+    assert calls == ['a x']
+
+    m.prompt = 'b {input}'
+    assert m._predict_batches_with_cache(['x']) == ['b x']
+    assert calls == ['a x', 'b x']
+
+
+@dc.dataclass
+class _Upper(APIBaseModel):
+    def predict(self, x):
+        return x.upper()
+
+
+def test_api_model_engine_is_shared():
+    import copy
+    import pickle
+
+    m = _Upper('upper', max_concurrency=2)
+    assert m._concurrent_map(m.predict, ['a', 'b', 'c']) == ['A', 'B', 'C']
+
+    # Copies share the engine, which isn't copied or pickled with the model
+    for other in (copy.deepcopy(m), pickle.loads(pickle.dumps(m))):
+        assert other.engine is m.engine
+        assert other._concurrent_map(other.predict, ['d']) == ['D']
+    assert _Upper('upper', max_concurrency=4).engine is not m.engine
+
+
+def test_prediction_cache_bounds(tmp_path, monkeypatch):
+    from superduper.misc import prediction_cache
+
+    cache = prediction_cache.PredictionCache(
+        str(tmp_path / 'predictions.sqlite'), ttl=60, max_entries=3
+    )
+    cache.put_many({str(i): [i] for i in range(5)})
+    assert len(cache) == 3
+    assert cache.get_many(['0', '4']) == {'4': [4]}
+
+    now = prediction_cache.time.time()
+    monkeypatch.setattr(prediction_cache.time, 'time', lambda: now + 61)
+    assert cache.get_many(['4']) == {}
+
+
 def test_pm_predict_with_select_ids_multikey(monkeypatch, predict_mixin_multikey):
     xs = [np.random.randn(4) for _ in range(10)]
 
@@ -433,6 +619,7 @@ def test_pm_predict_with_select_ids_multikey(monkeypatch, predict_mixin_multikey
         ids = [i for i in range(10)]
 
         select = MagicMock(spec=Query)
+        select.primary_id = '_id'
         db = MagicMock(spec=Datalayer)
         db.databackend = MagicMock(spec=BaseDataBackend)
         db.execute.return_value = docs
@@ -452,7 +639,7 @@ def test_pm_predict_with_select_ids_multikey(monkeypatch, predict_mixin_multikey
 
     # TODO - I don't know how this works given that the `_outputs` field
     # should break...
-    docs = [Document({'x': x, 'y': x}) for x in xs]
+    docs = [Document({'x': x, 'y': x, '_id': i}) for i, x in enumerate(xs)]
     X = ('x', 'y')
 
     _test(X, docs)
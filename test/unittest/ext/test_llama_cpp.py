@@ -5,8 +5,9 @@ class _MockedLlama:
     def create_completion(self, *args, **kwargs):
         return {'choices': [{'text': 'tested'}]}
 
-    def create_embedding(self, *args, **kwargs):
-        return [1]
+    def create_embedding(self, input, *args, **kwargs):
+        data = [{'index': i, 'embedding': [len(x)]} for i, x in enumerate(input)]
+        return {'data': data[::-1]}
 
 
 def test_llama():
@@ -42,4 +43,7 @@ def test_llama_embedding():
 
     text = 'testing prompt'
     output = llama.predict(text)
-    assert output == [1]
+    assert output == [len(text)]
+
+    texts = ['a' * n for n in (5, 1, 3, 2, 4)]
+    assert llama.predict_batches(texts) == [[5], [1], [3], [2], [4]]
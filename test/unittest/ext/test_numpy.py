@@ -0,0 +1,115 @@
+import numpy
+import pytest
+from sklearn.metrics import (
+    accuracy_score,
+    f1_score,
+    mean_absolute_error,
+    mean_squared_error,
+    precision_score,
+    recall_score,
+)
+
+from superduper.components.metric import Metric
+from superduper.ext.numpy import (
+    Accuracy,
+    F1Score,
+    MeanAbsoluteError,
+    MeanSquaredError,
+    Precision,
+    Recall,
+    array,
+)
+from superduper.ext.numpy.encoder import decode_array, encode_array
+
+
+@pytest.mark.parametrize(
+    'metric,expected',
+    [
+        (Accuracy('acc'), accuracy_score),
+        (Precision('precision'), precision_score),
+        (Recall('recall'), recall_score),
+        (F1Score('f1'), f1_score),
+        (MeanSquaredError('mse'), mean_squared_error),
+        (MeanAbsoluteError('mae'), mean_absolute_error),
+    ],
+)
+def test_incremental_metrics(metric, expected):
+    rng = numpy.random.default_rng(0)
+    x = rng.integers(0, 2, 1000).tolist()
+    y = rng.integers(0, 2, 1000).tolist()
+
+    state = metric.init_state()
+    for i in range(0, 1000, 64):
+        state = metric.update(state, x[i : i + 64], y[i : i + 64])
+
+    assert metric.compute(state) == pytest.approx(expected(y, x))
+    assert metric(x, y) == pytest.approx(expected(y, x))
+
+
+def test_accuracy_of_rows():
+    rng = numpy.random.default_rng(0)
+    x = rng.integers(0, 2, (1000, 3))
+    y = rng.integers(0, 2, (1000, 3))
+
+    state = Accuracy('acc').init_state()
+    for i in range(0, 1000, 64):
+        state = Accuracy('acc').update(state, x[i : i + 64], y[i : i + 64])
+
+    assert Accuracy('acc').compute(state) == pytest.approx(accuracy_score(y, x))
+    assert Accuracy('acc')(x, y) <= 1
+
+
+def test_metric_default_state():
+    metric = Metric('acc', object=accuracy_score)
+    state = metric.init_state()
+    state = metric.update(state, [1, 0], [1, 1])
+    state = metric.update(state, [1, 1], [1, 1])
+    assert metric.compute(state) == 0.75
+
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError, match='Shape mismatch'):
+        Accuracy('acc')([1, 2], [1])
+
+
+def test_array_codec():
+    datatype = array(dtype='float32')
+    x = numpy.random.randn(3, 5).astype('float32')
+
+    data = datatype.encoder(x)
+    decoded = datatype.decoder(data)
+    assert decoded.shape == (3, 5)
+    assert numpy.array_equal(decoded, x)
+    # Decoding is a view of the bytes
+    assert decoded.base is not None and not decoded.flags.writeable
+
+    # Variable shapes, non-contiguous and big-endian arrays round-trip
+    for y in [x[:2], x.T, x.astype('>f4')[0], numpy.float32(1.5)]:
+        y = numpy.asarray(y)
+        decoded = decode_array(encode_array(y))
+        assert decoded.shape == y.shape and decoded.dtype == y.dtype
+        assert numpy.array_equal(decoded, y)
+
+    # Bytes without a header are decoded with the configured dtype and shape
+    legacy = array(dtype='float32', shape=(3, 5))
+    assert numpy.array_equal(legacy.decoder(x.tobytes()), x)
+
+
+def test_array_codec_many():
+    datatype = array(dtype='float32', shape=(4,))
+    xs = [numpy.random.randn(4).astype('float32') for _ in range(10)]
+
+    encoded = datatype.encode_many(xs)
+    assert encoded == [datatype.encoder(x) for x in xs]
+    decoded = datatype.decode_many(encoded)
+    assert all(numpy.array_equal(x, y) for x, y in zip(xs, decoded))
+    assert datatype.decoder.decode_many(encoded, stack=True).shape == (10, 4)
+
+    ragged = datatype.encode_many([numpy.zeros(2, 'float32'), xs[0]])
+    assert [x.shape for x in datatype.decode_many(ragged)] == [(2,), (4,)]
+
+    legacy = [x.tobytes() for x in xs]
+    assert datatype.decoder.decode_many(legacy, stack=True).shape == (10, 4)
+
+    with pytest.raises(TypeError, match='dtype'):
+        datatype.encode_many([numpy.zeros(4)])
@@ -0,0 +1,87 @@
+import io
+
+import PIL.Image
+import pytest
+
+from superduper.base.document import Document
+from superduper.components.schema import Schema
+from superduper.ext.pillow.encoder import (
+    DecoderPILImage,
+    EncoderPILImage,
+    _is_loaded,
+    image_type,
+    load_images,
+    pil_image,
+)
+
+
+@pytest.fixture
+def image():
+    return PIL.Image.effect_mandelbrot((256, 128), (-2, -1, 1, 1), 100).convert('RGB')
+
+
+@pytest.mark.parametrize('format', ['png', 'jpeg', 'webp', 'raw'])
+def test_image_type_formats(image, format):
+    datatype = image_type(identifier=f'image_{format}', format=format, quality=90)
+    data = datatype.encoder(image)
+    decoded = datatype.decoder(data)
+    assert decoded.size == image.size
+    if format in ('png', 'raw'):
+        assert decoded.tobytes() == image.tobytes()
+    if format != 'raw':
+        assert datatype.media_type == f'image/{format}'
+        assert PIL.Image.open(io.BytesIO(data)).format == format.upper()
+
+
+def test_passthrough(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=50)
+    data = buffer.getvalue()
+
+    encoder = EncoderPILImage(format='jpeg', quality=95)
+    assert encoder(data) == data
+    # Opened, but not loaded, images of the same format aren't re-encoded
+    opened = PIL.Image.open(io.BytesIO(data))
+    assert encoder(opened) == data
+    # Once loaded, the image may have been modified
+    opened.load()
+    assert encoder(opened) != data
+
+
+def test_draft(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG')
+    decoder = DecoderPILImage(draft=(64, 32))
+    assert decoder(buffer.getvalue()).size == (64, 32)
+
+    png = EncoderPILImage()(image)
+    assert decoder(png).size == (64, 32)
+    assert DecoderPILImage(draft=(100, 100))(png).size == (256, 128)
+
+
+def test_load_images(image):
+    png = EncoderPILImage()(image)
+    decoder = DecoderPILImage()
+    inputs = [decoder(png) for _ in range(4)]
+    inputs.append(((decoder(png),), {'x': decoder(png)}))
+    load_images(inputs, max_workers=2)
+    assert inputs[0].tobytes() == image.tobytes()
+    assert inputs[-1][1]['x'].tobytes() == image.tobytes()
+
+    images = decoder.decode_many([png, png], max_workers=2)
+    assert [x.size for x in images] == [(256, 128)] * 2
+
+
+def test_documents_decode_loaded_images(image):
+    schema = Schema('image_schema', fields={'img': pil_image})
+    rows = [{'img': pil_image.encoder(image), 'n': i} for i in range(3)]
+    docs = Document.decode_many(rows, schema=schema)
+    assert [d['n'] for d in docs] == [0, 1, 2]
+    # The column is decoded and loaded at once by ``load_images``
+    assert all(_is_loaded(d['img']) for d in docs)
+    assert docs[0]['img'].tobytes() == image.tobytes()
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match='Unsupported image format'):
+        EncoderPILImage(format='gif')
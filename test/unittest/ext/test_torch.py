@@ -1,3 +1,5 @@
+import warnings
+
 import pytest
 
 try:
@@ -97,3 +99,99 @@ def test_fit(db, valid_dataset, model):
         datasets=[valid_dataset],
     )
     db.apply(m)
+    trainer = db.load('model', 'test').trainer
+    assert 1 <= len(trainer.checkpoints) <= trainer.keep_checkpoints
+    assert [s for _, s in trainer.checkpoints] == db.show(
+        'checkpoint', 'test-checkpoint'
+    )
+
+    # The checkpoints are removed with the model
+    db.remove('model', 'test', force=True)
+    assert db.show('checkpoint', 'test-checkpoint') == []
+
+
+@pytest.mark.skipif(not torch, reason='Torch not installed')
+def test_async_checkpointer(db):
+    from superduper.components.training import AsyncCheckpointer
+
+    checkpointer = AsyncCheckpointer(db, 'my-checkpoint', keep=2)
+    for step in range(4):
+        checkpointer.save(step, {'step': step})
+    checkpointer.wait()
+
+    # Each kept checkpoint is referenced as a version of a Checkpoint
+    assert checkpointer.checkpoints == [2, 3]
+    assert db.show('checkpoint', 'my-checkpoint') == [2, 3]
+    assert checkpointer.load() == {'step': 3}
+    assert checkpointer.load(2) == {'step': 2}
+    with pytest.raises(FileNotFoundError):
+        checkpointer.load(0)
+
+    checkpointer.clear()
+    assert db.show('checkpoint', 'my-checkpoint') == []
+    checkpointer.close()
+
+
+@pytest.mark.skipif(not torch, reason='Torch not installed')
+def test_async_checkpointer_replaces_previous_run(db):
+    import threading
+
+    from superduper.components.training import AsyncCheckpointer
+
+    previous = AsyncCheckpointer(db, 'my-checkpoint', keep=3)
+    for step in range(3):
+        previous.save(step, {'step': step})
+    previous.close()
+
+    checkpointer = AsyncCheckpointer(db, 'my-checkpoint', keep=3, replace_previous=True)
+    # Nothing is removed before a new checkpoint is stored
+    assert db.show('checkpoint', 'my-checkpoint') == [0, 1, 2]
+
+    threads = []
+    apply = db.apply
+
+    def _apply(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return apply(*args, **kwargs)
+
+    db.apply = _apply
+    try:
+        checkpointer.save(5, {'step': 5})
+        checkpointer.wait()
+    finally:
+        del db.apply
+    # The checkpoint is registered by the writer thread
+    assert threads and threading.current_thread() not in threads
+    assert db.show('checkpoint', 'my-checkpoint') == [5]
+    assert checkpointer.load() == {'step': 5}
+    checkpointer.close()
+
+
+@pytest.mark.skipif(not torch, reason='Torch not installed')
+def test_tensor_codec():
+    from superduper.ext.torch.encoder import tensor
+
+    datatype = tensor(dtype='float32')
+    x = torch.randn(3, 5)
+    assert torch.equal(datatype.decoder(datatype.encoder(x)), x)
+    assert torch.equal(datatype.decoder(datatype.encoder(x.T)), x.T)
+
+    xs = [torch.randn(4) for _ in range(3)]
+    decoded = datatype.decode_many(datatype.encode_many(xs))
+    assert all(torch.equal(a, b) for a, b in zip(xs, decoded))
+    stacked = datatype.decoder.decode_many(datatype.encode_many(xs), stack=True)
+    assert torch.equal(stacked, torch.stack(xs))
+
+    # Bytes without a header are decoded with the configured shape
+    legacy = tensor(dtype='float32', shape=(3, 5))
+    assert torch.equal(legacy.decoder(x.numpy().tobytes()), x)
+
+    # Decoded tensors are writable, without sharing the encoded bytes
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        data = datatype.encoder(x)
+        y = datatype.decoder(data)
+        y += 1
+        assert torch.equal(datatype.decoder(data), x)
+        for y in datatype.decode_many([data, data]):
+            y += 1
@@ -22,3 +22,28 @@ def test_predict(db):
 def test_model_as_listener_model(db):
     model = LLM(identifier="llm", model_name_or_path=TEST_MODEL_NAME)
     check_llm_as_listener_model(db, model)
+
+
+def test_stream_batches_use_predict_kwargs():
+    calls = []
+
+    class _Tokenizer:
+        eos_token_id = 0
+
+    def pipeline(prompts, **kwargs):
+        calls.append(kwargs)
+        return [[{'generated_text': p.upper()}] for p in prompts]
+
+    pipeline.tokenizer = _Tokenizer()
+    model = LLM(
+        identifier="llm",
+        model_name_or_path=TEST_MODEL_NAME,
+        predict_kwargs={'max_new_tokens': 5},
+        max_batch_size=2,
+    )
+    model.pipeline = pipeline
+    model._is_initialized = True
+
+    assert list(model.stream_batches(['a', 'bb', 'c'])) == ['A', 'BB', 'C']
+    assert model.predict_batches(['a'], max_new_tokens=3) == ['A']
+    assert [c['max_new_tokens'] for c in calls] == [5, 5, 3]
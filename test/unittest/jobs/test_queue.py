@@ -0,0 +1,127 @@
+import time
+from test.db_config import DBConfig
+
+import pytest
+
+from superduper.backends.local.compute import LocalComputeBackend
+from superduper.backends.mongodb.query import MongoQuery
+from superduper.base.event import Event
+from superduper.components.listener import Listener
+from superduper.components.model import ObjectModel
+from superduper.jobs.queue import DebouncedLocalQueuePublisher
+
+
+def _setup(db, **kwargs):
+    queue = DebouncedLocalQueuePublisher(**kwargs)
+    db.set_compute(LocalComputeBackend(queue=queue))
+    collection = MongoQuery(table='test', db=db)
+    db.execute(collection.insert_many([{'x': 0}]))
+    listener = Listener(
+        model=ObjectModel('m', object=lambda x: x + 1),
+        select=collection.find({}),
+        key='x',
+        identifier='listener',
+    )
+    db.add(listener)
+    db.compute.wait_all()
+    return collection, listener
+
+
+def _n_jobs(db):
+    return len(db.metadata.show_jobs('m', 'model'))
+
+
+@pytest.mark.parametrize("db", [DBConfig.mongodb_empty], indirect=True)
+def test_events_are_coalesced(db):
+    collection, listener = _setup(db, max_latency=60)
+    n_jobs = _n_jobs(db)
+
+    for i in range(1, 6):
+        db.execute(collection.insert_one({'x': i}))
+
+    assert db.compute.queue.pending == 5
+    db.compute.wait_all()
+    assert db.compute.queue.pending == 0
+    assert _n_jobs(db) == n_jobs + 1
+
+    docs = list(db.execute(MongoQuery(table=listener.outputs).find({})))
+    assert len(docs) == 6
+    db.compute.queue.close()
+
+
+@pytest.mark.parametrize("db", [DBConfig.mongodb_empty], indirect=True)
+def test_events_flushed_after_latency(db):
+    collection, listener = _setup(db, max_latency=0.1)
+    db.execute(collection.insert_one({'x': 1}))
+
+    for _ in range(50):
+        if not db.compute.queue.pending:
+            break
+        time.sleep(0.1)
+    time.sleep(0.2)
+    docs = list(db.execute(MongoQuery(table=listener.outputs).find({})))
+    assert len(docs) == 2
+    db.compute.queue.close()
+
+
+def test_flush_on_batch_size():
+    queue = DebouncedLocalQueuePublisher(max_latency=60, max_batch_size=3)
+    consumed = []
+
+    def consume(db, queue, components):
+        consumed.append(sum(len(v) for v in queue.values()))
+        queue.clear()
+
+    queue.consumer.consume = consume
+    queue.publish([Event('listener', 'l', str(i), 'insert') for i in range(3)])
+    for _ in range(50):
+        if consumed:
+            break
+        time.sleep(0.05)
+    assert consumed == [3]
+    queue.close()
+
+
+def test_publish_during_flush_does_not_block():
+    publisher = DebouncedLocalQueuePublisher(max_latency=60, max_queue_size=1)
+    consumed = []
+
+    def consume(db, queue, components):
+        consumed.append(sum(len(v) for v in queue.values()))
+        queue.clear()
+        # Jobs publish downstream events while the buffer is full
+        if len(consumed) == 1:
+            publisher.publish([Event('listener', 'l', 'a', 'insert')])
+            publisher.publish([Event('listener', 'l', 'b', 'insert')])
+
+    publisher.consumer.consume = consume
+    publisher.publish([Event('listener', 'l', '0', 'insert')])
+    publisher.flush()
+    assert publisher.pending == 2
+    publisher.close()
+    assert consumed == [1, 2]
+
+
+def test_events_of_hidden_components_are_kept():
+    publisher = DebouncedLocalQueuePublisher(max_latency=60)
+    visible = set()
+    consumed = []
+
+    def consume(db, queue, components):
+        for key in list(queue):
+            if key in visible:
+                consumed.extend(e.id for e in queue[key])
+                queue[key] = []
+
+    publisher.consumer.consume = consume
+    publisher.publish([Event('listener', 'l', '0', 'insert')])
+    publisher.flush()
+    assert publisher.pending == 1
+    assert consumed == []
+
+    publisher.publish([Event('listener', 'l', '1', 'insert')])
+    visible.add(('listener', 'l'))
+    publisher.flush()
+    assert publisher.pending == 0
+    assert consumed == ['0', '1']
+    publisher.close()
@@ -0,0 +1,80 @@
+import asyncio
+import http.server
+import threading
+import time
+
+import pytest
+import requests
+
+from superduper.misc.concurrency import RateLimiter, RequestEngine
+
+
+class _SlowHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.1)
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+
+
+def test_request_engine_throughput(slow_server):
+    engine = RequestEngine(max_concurrency=8)
+    session = requests.Session()
+
+    def get(i):
+        return session.get(f'{slow_server}/{i}').text
+
+    start = time.monotonic()
+    out = engine.map(get, range(16))
+    elapsed = time.monotonic() - start
+    engine.close()
+
+    assert out == [f'/{i}' for i in range(16)]
+    # 16 sequential requests would take 1.6 seconds
+    assert elapsed < 0.8
+
+
+def test_request_engine_async_function():
+    engine = RequestEngine(max_concurrency=4)
+    in_flight = []
+
+    async def f(x):
+        in_flight.append(x)
+        await asyncio.sleep(0.01 * (5 - x % 5))
+        assert len(in_flight) <= 4
+        in_flight.remove(x)
+        return x * 2
+
+    assert engine.map(f, range(10)) == [x * 2 for x in range(10)]
+    engine.close()
+
+
+def test_rate_limiter_budgets():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600)
+    assert limiter._wait_time(100) == 0
+
+    limiter._requests = 0.5
+    assert limiter._wait_time(0) == pytest.approx(0.5)
+
+    limiter._requests = 1
+    limiter._tokens = 100
+    assert limiter._wait_time(200) == pytest.approx(10)
+    assert limiter._wait_time(1000) == pytest.approx(50)
+
+    asyncio.run(limiter.acquire(50))
+    assert limiter._requests == pytest.approx(0, abs=0.1)
+    assert limiter._tokens == pytest.approx(50, abs=1)
@@ -0,0 +1,66 @@
+import os
+
+import numpy
+import pytest
+
+from superduper.components.schema import Schema
+from superduper.ext.numpy import array
+from superduper.misc import hash
+
+
+def test_hash_many(monkeypatch):
+    datas = [os.urandom(1000) for _ in range(8)]
+    expected = [hash.hash_bytes(d) for d in datas]
+    assert len(set(expected)) == 8
+    assert hash.hash_bytes(b'abc') == 'a9993e364706816aba3e25717850c26c9cd0d89d'
+    assert hash.hash_bytes(datas[0].hex()) == hash.hash_bytes(datas[0].hex().encode())
+
+    monkeypatch.setattr(hash, 'PARALLEL_HASH_BYTES', 0)
+    assert hash.hash_many(datas) == expected
+
+    with pytest.raises(ValueError):
+        hash.hash_bytes(1)
+
+
+def test_identifier_only_for_artifacts():
+    x = numpy.zeros(4, dtype='float32')
+    encodable = array(dtype='float32', shape=(4,))
+    artifact = array(dtype='float32', shape=(4,), encodable='artifact')
+
+    assert encodable.encode_data_with_identifier(x)[1] is None
+    data, identifier = artifact.encode_data_with_identifier(x)
+    assert identifier == hash.hash_bytes(data)
+
+    schema = Schema('s', fields={'a': encodable, 'b': artifact})
+    blobs = {}
+    out = schema.encode_data({'a': x, 'b': x}, builds={}, blobs=blobs, files={})
+    assert out['a'] == data
+    assert out['b'] == f'&:blob:{identifier}'
+    assert blobs == {identifier: data}
+
+
+def test_artifacts_of_a_batch_are_hashed_at_once(monkeypatch):
+    from superduper.base.document import Document
+
+    artifact = array(dtype='float32', shape=(4,), encodable='artifact')
+    schema = Schema('s', fields={'a': artifact, 'b': artifact})
+    batches = []
+    hash_many = hash.hash_many
+
+    def _hash_many(datas):
+        batches.append(len(datas))
+        return hash_many(datas)
+
+    monkeypatch.setattr('superduper.components.schema.hash_many', _hash_many)
+    documents = [
+        Document(
+            {
+                'a': numpy.full(4, i, dtype='float32'),
+                'b': numpy.full(4, -1 - i, dtype='float32'),
+            }
+        )
+        for i in range(5)
+    ]
+    encoded = Document.encode_many(documents, schema=schema)
+    assert batches == [10]
+    assert all(len(r['_blobs']) == 2 for r in encoded)
@@ -0,0 +1,77 @@
+import http.server
+import os
+import threading
+
+import pytest
+
+from superduper.misc import http_session
+
+PAYLOAD = bytes(range(256)) * 64
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections: set = set()
+
+    def do_GET(self):
+        self.connections.add(self.client_address)
+        body, status = PAYLOAD, 200
+        range_ = self.headers.get('Range')
+        if range_ is not None and self.path == '/ranged':
+            start = int(range_.split('=')[1].rstrip('-'))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body, status = PAYLOAD[start:], 206
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    _StubHandler.connections = set()
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http_session.reset_session()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    http_session.reset_session()
+    server.shutdown()
+
+
+def test_session_reuses_connections(stub_server):
+    for _ in range(10):
+        response = http_session.request('get', f'{stub_server}/plain')
+        assert response.content == PAYLOAD
+    assert len(_StubHandler.connections) == 1
+
+
+@pytest.mark.parametrize('path', ['ranged', 'plain'])
+def test_download_resumes(stub_server, tmp_path, path):
+    target = str(tmp_path / 'file.bin')
+    with open(target + '.part', 'wb') as f:
+        f.write(PAYLOAD[:1000])
+
+    http_session.download(f'{stub_server}/{path}', target, chunk_size=1024)
+
+    with open(target, 'rb') as f:
+        assert f.read() == PAYLOAD
+    assert not os.path.exists(target + '.part')
+
+
+def test_download_already_complete(stub_server, tmp_path):
+    target = str(tmp_path / 'file.bin')
+    with open(target + '.part', 'wb') as f:
+        f.write(PAYLOAD)
+
+    http_session.download(f'{stub_server}/ranged', target)
+
+    with open(target, 'rb') as f:
+        assert f.read() == PAYLOAD
@@ -0,0 +1,200 @@
+import http.server
+import json
+import threading
+import time
+
+import numpy
+import pytest
+
+from superduper import CFG
+from superduper.base import exceptions
+from superduper.misc import http_session, server, wire
+
+
+def test_frame_round_trip():
+    vectors = numpy.random.randn(10, 8).astype(numpy.float32)
+    scores = numpy.arange(10, dtype=numpy.float64)
+    frame = wire.encode_frame({'ids': list('abcdefghij'), 'vectors': vectors, 'n': 3})
+    obj = wire.decode_frame(frame)
+
+    assert obj['ids'] == list('abcdefghij')
+    assert obj['n'] == 3
+    assert obj['vectors'].dtype == numpy.float32
+    numpy.testing.assert_array_equal(obj['vectors'], vectors)
+
+    obj = wire.decode_frame(wire.encode_frame({'scores': scores, 'empty': scores[:0]}))
+    numpy.testing.assert_array_equal(obj['scores'], scores)
+    assert obj['empty'].shape == (0,)
+
+    with pytest.raises(wire.FrameError):
+        wire.decode_frame(frame[:-1])
+
+
+def test_decode_frames_from_chunks():
+    vectors = numpy.random.randn(100, 4).astype(numpy.float32)
+    frames = list(
+        wire.encode_frames(
+            wire.vector_frames([str(i) for i in range(100)], vectors, frame_size=30)
+        )
+    )
+    assert len(frames) == 4
+    stream = b''.join(frames)
+    chunks = [stream[i : i + 7] for i in range(0, len(stream), 7)]
+
+    objs = list(wire.decode_frames(chunks))
+    assert [len(o['ids']) for o in objs] == [30, 30, 30, 10]
+    numpy.testing.assert_array_equal(
+        numpy.concatenate([o['vectors'] for o in objs]), vectors
+    )
+
+    with pytest.raises(wire.FrameError):
+        list(wire.decode_frames(chunks[:-1]))
+
+
+def test_accepts_frames():
+    assert wire.accepts_frames(f'{wire.CONTENT_TYPE}, application/json')
+    assert wire.accepts_frames(f'application/json;q=0.5, {wire.CONTENT_TYPE};q=1')
+    assert not wire.accepts_frames('application/json')
+    assert not wire.accepts_frames(None)
+
+
+class _EchoHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    accept_frames = True
+    announce_frames = True
+    status = 200
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding') != 'chunked':
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = b''
+        while True:
+            size = int(self.rfile.readline().strip(), 16)
+            body += self.rfile.read(size)
+            self.rfile.readline()
+            if size == 0:
+                return body
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path.startswith('/handshake/config'):
+            out = {'frames': True} if self.announce_frames else None
+            return self._send(200, json.dumps(out).encode(), 'application/json')
+        if self.status != 200:
+            return self._send(self.status, b'{}', 'application/json')
+        if self.headers.get('Content-Type') == wire.CONTENT_TYPE:
+            if not self.accept_frames:
+                return self._send(415, b'{}', 'application/json')
+            objs = list(wire.decode_frames(body))
+            out = [{'ids': o['ids'], 'scores': o['vectors'].sum(1)} for o in objs]
+            if wire.accepts_frames(self.headers.get('Accept')):
+                return self._send(
+                    200, b''.join(wire.encode_frames(out)), wire.CONTENT_TYPE
+                )
+            out = [{'ids': o['ids'], 'scores': o['scores'].tolist()} for o in out]
+            return self._send(200, json.dumps(out).encode(), 'application/json')
+        data = json.loads(body or b'null')
+        if isinstance(data, list):
+            data = [{'ids': [d['id']], 'scores': [sum(d['vector'])]} for d in data]
+        self._send(200, json.dumps(data).encode(), 'application/json')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def echo_server(monkeypatch):
+    _EchoHandler.accept_frames = True
+    _EchoHandler.announce_frames = True
+    _EchoHandler.status = 200
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _EchoHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    uri = f'http://127.0.0.1:{httpd.server_address[1]}'
+    monkeypatch.setattr(CFG.cluster.vector_search, 'uri', uri)
+    server._handshake.cache_clear()
+    server._frames_unsupported.clear()
+    http_session.reset_session()
+    yield uri
+    http_session.reset_session()
+    httpd.shutdown()
+
+
+def test_request_server_frames(echo_server):
+    vectors = numpy.random.randn(1000, 16).astype(numpy.float32)
+    ids = [str(i) for i in range(1000)]
+    out = server.request_server_frames(
+        'vector_search', wire.vector_frames(ids, vectors, 256), 'query/search'
+    )
+    assert [o['ids'] for o in out] == [ids[i : i + 256] for i in range(0, 1000, 256)]
+    numpy.testing.assert_allclose(
+        numpy.concatenate([o['scores'] for o in out]), vectors.sum(1), rtol=1e-5
+    )
+
+
+def test_request_server_frames_fallback(echo_server):
+    _EchoHandler.accept_frames = False
+    frames = [{'ids': ['a'], 'vectors': numpy.ones((1, 2))}]
+    assert server.request_server_frames('vector_search', frames, 'add/search') is None
+    assert ('vector_search', 'add/search') in server._frames_unsupported
+
+
+def test_request_server_frames_not_announced(echo_server):
+    _EchoHandler.announce_frames = False
+    frames = [{'ids': ['a'], 'vectors': numpy.ones((1, 2))}]
+    assert server.request_server_frames('vector_search', frames, 'add/search') is None
+    assert not server._frames_unsupported
+
+
+def test_request_server_frames_error_is_not_fallback(echo_server):
+    _EchoHandler.status = 422
+    frames = [{'ids': ['a'], 'vectors': numpy.ones((1, 2))}]
+    with pytest.raises(exceptions.ServiceRequestException):
+        server.request_server_frames('vector_search', frames, 'add/search')
+    assert not server._frames_unsupported
+
+    _EchoHandler.status = 200
+    out = server.request_server_frames('vector_search', frames, 'add/search')
+    assert out[0]['ids'] == ['a']
+
+
+def test_frames_are_smaller_than_json():
+    n, dim = 1_000, 128
+    vectors = numpy.random.randn(n, dim).astype(numpy.float32)
+    ids = [str(i) for i in range(n)]
+
+    json_data = [{'id': i, 'vector': v.tolist()} for i, v in zip(ids, vectors)]
+    json_size = len(json.dumps(json_data))
+    frames_size = sum(
+        len(f) for f in wire.encode_frames(wire.vector_frames(ids, vectors, 4096))
+    )
+    assert frames_size < json_size / 3
+
+
+@pytest.mark.skip(reason='Benchmark, run manually')
+def test_round_trip_benchmark(echo_server):
+    n, dim = 10_000, 128
+    vectors = numpy.random.randn(n, dim).astype(numpy.float32)
+    ids = [str(i) for i in range(n)]
+
+    start = time.perf_counter()
+    json_data = [{'id': i, 'vector': v.tolist()} for i, v in zip(ids, vectors)]
+    server.request_server('vector_search', data=json_data, endpoint='add/search')
+    json_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frames = wire.vector_frames(ids, vectors, frame_size=4096)
+    server.request_server_frames('vector_search', frames, 'add/search')
+    frames_time = time.perf_counter() - start
+
+    print(
+        f'\n{n} x {dim} vectors: JSON in {json_time:.2f}s, '
+        f'frames in {frames_time:.2f}s'
+    )
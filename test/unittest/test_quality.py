@@ -19,7 +19,7 @@ DEFECTS = {
 ALLOWABLE_DEFECTS = {
     'cast': 5,  # Try to keep this down
     'noqa': 5,  # This should never change
-    'type_ignore': 13,  # This should only ever increase in obscure edge cases
+    'type_ignore': 12,  # This should only ever increase in obscure edge cases
 }
 
 
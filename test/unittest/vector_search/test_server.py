@@ -0,0 +1,139 @@
+import json
+
+import numpy
+import pytest
+from fastapi.testclient import TestClient
+
+from superduper import CFG
+from superduper.misc import wire
+from superduper.vector_search.server.app import build_app
+from superduper.vector_search.server.service import VectorSearchService
+
+VECTOR_INDEX = 'test_vector_search'
+FRAMES = {'Content-Type': wire.CONTENT_TYPE, 'Accept': wire.CONTENT_TYPE}
+
+
+@pytest.fixture
+def primary(db, monkeypatch):
+    monkeypatch.setattr(CFG.cluster.vector_search, 'sync_interval', 3600)
+    with TestClient(build_app(db=db, replica=False).app) as client:
+        yield client
+
+
+def _replica(db, primary):
+    def fetch(since, epoch):
+        response = primary.get('/changes', params={'since': since, 'epoch': epoch})
+        return response.content
+
+    return TestClient(build_app(db=db, replica=True, fetch=fetch).app)
+
+
+def _query(client, vector, n=3):
+    frame = {'vectors': numpy.asarray(vector, dtype=numpy.float32)[None], 'n': n}
+    response = client.post(
+        '/query/search',
+        params={'vector_index': VECTOR_INDEX},
+        content=wire.encode_frame(frame),
+        headers=FRAMES,
+    )
+    assert response.status_code == 200
+    (out,) = wire.decode_frames(response.content)
+    return out['ids']
+
+
+def _add(client, ids, vectors):
+    frames = wire.vector_frames(ids, numpy.asarray(vectors, dtype=numpy.float32), 2)
+    return client.post(
+        '/add/search',
+        params={'vector_index': VECTOR_INDEX},
+        content=b''.join(wire.encode_frames(frames)),
+        headers=FRAMES,
+    )
+
+
+def test_primary_serves_frames_and_json(primary):
+    assert primary.get('/list/search').json() == [VECTOR_INDEX]
+    cfg = json.dumps(CFG.comparables)
+    response = primary.post('/handshake/config', params={'cfg': cfg})
+    assert response.json() == {'frames': True}
+
+    vectors = numpy.eye(16, dtype=numpy.float32)[:3] * 100
+    assert _add(primary, ['a', 'b', 'c'], vectors).status_code == 200
+    assert _query(primary, vectors[1], n=1) == ['b']
+
+    # Batched queries return one frame per vector
+    response = primary.post(
+        '/query/batch/search',
+        params={'vector_index': VECTOR_INDEX, 'n': 1},
+        content=wire.encode_frame({'vectors': vectors}),
+        headers=FRAMES,
+    )
+    assert [f['ids'] for f in wire.decode_frames(response.content)] == [
+        ['a'],
+        ['b'],
+        ['c'],
+    ]
+
+    # JSON clients are still served
+    response = primary.post(
+        '/query/search',
+        params={'vector_index': VECTOR_INDEX, 'n': 1},
+        json=vectors[2].tolist(),
+    )
+    assert response.json()['ids'] == ['c']
+
+    response = primary.post(
+        '/delete/search', params={'vector_index': VECTOR_INDEX}, json=['c']
+    )
+    assert response.status_code == 200
+    assert _query(primary, vectors[2], n=1) != ['c']
+
+    response = primary.post(
+        '/query/search',
+        params={'vector_index': 'unknown'},
+        json=vectors[0].tolist(),
+    )
+    assert response.status_code == 400
+
+
+def test_replica_follows_primary(db, primary):
+    with _replica(db, primary) as replica:
+        service = replica.app.state.service
+        assert replica.get('/list/search').json() == [VECTOR_INDEX]
+
+        vectors = numpy.eye(16, dtype=numpy.float32)[:2] * 100
+        _add(primary, ['a', 'b'], vectors)
+        primary.post(
+            '/delete/search', params={'vector_index': VECTOR_INDEX}, json=['a']
+        )
+        assert service.sync() == 2
+
+        assert _query(replica, vectors[1], n=1) == ['b']
+        assert _query(replica, vectors[0], n=1) != ['a']
+        assert replica.get('/health').json()['replica']
+
+        # Writes are only accepted by the primary
+        assert _add(replica, ['c'], vectors[:1]).status_code == 403
+
+
+def test_replica_rebuilds_when_behind(db):
+    primary = VectorSearchService(db, log_size=2)
+    primary.start()
+    replica = VectorSearchService(
+        db,
+        replica=True,
+        fetch=lambda since, epoch: b''.join(
+            wire.encode_frames(primary.changes(since, epoch))
+        ),
+    )
+    replica.sync()
+    assert replica.list() == [VECTOR_INDEX]
+
+    for i in range(3):
+        primary.add(VECTOR_INDEX, [f'new-{i}'], numpy.ones((1, 16)) * i)
+    header, *_ = primary.changes(replica._cursor[1], replica._cursor[0])
+    assert header['reset']
+
+    # The rebuilt index holds the vectors of the database
+    assert replica.sync() == 0
+    assert 'new-0' not in replica.searchers[VECTOR_INDEX].index
@@ -39,3 +39,102 @@ def test_index(index_data, measure, vector_index_cls):
     res, _ = h.find_nearest_from_array(y, 1)
 
     assert res[0] == 'new'
+
+
+def test_lance_index_lifecycle(index_data, monkeypatch):
+    monkeypatch.setattr(LanceVectorSearcher, 'INDEX_THRESHOLD', 512)
+    monkeypatch.setattr(LanceVectorSearcher, 'MAX_FRAGMENTS', 2)
+
+    h = np.random.randn(512, 16).astype('float32')
+    ids = [f"id-{i}'" for i in range(512)]
+    searcher = LanceVectorSearcher(identifier='my-index', dimensions=16, measure='l2')
+    for i in range(0, 512, 128):
+        searcher.add(
+            [VectorItem(id=id, vector=v) for id, v in zip(ids[i:], h[i : i + 128])]
+        )
+    searcher.post_create()
+
+    assert len(searcher.dataset.get_fragments()) <= 2
+    assert 'vector' in searcher._indexed_columns(searcher.dataset)
+
+    res, _ = searcher.find_nearest_from_id(ids[7], n=1)
+    assert res == [ids[7]]
+
+    searcher.delete(ids[:10])
+    searcher.post_create()
+    assert len(searcher) == 502
+    res, _ = searcher.find_nearest_from_array(h[11], n=5, within_ids=ids[:12])
+    assert res[0] == ids[11]
+    assert set(res) <= set(ids[10:12])
+
+
+def test_lance_dataset_handle_and_batched_search(index_data):
+    h, ids, _ = index_data
+    searcher = LanceVectorSearcher(
+        identifier='my-index', h=h, index=ids, measure='l2', dimensions=3
+    )
+    dataset = searcher.dataset
+    assert searcher.dataset is dataset
+
+    searcher.add([VectorItem(id='new', vector=np.array([0.5, 0.5, 0.0]))])
+    assert searcher.dataset is not dataset
+    assert searcher.dataset.version > dataset.version
+
+    # Writes of another searcher of the same dataset are seen
+    other = LanceVectorSearcher(identifier='my-index', measure='l2', dimensions=3)
+    other.add([VectorItem(id='other', vector=np.array([0.0, 0.5, 0.5]))])
+    assert searcher.find_nearest_from_array(np.array([0.0, 0.5, 0.5]), n=1)[0] == [
+        'other'
+    ]
+
+    queries = [np.array([0, 0, 1.0]), np.array([1.0, 0, 0])]
+    results = searcher.find_nearest_from_arrays(queries, n=2, within_ids=ids)
+    assert results == [
+        searcher.find_nearest_from_array(q, n=2, within_ids=ids) for q in queries
+    ]
+    assert [r[0][0] for r in results] == [ids[0], ids[2]]
+
+
+def test_atlas_bulk_writes_and_search_pipeline(monkeypatch):
+    import mongomock
+
+    from superduper.vector_search.atlas import MongoAtlasVectorSearcher
+
+    monkeypatch.setattr(CFG.cluster.vector_search, 'uri', 'mongomock://vectors')
+    monkeypatch.setattr(MongoAtlasVectorSearcher, '_check_if_exists', lambda *_: 0)
+    database = mongomock.MongoClient().db
+    commands = []
+    monkeypatch.setattr(type(database), 'command', lambda self, c: commands.append(c))
+    searcher = MongoAtlasVectorSearcher(
+        identifier='my-index',
+        collection='vectors',
+        output_path='_outputs.x.model.0',
+        num_candidates_multiplier=20,
+        batch_size=3,
+        database=database,
+    )
+    # The external index maps the stored ids and vectors
+    fields = commands[0]['indexes'][0]['definition']['mappings']['fields']
+    assert set(fields) == {'id', 'vector'}
+
+    items = [VectorItem(id=str(i), vector=np.full(3, i)) for i in range(10)]
+    searcher.add(items)
+    searcher.add(items[:5])
+    assert searcher.index.count_documents({}) == 10
+    assert searcher._get_vector('4') == [4, 4, 4]
+
+    searcher.delete([str(i) for i in range(7)])
+    assert sorted(r['id'] for r in searcher.index.find()) == ['7', '8', '9']
+
+    pipelines = []
+    monkeypatch.setattr(
+        type(searcher.index),
+        'aggregate',
+        lambda self, pl: pipelines.append(pl) or [{'id': '8', 'score': 1.0}],
+    )
+    ids, _ = searcher.find_nearest_from_array(np.ones(3), n=5, within_ids=['7', '8'])
+    assert ids == ['8']
+    search = pipelines[0][0]['$vectorSearch']
+    assert search['numCandidates'] == 100
+    assert search['path'] == 'vector'
+    assert search['filter'] == {'id': {'$in': ['7', '8']}}